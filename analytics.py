@@ -0,0 +1,478 @@
+"""Institution-wide attendance analytics over an in-memory column store.
+
+The statistics pages read one user's trigger-maintained summary at a time.
+Reporting across every user instead loads the attendance history once into
+compact columns, one slot per mark:
+
+    user    int32  user code (index into Analytics.user_ids)
+    klass   int32  class code (index into Analytics.class_ids)
+    day     int32  date ordinal
+    status  int8   1 present, 0 absent, -1 a dead slot awaiting compaction
+
+and answers every report with a group-by over them. With NumPy installed
+the columns are viewed as arrays without copying and grouped with
+bincount; without it the same results come from plain loops, more slowly.
+refresh() then applies only the marks changed since the last load, read
+from the attendance_changes log.
+
+    analytics = Analytics(db)
+    analytics.refresh()
+    analytics.threshold_breaches(75.0)
+
+    python analytics.py --db attendify.db --threshold 75
+"""
+import argparse
+import json
+import time
+from array import array
+from datetime import date
+
+from database import Database, percentage
+
+try:
+    import numpy as np
+except ImportError:  # optional; only speed depends on it
+    np = None
+
+# SQLite's julianday() of 0001-01-01 minus one, so days come out as date ordinals
+ORDINAL_SQL = "CAST(julianday({column}) - 1721424.5 AS INTEGER)"
+
+CLASSES_SQL = "SELECT id, user_id, subject_name FROM classes WHERE id > ? ORDER BY id"
+ATTENDANCE_SQL = f"""
+    SELECT class_id, {ORDINAL_SQL.format(column='date')}, status = 'Present'
+    FROM attendance
+"""
+CHANGE_HEAD_SQL = "SELECT seq FROM sqlite_sequence WHERE name = 'attendance_changes'"
+CHANGE_TAIL_SQL = "SELECT MIN(seq) FROM attendance_changes"
+# Current state of every key changed in (after, upto]; present is NULL once deleted
+CHANGES_SQL = f"""
+    SELECT DISTINCT ch.class_id, {ORDINAL_SQL.format(column='ch.date')}, a.status = 'Present'
+    FROM attendance_changes ch
+    LEFT JOIN attendance a ON a.class_id = ch.class_id AND a.date = ch.date
+    WHERE ch.seq > ? AND ch.seq <= ?
+"""
+
+FETCH_ROWS = 50_000
+DAY_BITS = 20  # date ordinals stay below 2**20 until the year 2870
+GROUPS = ("user", "class", "subject", "week")
+
+
+def week_start(week):
+    """The Monday a week number (ordinal // 7 based) starts on"""
+    return date.fromordinal(week * 7 + 1)
+
+
+def _rate(total, present):
+    return {'total': total, 'present': present, 'absent': total - present,
+            'percentage': percentage(present, total)}
+
+
+class Analytics:
+    """Column store of every attendance mark, with group-by reports.
+
+    ``db`` is a Database or a ShardedDatabase; shards are loaded into the
+    same columns. Reads run inside db.snapshot(), so each load sees one
+    consistent state while writers carry on.
+
+    The change log trims itself to its newest entries (see
+    database.CHANGE_LOG_KEEP). With ``prune=True`` this reader also empties
+    it up to what it has read after each load or refresh; only do that when
+    it is the sole reader, as any other one then has to reload in full.
+    """
+
+    # Above this many changes per live row a full reload is cheaper
+    RELOAD_RATIO = 0.25
+
+    def __init__(self, db, use_numpy=True, prune=False):
+        self.db = db
+        self.sources = list(getattr(db, 'shards', None) or [db])
+        self.use_numpy = use_numpy and np is not None
+        self.prune = prune
+        self.loads = 0
+        self.refreshes = 0
+        self.last_refresh = None
+        self._clear()
+
+    def _clear(self):
+        self.user_ids = []
+        self.class_ids = []
+        self.subjects = []
+        self._user_codes = {}
+        self._class_codes = {}
+        self._subject_codes = {}
+        self.class_user = array('i')
+        self.class_subject = array('i')
+        self.user = array('i')
+        self.klass = array('i')
+        self.day = array('i')
+        self.status = array('b')
+        self.dead = 0
+        # Per source: last change seq and class id already loaded
+        self._seen = [{'seq': 0, 'class_id': 0} for _ in self.sources]
+
+    # Loading
+
+    def load(self):
+        """Read every source from scratch; returns a report"""
+        start = time.perf_counter()
+        self._clear()
+        for source, seen in zip(self.sources, self._seen):
+            with source.snapshot() as conn:
+                seen['seq'] = self._change_head(conn)
+                self._load_classes(conn, seen)
+                cursor = conn.execute(ATTENDANCE_SQL)
+                while True:
+                    rows = cursor.fetchmany(FETCH_ROWS)
+                    if not rows:
+                        break
+                    self._append(rows)
+        self.loads += 1
+        self.prune_changes()
+        return self._finish('full', len(self.status), start)
+
+    def refresh(self):
+        """Apply marks changed since the last load or refresh; returns a report.
+
+        Falls back to a full load the first time, when the change log was
+        pruned past what was seen, or when so much changed that patching
+        would cost more than reloading.
+        """
+        start = time.perf_counter()
+        if not self.loads:
+            return self.load()
+        changed = 0
+        for source, seen in zip(self.sources, self._seen):
+            with source.snapshot() as conn:
+                head = self._change_head(conn)
+                if head == seen['seq']:
+                    continue
+                tail = conn.execute(CHANGE_TAIL_SQL).fetchone()[0]
+                if (tail is None or tail > seen['seq'] + 1
+                        or head - seen['seq'] > self.RELOAD_RATIO * max(self.live_rows(), 1)):
+                    break
+                self._load_classes(conn, seen)
+                rows = conn.execute(CHANGES_SQL, (seen['seq'], head)).fetchall()
+                seen['seq'] = head
+            self._apply(rows)
+            changed += len(rows)
+        else:
+            if self.dead > self.RELOAD_RATIO * len(self.status):
+                self._compact()
+            if changed:
+                self.prune_changes()
+            return self._finish('incremental', changed, start)
+        return self.load()
+
+    def prune_changes(self):
+        """Drop the change log entries already read; returns how many"""
+        if not self.prune:
+            return 0
+        return sum(source.prune_attendance_changes(seen['seq'])
+                   for source, seen in zip(self.sources, self._seen) if seen['seq'])
+
+    def _finish(self, mode, rows, start):
+        self.refreshes += 1
+        self.last_refresh = {'mode': mode, 'rows': rows, 'live_rows': self.live_rows(),
+                             'seconds': round(time.perf_counter() - start, 4)}
+        return dict(self.last_refresh)
+
+    @staticmethod
+    def _change_head(conn):
+        row = conn.execute(CHANGE_HEAD_SQL).fetchone()
+        return row[0] if row else 0
+
+    def _load_classes(self, conn, seen):
+        for class_id, user_id, subject in conn.execute(CLASSES_SQL, (seen['class_id'],)):
+            if user_id not in self._user_codes:
+                self._user_codes[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+            if subject not in self._subject_codes:
+                self._subject_codes[subject] = len(self.subjects)
+                self.subjects.append(subject)
+            self._class_codes[class_id] = len(self.class_ids)
+            self.class_ids.append(class_id)
+            self.class_user.append(self._user_codes[user_id])
+            self.class_subject.append(self._subject_codes[subject])
+            seen['class_id'] = class_id
+
+    def _append(self, rows):
+        """Add (class_id, day, present) rows as new slots"""
+        if not rows:
+            return
+        class_ids, days, statuses = zip(*rows)
+        codes = list(map(self._class_codes.__getitem__, class_ids))
+        self.klass.extend(codes)
+        self.user.extend(map(self.class_user.__getitem__, codes))
+        self.day.extend(days)
+        self.status.extend(statuses)
+
+    def _apply(self, rows):
+        """Kill the slots of changed keys, then append the rows that still exist"""
+        keys = {(self._class_codes[class_id], day)
+                for class_id, day, _ in rows if class_id in self._class_codes}
+        for slot in self._find(keys):
+            self.status[slot] = -1
+            self.dead += 1
+        self._append([row for row in rows if row[2] is not None])
+
+    def _find(self, keys):
+        """Slots of live marks whose (class code, day) is in keys"""
+        if not keys:
+            return []
+        if self.use_numpy:
+            wanted = np.fromiter(((code << DAY_BITS) | day for code, day in keys), dtype=np.int64, count=len(keys))
+            found = np.isin(self._key_column(), wanted) & (self._view(self.status) >= 0)
+            return np.flatnonzero(found).tolist()
+        return [slot for slot, (code, day, status) in enumerate(zip(self.klass, self.day, self.status))
+                if status >= 0 and (code, day) in keys]
+
+    def _compact(self):
+        """Drop dead slots"""
+        if self.use_numpy:
+            live = self._view(self.status) >= 0
+            columns = [array(column.typecode, self._view(column)[live].tobytes())
+                       for column in (self.user, self.klass, self.day, self.status)]
+        else:
+            live = [status >= 0 for status in self.status]
+            columns = [array(column.typecode, (value for value, keep in zip(column, live) if keep))
+                       for column in (self.user, self.klass, self.day, self.status)]
+        self.user, self.klass, self.day, self.status = columns
+        self.dead = 0
+
+    # Columns
+
+    @staticmethod
+    def _view(column):
+        """A NumPy array sharing the column's memory (drop it before the column grows)"""
+        if not column:
+            return np.zeros(0, dtype=np.dtype(column.typecode))
+        return np.frombuffer(column, dtype=np.dtype(column.typecode))
+
+    def _key_column(self):
+        return (self._view(self.klass).astype(np.int64) << DAY_BITS) | self._view(self.day)
+
+    def live_rows(self):
+        return len(self.status) - self.dead
+
+    def _grouped(self, by, user_id=None, since=None, until=None):
+        """Count marks per group; returns {(code, ...): (total, present)}.
+
+        ``by`` names columns from GROUPS; weeks are ordinal // 7 numbers.
+        """
+        for name in by:
+            if name not in GROUPS:
+                raise ValueError(f"Unknown group {name!r}; choose from {', '.join(GROUPS)}")
+        user_code = None
+        if user_id is not None:
+            if user_id not in self._user_codes:
+                return {}
+            user_code = self._user_codes[user_id]
+        first = since.toordinal() if since else None
+        last = until.toordinal() if until else None
+        if self.use_numpy:
+            return self._grouped_numpy(by, user_code, first, last)
+        return self._grouped_python(by, user_code, first, last)
+
+    def _grouped_numpy(self, by, user_code, first, last):
+        status = self._view(self.status)
+        day = self._view(self.day)
+        mask = status >= 0
+        if user_code is not None:
+            mask &= self._view(self.user) == user_code
+        if first is not None:
+            mask &= day >= first
+        if last is not None:
+            mask &= day <= last
+        klass = self._view(self.klass)[mask]
+        day = day[mask]
+        columns = {
+            'user': lambda: self._view(self.user)[mask],
+            'class': lambda: klass,
+            'subject': lambda: self._view(self.class_subject)[klass],
+            'week': lambda: day // 7,
+        }
+        # One int64 key per row, mixing the group columns in a fixed radix
+        key = np.zeros(len(klass), dtype=np.int64)
+        bases = []
+        for name in by:
+            column = columns[name]().astype(np.int64)
+            low = int(column.min()) if len(column) else 0
+            base = (int(column.max()) if len(column) else 0) - low + 1
+            key = key * base + (column - low)
+            bases.append((low, base))
+        present = status[mask]
+        size = 1
+        for _, base in bases:
+            size *= base
+        if size <= max(4 * len(key), 1 << 16):
+            # Dense enough to count every possible key directly
+            totals = np.bincount(key, minlength=size)
+            hits = np.bincount(key, weights=present, minlength=size)
+            keys = np.flatnonzero(totals)
+            totals, hits = totals[keys], hits[keys]
+        else:
+            keys, inverse = np.unique(key, return_inverse=True)
+            totals = np.bincount(inverse)
+            hits = np.bincount(inverse, weights=present)
+        groups = {}
+        for key, total, hit in zip(keys.tolist(), totals.tolist(), hits.tolist()):
+            codes = []
+            for low, base in reversed(bases):
+                key, code = divmod(key, base)
+                codes.append(code + low)
+            groups[tuple(reversed(codes))] = (total, int(hit))
+        return groups
+
+    def _grouped_python(self, by, user_code, first, last):
+        class_subject = self.class_subject
+        pick = {
+            'user': lambda user, klass, day: user,
+            'class': lambda user, klass, day: klass,
+            'subject': lambda user, klass, day: class_subject[klass],
+            'week': lambda user, klass, day: day // 7,
+        }
+        pickers = [pick[name] for name in by]
+        groups = {}
+        for user, klass, day, status in zip(self.user, self.klass, self.day, self.status):
+            if (status < 0 or (user_code is not None and user != user_code)
+                    or (first is not None and day < first) or (last is not None and day > last)):
+                continue
+            key = tuple(picker(user, klass, day) for picker in pickers)
+            total, present = groups.get(key, (0, 0))
+            groups[key] = (total + 1, present + status)
+        return groups
+
+    # Reports
+
+    def overall(self):
+        """Marks and attendance percentage across everyone"""
+        total, present = self._grouped(()).get((), (0, 0))
+        result = _rate(total, present)
+        result['users'] = len(self._grouped(('user',)))
+        return result
+
+    def user_rates(self, min_total=1):
+        """Per-user totals and percentages, by user id"""
+        rows = [dict(user_id=self.user_ids[code], **_rate(total, present))
+                for (code,), (total, present) in self._grouped(('user',)).items()
+                if total >= min_total]
+        # Codes follow the order users added their first class, not their ids
+        return sorted(rows, key=lambda row: row['user_id'])
+
+    def subject_rates(self, user_id=None):
+        """Per-subject totals and percentages, for everyone or one user"""
+        rows = [dict(subject=self.subjects[code], **_rate(total, present))
+                for (code,), (total, present) in self._grouped(('subject',), user_id).items()]
+        return sorted(rows, key=lambda row: row['subject'])
+
+    def user_subject_rates(self, min_total=1):
+        """Totals and percentages per (user, subject)"""
+        rows = [dict(user_id=self.user_ids[user], subject=self.subjects[subject], **_rate(total, present))
+                for (user, subject), (total, present) in self._grouped(('user', 'subject')).items()
+                if total >= min_total]
+        return sorted(rows, key=lambda row: (row['user_id'], row['subject']))
+
+    def weekly_rates(self, user_id=None, since=None, until=None):
+        """Totals and percentages per week (starting Monday), oldest first"""
+        return [dict(week=week_start(week).isoformat(), **_rate(total, present))
+                for (week,), (total, present) in sorted(self._grouped(('week',), user_id, since, until).items())]
+
+    def threshold_breaches(self, threshold=75.0, by='user', min_total=1):
+        """Users (by='user') or user-subject pairs (by='subject') below a percentage, worst first"""
+        if by == 'user':
+            rows = self.user_rates(min_total)
+        elif by == 'subject':
+            rows = self.user_subject_rates(min_total)
+        else:
+            raise ValueError(f"Unknown grouping {by!r}; choose user or subject")
+        return sorted((row for row in rows if row['percentage'] < threshold),
+                      key=lambda row: (row['percentage'], row['user_id']))
+
+    def distribution(self, bins=10, by='user', min_total=1):
+        """How many users (or user-subject pairs) fall in each percentage band"""
+        rows = self.user_rates(min_total) if by == 'user' else self.user_subject_rates(min_total)
+        values = [row['present'] / row['total'] * 100 for row in rows]
+        width = 100 / bins
+        if self.use_numpy:
+            counts = np.histogram(np.asarray(values, dtype=np.float64), bins=bins, range=(0, 100))[0].tolist()
+        else:
+            counts = [0] * bins
+            for value in values:
+                counts[min(int(value // width), bins - 1)] += 1
+        return [{'low': round(index * width, 2), 'high': round((index + 1) * width, 2), 'count': count}
+                for index, count in enumerate(counts)]
+
+    def stats(self):
+        """Sizes of the column store"""
+        columns = (self.user, self.klass, self.day, self.status, self.class_user, self.class_subject)
+        return {
+            'rows': len(self.status),
+            'live_rows': self.live_rows(),
+            'dead_rows': self.dead,
+            'users': len(self.user_ids),
+            'classes': len(self.class_ids),
+            'subjects': len(self.subjects),
+            'column_bytes': sum(len(column) * column.itemsize for column in columns),
+            'numpy': self.use_numpy,
+            'loads': self.loads,
+            'last_refresh': self.last_refresh,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Institution-wide attendance report")
+    parser.add_argument("--db", default="attendify.db", help="SQLite database file (the directory with --shards)")
+    parser.add_argument("--shards", help="comma-separated shard files of a sharded deployment")
+    parser.add_argument("--threshold", type=float, default=75.0, help="report users below this percentage")
+    parser.add_argument("--bins", type=int, default=10, help="bands in the percentage distribution")
+    parser.add_argument("--no-numpy", action="store_true", help="use the pure-Python group-bys")
+    parser.add_argument("--compare", action="store_true",
+                        help="also time Database.get_subject_statistics for every user")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    if args.shards:
+        from sharding import ShardedDatabase
+        db = ShardedDatabase(args.db, args.shards.split(","))
+    else:
+        db = Database(args.db)
+    try:
+        analytics = Analytics(db, use_numpy=not args.no_numpy)
+        loaded = analytics.load()
+        start = time.perf_counter()
+        report = {
+            'overall': analytics.overall(),
+            'subjects': analytics.subject_rates(),
+            'weeks': analytics.weekly_rates(),
+            'breaches': analytics.threshold_breaches(args.threshold),
+            'subject_breaches': len(analytics.threshold_breaches(args.threshold, by='subject')),
+            'distribution': analytics.distribution(args.bins),
+        }
+        report['report_seconds'] = round(time.perf_counter() - start, 4)
+        report['load'] = loaded
+        report['store'] = analytics.stats()
+        if args.compare:
+            start = time.perf_counter()
+            for user_id in analytics.user_ids:
+                db.get_subject_statistics(user_id)
+            report['per_user_loop_seconds'] = round(time.perf_counter() - start, 4)
+    finally:
+        db.close()
+
+    overall = report['overall']
+    print(f"{report['store']['live_rows']} marks, {overall['users']} users, {len(report['subjects'])} subjects: "
+          f"{overall['percentage']}% present (loaded in {loaded['seconds']} s, "
+          f"reports in {report['report_seconds']} s, numpy {'on' if report['store']['numpy'] else 'off'})")
+    if 'per_user_loop_seconds' in report:
+        print(f"per-user get_subject_statistics loop: {report['per_user_loop_seconds']} s")
+    print(f"{len(report['breaches'])} users and {report['subject_breaches']} user-subject pairs "
+          f"below {args.threshold}%")
+    for band in report['distribution']:
+        print(f"  {band['low']:>5.1f}-{band['high']:<5.1f}% {band['count']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
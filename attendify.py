@@ -0,0 +1,285 @@
+"""Command-line interface to an Attendify database, for scripts and cron jobs.
+
+    python -m attendify add-user alice --password secret
+    python -m attendify add-class --user alice Physics Monday "09:00 - 10:00"
+    python -m attendify mark --user alice 12 Present --date 2026-03-02
+    python -m attendify stats --user alice
+    python -m attendify batch < commands.jsonl
+
+Every command prints its result as JSON. ``batch`` reads one command per
+line from stdin, e.g. {"command": "mark", "user": "alice", "class_id": 12,
+"status": "Present"}, runs them all on one connection inside a single
+transaction and prints one JSON result per line, followed by a summary
+on stderr. No Tk is imported, so start-up stays cheap.
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import bulk_io
+from database import ATTENDANCE_STATUSES, DAYS, Database
+from services import AttendanceService
+
+
+class CommandError(Exception):
+    """A command that was understood but could not be carried out"""
+
+
+class _Rollback(Exception):
+    """Raised inside an atomic batch to discard its writes"""
+
+
+def text(name, value):
+    """Check that an argument is a string (batch lines can carry any JSON type)"""
+    if not isinstance(value, str):
+        raise CommandError(f"{name} must be a string, not {type(value).__name__}")
+    return value
+
+
+def integer(name, value):
+    """Check that an argument is an integer"""
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise CommandError(f"{name} must be an integer, not {type(value).__name__}")
+    return value
+
+
+@contextmanager
+def savepoint(conn):
+    """Undo the enclosed statements on error without ending the outer transaction"""
+    conn.execute("SAVEPOINT command")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK TO command")
+        raise
+    finally:
+        conn.execute("RELEASE command")
+
+
+class Cli:
+    """The commands, as methods taking plain keyword arguments.
+
+    The same methods back the argparse subcommands and the batch mode, so a
+    batch line takes the same argument names as the command line.
+    """
+
+    COMMANDS = {
+        "add-user": "add_user",
+        "add-class": "add_class",
+        "list-classes": "list_classes",
+        "delete-class": "delete_class",
+        "mark": "mark",
+        "stats": "stats",
+        "import": "import_file",
+        "export": "export_file",
+        "prune-changes": "prune_changes",
+    }
+
+    def __init__(self, db):
+        self.db = db
+        self.service = AttendanceService(db)
+        self.users = {}  # username -> id, so a batch looks each user up once
+
+    def run(self, command, **kwargs):
+        """Run one command by its command-line name"""
+        if command not in self.COMMANDS:
+            raise CommandError(f"Unknown command: {command!r}")
+        try:
+            return getattr(self, self.COMMANDS[command])(**kwargs)
+        except TypeError as e:
+            raise CommandError(f"Bad arguments for {command}: {e}") from None
+
+    def user_id(self, username):
+        """Map a username to its id"""
+        text("user", username)
+        if username not in self.users:
+            user_id = self.db.get_user_id(username)
+            if user_id is None:
+                raise CommandError(f"Unknown user: {username!r}")
+            self.users[username] = user_id
+        return self.users[username]
+
+    def owned_class(self, user, class_id):
+        """Check that a class exists and belongs to the user; returns the user id"""
+        user_id = self.user_id(user)
+        if self.db.get_class_owner(integer("class_id", class_id)) != user_id:
+            raise CommandError(f"Unknown class: {class_id!r}")
+        return user_id
+
+    def add_user(self, username, password):
+        text("username", username)
+        text("password", password)
+        success, result = self.service.create_user(username, password)
+        if not success:
+            raise CommandError(result)
+        self.users[username.strip()] = result
+        return {'id': result, 'username': username.strip()}
+
+    def add_class(self, user, subject, day, time_slot, professor="", room=""):
+        for name, value in (("subject", subject), ("day", day), ("time_slot", time_slot),
+                            ("professor", professor), ("room", room)):
+            text(name, value)
+        day = day.capitalize()
+        if day not in DAYS:
+            raise CommandError(f"Invalid day: {day}")
+        success, result = self.db.add_class(self.user_id(user), subject.strip(), day,
+                                            time_slot.strip(), professor.strip(), room.strip())
+        if not success:
+            raise CommandError(result)
+        return {'id': result}
+
+    def list_classes(self, user):
+        return self.db.get_user_classes(self.user_id(user))
+
+    def delete_class(self, user, class_id):
+        self.owned_class(user, class_id)
+        self.db.delete_class(class_id)
+        return {'id': class_id}
+
+    def mark(self, user, class_id, status, date=None):
+        integer("class_id", class_id)
+        status = text("status", status).capitalize()
+        if date is not None:
+            text("date", date)
+        if status not in ATTENDANCE_STATUSES:
+            raise CommandError(f"Invalid status: {status!r}")
+        outcome, = self.db.mark_attendance_many(self.user_id(user), [(class_id, date, status)])
+        if not outcome['ok']:
+            raise CommandError(outcome['error'])
+        return {'class_id': class_id, 'date': outcome['date'], 'status': status}
+
+    def stats(self, user):
+        return self.service.get_statistics(self.user_id(user))
+
+    def import_file(self, path, user=None, format=None):
+        user_id = self.user_id(user) if user else None
+        return bulk_io.import_file(self.db, path, user_id=user_id, fmt=format)
+
+    def export_file(self, path, user=None, format=None):
+        user_id = self.user_id(user) if user else None
+        return bulk_io.export_file(self.db, path, user_id=user_id, fmt=format)
+
+    def prune_changes(self):
+        return {'pruned': self.db.prune_attendance_changes()}
+
+    def batch(self, lines, out, atomic=False):
+        """Run JSON commands, one per line, in one transaction; returns a summary.
+
+        Each command runs in its own savepoint, so a failed one is reported
+        and undone without touching the others. With ``atomic`` any failure
+        rolls the whole batch back instead.
+        """
+        summary = {'commands': 0, 'failed': 0, 'committed': False}
+        start = time.perf_counter()
+        try:
+            with self.db.transaction() as conn:
+                for number, line in enumerate(lines, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    summary['commands'] += 1
+                    try:
+                        request = json.loads(line)
+                        if not isinstance(request, dict):
+                            raise CommandError("Expected a JSON object")
+                        with savepoint(conn):
+                            result = self.run(request.pop('command', None), **request)
+                        reply = {'line': number, 'ok': True, 'result': result}
+                    except Exception as e:
+                        # Anything a malformed line trips over stays on that line
+                        summary['failed'] += 1
+                        reply = {'line': number, 'ok': False, 'error': str(e) or type(e).__name__}
+                    out.write(to_json(reply) + "\n")
+                if atomic and summary['failed']:
+                    raise _Rollback()
+            summary['committed'] = True
+        except _Rollback:
+            # Reads cached during the batch may include the discarded writes
+            self.db.mark_changed(*self.db.versions)
+        elapsed = time.perf_counter() - start
+        summary['seconds'] = round(elapsed, 3)
+        summary['commands_per_sec'] = round(summary['commands'] / elapsed, 1) if elapsed > 0 else 0.0
+        return summary
+
+
+def to_json(value):
+    return json.dumps(value, default=str)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="attendify", description=__doc__.split("\n")[0])
+    parser.add_argument("--db", default="attendify.db", help="SQLite database file")
+    parser.add_argument("--indent", type=int, help="pretty-print JSON output")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sub = commands.add_parser("add-user", help="create an account")
+    sub.add_argument("username")
+    sub.add_argument("--password", required=True)
+
+    sub = commands.add_parser("add-class", help="add a weekly class")
+    sub.add_argument("--user", required=True)
+    sub.add_argument("subject")
+    sub.add_argument("day", help="weekday name, e.g. Monday")
+    sub.add_argument("time_slot", help='e.g. "09:00 - 10:30"')
+    sub.add_argument("--professor", default="")
+    sub.add_argument("--room", default="")
+
+    sub = commands.add_parser("list-classes", help="list a user's timetable")
+    sub.add_argument("--user", required=True)
+
+    sub = commands.add_parser("delete-class", help="delete a class and its attendance")
+    sub.add_argument("--user", required=True)
+    sub.add_argument("class_id", type=int)
+
+    sub = commands.add_parser("mark", help="mark attendance for one class")
+    sub.add_argument("--user", required=True)
+    sub.add_argument("class_id", type=int)
+    sub.add_argument("status", help="Present or Absent")
+    sub.add_argument("--date", type=lambda text: date.fromisoformat(text).isoformat(),
+                     help="YYYY-MM-DD (default: today)")
+
+    sub = commands.add_parser("stats", help="overall and per-subject statistics")
+    sub.add_argument("--user", required=True)
+
+    for name, verb in (("import", "read"), ("export", "write")):
+        sub = commands.add_parser(name, help=f"{verb} classes and attendance as CSV or JSON Lines")
+        sub.add_argument("path")
+        sub.add_argument("--user", help="limit to / default to this user")
+        sub.add_argument("--format", choices=("csv", "jsonl"), help="default: from the extension")
+
+    commands.add_parser("prune-changes",
+                        help="empty the attendance change log (analytics then reloads in full)")
+
+    sub = commands.add_parser("batch", help="run JSON commands from stdin in one transaction")
+    sub.add_argument("--atomic", action="store_true",
+                     help="roll everything back if any command fails")
+    return parser
+
+
+def main(argv=None):
+    args = vars(build_parser().parse_args(argv))
+    db = Database(args.pop("db"))
+    indent = args.pop("indent")
+    command = args.pop("command")
+    cli = Cli(db)
+    try:
+        if command == "batch":
+            summary = cli.batch(sys.stdin, sys.stdout, **args)
+            print(to_json(summary), file=sys.stderr)
+            return 1 if summary['failed'] else 0
+        try:
+            result = cli.run(command, **args)
+        except (CommandError, ValueError) as e:
+            print(to_json({'ok': False, 'error': str(e)}), file=sys.stderr)
+            return 1
+        print(json.dumps(result, default=str, indent=indent))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
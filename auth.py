@@ -59,17 +59,17 @@ class AuthFrame(tk.Frame):
         btn_frame = tk.Frame(inner, bg="#1e293b")
         btn_frame.pack(fill="x")
         
-        login_btn = ttk.Button(btn_frame,
+        self.login_btn = ttk.Button(btn_frame,
                               text="Login",
                               style="Primary.TButton",
                               command=self.login)
-        login_btn.pack(side="left", expand=True, fill="x", padx=(0, 10))
+        self.login_btn.pack(side="left", expand=True, fill="x", padx=(0, 10))
         
-        signup_btn = ttk.Button(btn_frame,
+        self.signup_btn = ttk.Button(btn_frame,
                                text="Sign Up",
                                style="Secondary.TButton",
                                command=self.signup)
-        signup_btn.pack(side="right", expand=True, fill="x")
+        self.signup_btn.pack(side="right", expand=True, fill="x")
         
         # Bind Enter key
         self.username_entry.bind("<Return>", lambda e: self.password_entry.focus())
@@ -78,40 +78,57 @@ class AuthFrame(tk.Frame):
         # Focus username
         self.username_entry.focus()
     
+    def set_busy(self, busy):
+        """Disable the buttons while a (deliberately slow) password check runs"""
+        state = "disabled" if busy else "normal"
+        self.login_btn.config(state=state)
+        self.signup_btn.config(state=state)
+    
     def login(self):
         """Handle login"""
+        if self.app.dispatcher.is_busy("auth"):
+            return
         username = self.username_entry.get().strip()
         password = self.password_entry.get()
         
-        if not username or not password:
-            messagebox.showerror("Error", "Please enter both username and password")
-            return
-        
-        success, user_id = self.app.db.authenticate_user(username, password)
-        
-        if success:
-            self.app.login_success(user_id, username)
-        else:
-            messagebox.showerror("Error", "Invalid username or password")
-            self.password_entry.delete(0, tk.END)
+        def on_result(outcome):
+            self.set_busy(False)
+            success, result = outcome
+            if success:
+                self.app.login_success(result, username)
+            else:
+                messagebox.showerror("Error", result)
+                self.password_entry.delete(0, tk.END)
+        
+        self.set_busy(True)
+        self.app.dispatcher.submit(self.app.service.authenticate, username, password,
+                                   key="auth", group="auth",
+                                   on_success=on_result,
+                                   on_error=self.on_error)
     
     def signup(self):
         """Handle signup"""
+        if self.app.dispatcher.is_busy("auth"):
+            return
         username = self.username_entry.get().strip()
         password = self.password_entry.get()
         
-        if not username or not password:
-            messagebox.showerror("Error", "Please enter both username and password")
-            return
-        
-        if len(password) < 4:
-            messagebox.showerror("Error", "Password must be at least 4 characters")
-            return
-        
-        success, result = self.app.db.create_user(username, password)
-        
-        if success:
-            messagebox.showinfo("Success", "Account created successfully! Please login.")
-            self.password_entry.delete(0, tk.END)
-        else:
-            messagebox.showerror("Error", result)
\ No newline at end of file
+        def on_result(outcome):
+            self.set_busy(False)
+            success, result = outcome
+            if success:
+                messagebox.showinfo("Success", "Account created successfully! Please login.")
+                self.password_entry.delete(0, tk.END)
+            else:
+                messagebox.showerror("Error", result)
+        
+        self.set_busy(True)
+        self.app.dispatcher.submit(self.app.service.create_user, username, password,
+                                   key="auth", group="auth",
+                                   on_success=on_result,
+                                   on_error=self.on_error)
+    
+    def on_error(self, exc):
+        """Re-enable the form after an unexpected failure"""
+        self.set_busy(False)
+        messagebox.showerror("Error", str(exc))
@@ -0,0 +1,116 @@
+"""Password hashing benchmarks.
+
+Picks the PBKDF2 iteration count that makes one password check take about
+``--target-ms`` on this machine, then measures logins/sec with several
+threads signing in at once. Pass the suggested count to
+``Database(password_iterations=...)``.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import passwords
+from database import Database, QueryStats
+
+
+def time_hash(iterations, repeats=3):
+    """Best-of-n milliseconds for one hash at this work factor"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        passwords.hash_password("benchmark-password", iterations)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def calibrate(target_ms, probe_iterations=20_000, step=1_000):
+    """Scale a probe measurement to the target latency, then check it"""
+    probe_ms = time_hash(probe_iterations)
+    iterations = max(step, int(probe_iterations * target_ms / probe_ms) // step * step)
+    return {
+        'target_ms': target_ms,
+        'iterations': iterations,
+        'measured_ms': round(time_hash(iterations), 2),
+        'default_iterations': passwords.DEFAULT_ITERATIONS,
+        'default_ms': round(time_hash(passwords.DEFAULT_ITERATIONS), 2),
+    }
+
+
+def bench_logins(iterations, thread_counts, logins, users=16):
+    """Run concurrent authenticate_user calls and report throughput and latency"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench_auth.db"), max_connections=max(thread_counts) + 1,
+                      password_iterations=iterations)
+        try:
+            names = [f"user{i}" for i in range(users)]
+            for name in names:
+                db.create_user(name, "secret-" + name)
+
+            def login(i):
+                name = names[i % users]
+                start = time.perf_counter()
+                ok, _ = db.authenticate_user(name, "secret-" + name)
+                elapsed = time.perf_counter() - start
+                db.release_connection()
+                return ok, elapsed
+
+            for threads in thread_counts:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    outcomes = list(pool.map(login, range(logins)))
+                wall = time.perf_counter() - start
+                latencies = sorted(elapsed for _, elapsed in outcomes)
+                results.append({
+                    'threads': threads,
+                    'logins': logins,
+                    'failed': sum(1 for ok, _ in outcomes if not ok),
+                    'logins_per_sec': round(logins / wall, 2),
+                    'p50_ms': round(QueryStats._percentile(latencies, 0.50) * 1000, 2),
+                    'p95_ms': round(QueryStats._percentile(latencies, 0.95) * 1000, 2),
+                    'p99_ms': round(QueryStats._percentile(latencies, 0.99) * 1000, 2),
+                })
+        finally:
+            db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate and benchmark password hashing")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="desired time for one password check")
+    parser.add_argument("--iterations", type=int,
+                        help="skip calibration and use this work factor")
+    parser.add_argument("--threads", default="1,2,4,8",
+                        help="comma-separated concurrent sign-in counts")
+    parser.add_argument("--logins", type=int, default=64,
+                        help="logins per thread count")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.iterations:
+        calibration = {'iterations': args.iterations,
+                       'measured_ms': round(time_hash(args.iterations), 2)}
+    else:
+        calibration = calibrate(args.target_ms)
+        print(f"target {calibration['target_ms']:.0f} ms -> {calibration['iterations']} iterations "
+              f"(measured {calibration['measured_ms']:.1f} ms; default "
+              f"{calibration['default_iterations']} takes {calibration['default_ms']:.1f} ms)")
+
+    thread_counts = [int(count) for count in args.threads.split(",")]
+    results = bench_logins(calibration['iterations'], thread_counts, args.logins)
+    for result in results:
+        print(f"{result['threads']:>3} threads  {result['logins_per_sec']:>8.1f} logins/s  "
+              f"p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  "
+              f"p99 {result['p99_ms']:.1f} ms  failed {result['failed']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'calibration': calibration, 'logins': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
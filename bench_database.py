@@ -0,0 +1,210 @@
+"""Database layer benchmarks.
+
+Builds a seeded synthetic dataset per size (see datagen.py), times every
+public Database method against it and reports throughput and latency
+percentiles. Save runs with ``--json`` and pass an older file to
+``--compare`` to see how the current tree moved.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+
+import datagen
+from database import DAYS, Database, QueryStats
+
+# Password checks are slow on purpose; bench_auth.py covers them at full cost.
+BENCH_PASSWORD_ITERATIONS = 1_000
+
+
+def summarize(latencies, wall):
+    """Throughput and latency percentiles for one method, in milliseconds"""
+    ordered = sorted(latencies)
+    calls = len(ordered)
+    return {
+        'calls': calls,
+        'ops_per_sec': round(calls / wall, 1) if wall else 0.0,
+        'mean_ms': round(sum(ordered) * 1000 / calls, 4) if calls else 0.0,
+        'p50_ms': round(QueryStats._percentile(ordered, 0.50) * 1000, 4),
+        'p95_ms': round(QueryStats._percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(QueryStats._percentile(ordered, 0.99) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4) if ordered else 0.0,
+    }
+
+
+def time_calls(fn, arg_sets):
+    """Call fn once per argument tuple; returns the summary"""
+    latencies = []
+    began = time.perf_counter()
+    for args in arg_sets:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - began)
+
+
+def free_slots(count):
+    """Distinct (day, time_slot) pairs outside datagen's teaching hours, so add_class never clashes"""
+    evening = (24 - datagen.LAST_HOUR - 1) * 60  # one-minute slots from LAST_HOUR + 1 to midnight
+    if count > evening * len(DAYS):
+        raise ValueError(f"at most {evening * len(DAYS)} add_class calls fit in the free slots")
+    slots = []
+    for index in range(count):
+        start = (datagen.LAST_HOUR + 1) * 60 + index // len(DAYS)
+        slots.append((DAYS[index % len(DAYS)],
+                      f"{start // 60:02d}:{start % 60:02d} - {(start + 1) // 60:02d}:{(start + 1) % 60:02d}"))
+    return slots
+
+
+def method_workloads(db, rng, users, calls, start, weeks):
+    """(name, fn, argument tuples) for every public Database method.
+
+    Reads go first, then writes, and deletes last so each phase sees the
+    dataset at full size.
+    """
+    user_ids = [rng.randint(1, users) for _ in range(calls)]
+    dates = [(start + timedelta(days=rng.randrange(weeks * 7))).isoformat() for _ in range(calls)]
+    names = [datagen.username_for(rng.randrange(users)) for _ in range(calls)]
+    classes_by_user = {user_id: [cls['id'] for cls in db.get_user_classes(user_id)]
+                       for user_id in set(user_ids)}
+    marks = [(user_id, rng.choice(classes_by_user[user_id])) for user_id in user_ids
+             if classes_by_user[user_id]]
+    batches = [(user_id, [(class_id, date_str, rng.choice(("Present", "Absent")))
+                          for class_id in classes_by_user[user_id]])
+               for user_id, date_str in zip(user_ids, dates)]
+    doomed = []
+    seen = set()
+    for user_id in user_ids:
+        for class_id in classes_by_user[user_id]:
+            if class_id not in seen:
+                seen.add(class_id)
+                doomed.append((class_id,))
+                break
+    few = max(1, calls // 50)
+    span = (start, start + timedelta(weeks=weeks))
+
+    return [
+        ('get_user_classes', db.get_user_classes, [(u,) for u in user_ids]),
+        ('get_today_classes', db.get_today_classes, [(u,) for u in user_ids]),
+        ('get_attendance_for_date', db.get_attendance_for_date, list(zip(user_ids, dates))),
+        ('get_overall_statistics', db.get_overall_statistics, [(u,) for u in user_ids]),
+        ('get_subject_statistics', db.get_subject_statistics, [(u,) for u in user_ids]),
+        ('get_attendance_trend', db.get_attendance_trend, [(u, span[0], span[1]) for u in user_ids]),
+        ('get_rolling_attendance', db.get_rolling_attendance, [(u, span[0], span[1]) for u in user_ids]),
+        ('get_settings', db.get_settings, [(u,) for u in user_ids]),
+        ('ensure_sessions', db.ensure_sessions, [(u, span[1]) for u in user_ids]),
+        ('get_unmarked_sessions', db.get_unmarked_sessions, [(u, span[1]) for u in user_ids]),
+        ('count_unmarked_sessions', db.count_unmarked_sessions, [(u, span[1]) for u in user_ids]),
+        ('authenticate_user', db.authenticate_user, [(n, datagen.PASSWORD) for n in names]),
+        ('verify_summary', db.verify_summary, [()] * few),
+        ('check_query_plans', db.check_query_plans, [()] * few),
+        ('create_user', db.create_user, [(f"bench{i:06d}", "password") for i in range(calls)]),
+        ('add_class', db.add_class, [(u, "Bench Subject", day, slot, "", "")
+                                     for u, (day, slot) in zip(user_ids, free_slots(calls))]),
+        ('mark_attendance', db.mark_attendance, [(c, u, "Present", d)
+                                                 for (u, c), d in zip(marks, dates)]),
+        ('mark_attendance_many', db.mark_attendance_many, batches),
+        ('set_settings', lambda u: db.set_settings(u, target_percentage=80.0), [(u,) for u in user_ids]),
+        ('rebuild_summary', db.rebuild_summary, [()] * few),
+        ('delete_class', db.delete_class, doomed),
+    ]
+
+
+def bench_size(users, calls, weeks, seed, cache, workdir):
+    """Generate a dataset of this many users and time every method on it"""
+    path = os.path.join(workdir, f"bench_{users}.db")
+    db = Database(path, cache_size=1024 if cache else 0,
+                  password_iterations=BENCH_PASSWORD_ITERATIONS)
+    try:
+        dataset = datagen.generate(db, users=users, weeks=weeks, seed=seed)
+        dataset['file_mb'] = round(os.path.getsize(path) / 2**20, 2)
+        rng = random.Random(seed + 1)
+        methods = {}
+        for name, fn, arg_sets in method_workloads(db, rng, users, calls,
+                                                   datagen.DEFAULT_START, weeks):
+            methods[name] = time_calls(fn, arg_sets)
+        return {'users': users, 'dataset': dataset, 'methods': methods,
+                'cache': db.cache_stats() if cache else None}
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def environment():
+    """Where the numbers came from"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'commit': commit or None,
+    }
+
+
+def compare(results, baseline):
+    """Print the p50 and throughput change against an earlier run"""
+    old = {run['users']: run['methods'] for run in baseline.get('runs', [])}
+    for run in results:
+        previous = old.get(run['users'])
+        if not previous:
+            continue
+        print(f"\nvs baseline, {run['users']} users:")
+        for name, now in run['methods'].items():
+            before = previous.get(name)
+            if not before or not before['p50_ms']:
+                continue
+            change = (now['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            print(f"  {name:<24} p50 {before['p50_ms']:>9.3f} -> {now['p50_ms']:>9.3f} ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Database methods across dataset sizes")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="comma-separated user counts")
+    parser.add_argument("--calls", type=int, default=500, help="calls per method")
+    parser.add_argument("--weeks", type=int, default=16, help="semester length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true",
+                        help="keep the read cache on (off by default to time SQLite)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for users in sizes:
+            run = bench_size(users, args.calls, args.weeks, args.seed, args.cache, workdir)
+            runs.append(run)
+            dataset = run['dataset']
+            print(f"\n{users} users: {dataset['classes']} classes, {dataset['attendance']} attendance "
+                  f"rows, {dataset['file_mb']} MB (generated in {dataset['seconds']:.1f} s)")
+            for name, result in run['methods'].items():
+                print(f"  {name:<24} {result['ops_per_sec']:>10.1f} ops/s  p50 {result['p50_ms']:>8.3f}  "
+                      f"p95 {result['p95_ms']:>8.3f}  p99 {result['p99_ms']:>8.3f} ms")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(runs, json.load(f))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'environment': environment(), 'calls': args.calls, 'weeks': args.weeks,
+                       'seed': args.seed, 'cache': args.cache, 'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Reader/writer concurrency benchmark.
+
+Runs ``--writers`` threads marking attendance and ``--readers`` threads
+computing full statistics (each inside one snapshot, with the read cache
+off) against the same file for ``--duration`` seconds, once with the
+read-only connection pool and once with reads sharing the write
+connections. Reports reads/sec, writes/sec, read latency and how much of
+the write time had reads running alongside it.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+import datagen
+from database import Database, QueryStats
+from services import AttendanceService
+
+SETUPS = {'read-pool': None, 'shared': 0}  # name -> read_connections
+
+
+def write_loop(db, user_id, deadline, seed, result):
+    """Mark random sessions one at a time until the deadline"""
+    rng = random.Random(seed)
+    class_ids = [cls['id'] for cls in db.get_user_classes(user_id)]
+    try:
+        while time.perf_counter() < deadline:
+            day = datagen.DEFAULT_START + timedelta(days=rng.randrange(365))
+            if db.mark_attendance(rng.choice(class_ids), user_id, rng.choice(("Present", "Absent")),
+                                  day.isoformat()):
+                result['writes'] += 1
+    finally:
+        db.release_connection()
+
+
+def read_loop(service, user_ids, deadline, seed, result):
+    """Compute one user's statistics from a single snapshot, repeatedly"""
+    rng = random.Random(seed)
+    db = service.db
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            with db.snapshot():
+                service.get_statistics(rng.choice(user_ids))
+            result['latencies'].append(time.perf_counter() - start)
+    finally:
+        db.release_connection()
+
+
+def bench_setup(path, read_connections, writers, readers, duration, seed):
+    """Run writers and readers together on one Database; returns the summary"""
+    db = Database(path, max_connections=writers + readers + 1, cache_size=0,
+                  read_connections=read_connections)
+    try:
+        service = AttendanceService(db)
+        user_ids = list(range(1, writers + 1))
+        write_results = [{'writes': 0} for _ in range(writers)]
+        read_results = [{'latencies': []} for _ in range(readers)]
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=write_loop, args=(db, user_id, deadline, seed + user_id, result))
+                   for user_id, result in zip(user_ids, write_results)]
+        threads += [threading.Thread(target=read_loop, args=(service, user_ids, deadline, seed - index, result))
+                    for index, result in enumerate(read_results)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        latencies = sorted(latency for result in read_results for latency in result['latencies'])
+        writes = sum(result['writes'] for result in write_results)
+        return {
+            'read_connections': 'shared' if read_connections == 0 else db.readers.max_connections,
+            'reads_per_sec': round(len(latencies) / wall, 1),
+            'writes_per_sec': round(writes / wall, 1),
+            'read_p50_ms': round(QueryStats._percentile(latencies, 0.50) * 1000, 3),
+            'read_p99_ms': round(QueryStats._percentile(latencies, 0.99) * 1000, 3),
+            'concurrency': db.concurrency_stats(),
+        }
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark readers and writers sharing a database")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per setup")
+    parser.add_argument("--weeks", type=int, default=16, help="weeks of generated history per user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    runs = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, read_connections in SETUPS.items():
+            path = os.path.join(workdir, f"reads_{name}.db")
+            db = Database(path, password_iterations=1_000)
+            try:
+                datagen.generate(db, users=args.writers, weeks=args.weeks, seed=args.seed)
+            finally:
+                db.close()
+            run = bench_setup(path, read_connections, args.writers, args.readers, args.duration, args.seed)
+            runs[name] = run
+            concurrency = run['concurrency']
+            print(f"{name:<10} {run['reads_per_sec']:>8.1f} reads/s  {run['writes_per_sec']:>8.1f} writes/s  "
+                  f"read p50 {run['read_p50_ms']:>8.3f}  p99 {run['read_p99_ms']:>8.3f} ms  "
+                  f"overlap {concurrency['overlap_share']:.0%}  peak readers {concurrency['peak_readers']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'writers': args.writers, 'readers': args.readers, 'duration': args.duration,
+                       'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
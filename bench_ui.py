@@ -0,0 +1,295 @@
+"""Tk rendering benchmarks.
+
+Two modes: ``list`` compares VirtualList against packing every row, and
+``pages`` drives the real Dashboard/Timetable/Statistics frames inside
+AttendifyPro with synthetic timetables of increasing size, reporting
+time-to-render, widget count and resident memory per page plus the cost
+of switching pages. Without a DISPLAY the benchmark starts its own Xvfb
+server (or run it under ``xvfb-run``).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tkinter as tk
+from datetime import date, timedelta
+
+from database import Database, DAYS
+from virtual_list import VirtualList
+
+PAGE_ORDER = ["dashboard", "timetable", "statistics"]
+
+
+def count_widgets(widget):
+    """Count a widget and all of its descendants"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def make_row(parent):
+    """A row roughly as heavy as a timetable card"""
+    row = tk.Frame(parent, bg="#1e293b")
+    row.title = tk.Label(row, bg="#1e293b", fg="#f1f5f9", font=("Segoe UI", 14, "bold"))
+    row.title.pack(anchor="w")
+    row.details = tk.Label(row, bg="#1e293b", fg="#94a3b8", font=("Segoe UI", 10))
+    row.details.pack(anchor="w")
+    row.button = tk.Button(row, text="Delete")
+    row.button.pack(side="right")
+    return row
+
+
+def bind_row(row, item):
+    """Fill a benchmark row"""
+    row.title.config(text=item['subject_name'])
+    row.details.config(text=item['time_slot'])
+
+
+def sample_items(count):
+    """Synthetic rows for the benchmark"""
+    return [{'subject_name': f"Subject {i}", 'time_slot': f"{8 + i % 9:02d}:00 - {9 + i % 9:02d}:00"}
+            for i in range(count)]
+
+
+def time_virtual(root, items):
+    """Time rendering a VirtualList and return (ms, widgets)"""
+    start = time.perf_counter()
+    virtual = VirtualList(root, {"row": (110, make_row, bind_row)})
+    virtual.pack(fill="both", expand=True)
+    virtual.set_items(items)
+    root.update_idletasks()
+    root.update()
+    elapsed = (time.perf_counter() - start) * 1000
+    widgets = count_widgets(virtual)
+
+    # Scroll to the end to exercise recycling
+    start = time.perf_counter()
+    virtual.canvas.yview_moveto(1.0)
+    root.update()
+    scroll_ms = (time.perf_counter() - start) * 1000
+    virtual.destroy()
+    return elapsed, scroll_ms, widgets
+
+
+def time_eager(root, items):
+    """Time packing every row up front, as the frames used to"""
+    start = time.perf_counter()
+    holder = tk.Frame(root)
+    holder.pack(fill="both", expand=True)
+    for item in items:
+        row = make_row(holder)
+        bind_row(row, item)
+        row.pack(fill="x")
+    root.update_idletasks()
+    root.update()
+    elapsed = (time.perf_counter() - start) * 1000
+    widgets = count_widgets(holder)
+    holder.destroy()
+    return elapsed, widgets
+
+
+def bench_virtual_list(sizes, eager_limit=2000):
+    """Render lists of increasing size and report time and widget counts"""
+    root = tk.Tk()
+    root.geometry("900x700")
+    results = []
+    try:
+        for size in sizes:
+            items = sample_items(size)
+            virtual_ms, scroll_ms, virtual_widgets = time_virtual(root, items)
+            result = {
+                'rows': size,
+                'virtual_ms': round(virtual_ms, 2),
+                'virtual_scroll_ms': round(scroll_ms, 2),
+                'virtual_widgets': virtual_widgets,
+            }
+            if size <= eager_limit:
+                eager_ms, eager_widgets = time_eager(root, items)
+                result['eager_ms'] = round(eager_ms, 2)
+                result['eager_widgets'] = eager_widgets
+            results.append(result)
+    finally:
+        root.destroy()
+    return results
+
+
+def start_virtual_display():
+    """Start Xvfb and point DISPLAY at it; returns the process (None if not needed)"""
+    if os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        raise SystemExit("No DISPLAY and Xvfb is not installed; install xvfb or run under xvfb-run")
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{number}") or os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        server = subprocess.Popen(["Xvfb", f":{number}", "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ["DISPLAY"] = f":{number}"
+                return server
+            time.sleep(0.05)
+        server.kill()
+    raise SystemExit("Could not start Xvfb")
+
+
+def rss_kb():
+    """Resident set size of this process in KiB (None where /proc is missing)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def seed_pages(db, classes):
+    """One user with ``classes`` distinct subjects spread over the week, each marked once"""
+    ok, user_id = db.create_user("bench", "bench-password")
+    today = date.today()
+    records = []
+    with db.transaction() as conn:
+        for i in range(classes):
+            day = DAYS[i % len(DAYS)]
+            hour = 8 + (i // len(DAYS)) % 10
+            # Generated slots may overlap; write directly, past add_class's clash check
+            class_id = db.execute('add_class', (user_id, f"Subject {i:05d}", day,
+                                                f"{hour:02d}:00 - {hour + 1:02d}:00",
+                                                "Dr. Bench", f"R-{i % 500}",
+                                                hour * 60, hour * 60 + 60,
+                                                (today - timedelta(days=7)).isoformat()), conn).lastrowid
+            # Most recent past occurrence, so today's classes start unmarked
+            last = today - timedelta(days=(today.weekday() - DAYS.index(day)) % 7 or 7)
+            records.append((class_id, user_id, last.isoformat(), "Present" if i % 4 else "Absent"))
+        db.execute_many('mark_attendance', records, conn)
+    db.mark_changed('classes', 'attendance', user_id=user_id)
+    return user_id
+
+
+def wait_rendered(app, frame, timeout=120):
+    """Pump the Tk loop until the page has rendered its current data"""
+    deadline = time.monotonic() + timeout
+    while frame.data_key != app.page_data_key(frame):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{type(frame).__name__} did not render within {timeout}s")
+        app.update()
+    app.update_idletasks()
+
+
+def bench_pages(sizes, nav_rounds=20):
+    """Render each page for timetables of increasing size and time navigation"""
+    from main import AttendifyPro
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench_ui.db"), password_iterations=1_000)
+            user_id = seed_pages(db, size)
+            app = AttendifyPro(db=db)
+            app.dispatcher.poll_interval = 1
+            app.update()
+            result = {'classes': size, 'pages': {}}
+            try:
+                # First visit: builds the frame, loads its data and renders it
+                for page in PAGE_ORDER:
+                    rss_before = rss_kb()
+                    start = time.perf_counter()
+                    if page == "dashboard":
+                        app.login_success(user_id, "bench")
+                    else:
+                        app.show_page(page)
+                    frame = app.frames[page]
+                    wait_rendered(app, frame)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    rss_after = rss_kb()
+                    result['pages'][page] = {
+                        'render_ms': round(elapsed, 2),
+                        'widgets': count_widgets(frame),
+                        'rss_delta_kb': rss_after - rss_before if rss_before is not None else None,
+                    }
+
+                # Navigation between already rendered, up-to-date pages
+                timings = []
+                for _ in range(nav_rounds):
+                    for page in PAGE_ORDER:
+                        start = time.perf_counter()
+                        app.show_page(page)
+                        app.update()
+                        timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                result['navigation_ms'] = {
+                    'switches': len(timings),
+                    'mean': round(sum(timings) / len(timings), 3),
+                    'p50': round(timings[len(timings) // 2], 3),
+                    'max': round(timings[-1], 3),
+                }
+
+                # Navigation after a write: each page reloads in place
+                for page in PAGE_ORDER:
+                    db.mark_changed('classes', 'attendance', user_id=user_id)
+                    start = time.perf_counter()
+                    app.show_page(page)
+                    wait_rendered(app, app.frames[page])
+                    result['pages'][page]['reload_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                result['rss_kb'] = rss_kb()
+            finally:
+                app.on_quit()
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tk rendering")
+    parser.add_argument("--mode", choices=["list", "pages", "all"], default="all")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000",
+                        help="comma-separated row counts for the list benchmark")
+    parser.add_argument("--eager-limit", type=int, default=2000,
+                        help="largest size to also render eagerly")
+    parser.add_argument("--page-sizes", default="10,100,1000,5000",
+                        help="comma-separated class counts for the page benchmark")
+    parser.add_argument("--nav-rounds", type=int, default=20,
+                        help="page switches per page when timing navigation")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    server = start_virtual_display()
+    output = {}
+    try:
+        if args.mode in ("list", "all"):
+            sizes = [int(size) for size in args.sizes.split(",")]
+            results = output['virtual_list'] = bench_virtual_list(sizes, args.eager_limit)
+            for result in results:
+                line = (f"{result['rows']:>7} rows  virtual {result['virtual_ms']:>8.1f} ms "
+                        f"({result['virtual_widgets']} widgets, scroll {result['virtual_scroll_ms']:.1f} ms)")
+                if 'eager_ms' in result:
+                    line += f"  eager {result['eager_ms']:>9.1f} ms ({result['eager_widgets']} widgets)"
+                print(line)
+
+        if args.mode in ("pages", "all"):
+            sizes = [int(size) for size in args.page_sizes.split(",")]
+            results = output['pages'] = bench_pages(sizes, args.nav_rounds)
+            for result in results:
+                print(f"\n{result['classes']} classes  (navigation p50 {result['navigation_ms']['p50']:.2f} ms, "
+                      f"max {result['navigation_ms']['max']:.2f} ms)")
+                for page, page_result in result['pages'].items():
+                    rss = page_result['rss_delta_kb']
+                    print(f"  {page:<11} render {page_result['render_ms']:>9.1f} ms  "
+                          f"reload {page_result['reload_ms']:>9.1f} ms  "
+                          f"{page_result['widgets']:>5} widgets  "
+                          f"{'' if rss is None else f'+{rss} KiB'}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
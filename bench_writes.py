@@ -0,0 +1,208 @@
+"""Concurrent attendance write benchmarks.
+
+Starts ``--writers`` writers that each mark attendance as fast as they
+can, one mark at a time and waiting for each to finish (like request
+handlers at the start of a lecture), in three setups:
+
+    threads    writer threads, each with its own connection, calling
+               Database.mark_attendance directly
+    processes  writer processes, each with its own Database
+    queued     writer threads submitting to one WriteQueue (group commit)
+
+and reports writes/sec, latency percentiles and how many marks failed
+with SQLITE_BUSY. Lower ``--busy-timeout`` to make lock contention show
+up as errors sooner.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+import datagen
+from database import Database, QueryStats
+from write_queue import WriteQueue
+
+MODES = ("threads", "processes", "queued")
+
+
+def is_busy(error):
+    """Whether an OperationalError is SQLite giving up on a lock"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def writer_marks(db, user_id, writes, seed):
+    """The (class_id, date, status) marks one writer sends"""
+    rng = random.Random(seed)
+    class_ids = [cls['id'] for cls in db.get_user_classes(user_id)]
+    return [(rng.choice(class_ids),
+             (datagen.DEFAULT_START + timedelta(days=rng.randrange(365))).isoformat(),
+             rng.choice(("Present", "Absent")))
+            for _ in range(writes)]
+
+
+def write_direct(db, user_id, marks, busy_timeout_ms):
+    """Mark one row at a time on this thread's own connection; returns counters"""
+    db.get_connection().execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    result = {'ok': 0, 'rejected': 0, 'busy': 0, 'latencies': [],
+              'started': time.time(), 'finished': None}
+    try:
+        for class_id, date_str, status in marks:
+            start = time.perf_counter()
+            try:
+                if db.mark_attendance(class_id, user_id, status, date_str):
+                    result['ok'] += 1
+                else:
+                    result['rejected'] += 1
+            except sqlite3.OperationalError as e:
+                if not is_busy(e):
+                    raise
+                result['busy'] += 1
+            result['latencies'].append(time.perf_counter() - start)
+    finally:
+        result['finished'] = time.time()
+        db.release_connection()
+    return result
+
+
+def write_queued(writes, user_id, marks):
+    """Submit marks to a shared WriteQueue, waiting for each; returns counters"""
+    result = {'ok': 0, 'rejected': 0, 'busy': 0, 'latencies': [],
+              'started': time.time(), 'finished': None}
+    for class_id, date_str, status in marks:
+        start = time.perf_counter()
+        try:
+            if writes.submit(class_id, user_id, status, date_str).result()['ok']:
+                result['ok'] += 1
+            else:
+                result['rejected'] += 1
+        except sqlite3.OperationalError as e:
+            if not is_busy(e):
+                raise
+            result['busy'] += 1
+        result['latencies'].append(time.perf_counter() - start)
+    result['finished'] = time.time()
+    return result
+
+
+def process_writer(path, user_id, writes, seed, busy_timeout_ms):
+    """Entry point of one writer process"""
+    db = Database(path, max_connections=1, cache_size=0)
+    try:
+        return write_direct(db, user_id, writer_marks(db, user_id, writes, seed), busy_timeout_ms)
+    finally:
+        db.close()
+
+
+def run_threads(target, argument_sets):
+    """Run target once per argument tuple on its own thread; returns the results"""
+    results = [None] * len(argument_sets)
+
+    def run(index, args):
+        results[index] = target(*args)
+
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(argument_sets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def bench_mode(mode, path, writers, writes, seed, busy_timeout_ms, max_delay):
+    """Run one setup against the database file; returns the summary"""
+    user_ids = list(range(1, writers + 1))
+    extra = {}
+    if mode == "processes":
+        with multiprocessing.get_context("spawn").Pool(writers) as pool:
+            results = pool.starmap(process_writer, [(path, user_id, writes, seed + user_id, busy_timeout_ms)
+                                                    for user_id in user_ids])
+    else:
+        db = Database(path, max_connections=writers + 2, cache_size=0)
+        try:
+            plans = [(user_id, writer_marks(db, user_id, writes, seed + user_id)) for user_id in user_ids]
+            if mode == "threads":
+                results = run_threads(write_direct, [(db, user_id, marks, busy_timeout_ms)
+                                                     for user_id, marks in plans])
+            else:
+                writes_queue = WriteQueue(db, max_delay=max_delay)
+                try:
+                    results = run_threads(write_queued, [(writes_queue, user_id, marks)
+                                                         for user_id, marks in plans])
+                finally:
+                    writes_queue.close()
+                extra = writes_queue.stats()
+        finally:
+            db.close()
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    wall = max(r['finished'] for r in results) - min(r['started'] for r in results)
+    ok = sum(r['ok'] for r in results)
+    summary = {
+        'mode': mode,
+        'writers': writers,
+        'ok': ok,
+        'rejected': sum(r['rejected'] for r in results),
+        'busy': sum(r['busy'] for r in results),
+        'writes_per_sec': round(ok / wall, 1) if wall else 0.0,
+        'p50_ms': round(QueryStats._percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(QueryStats._percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(QueryStats._percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+    if extra:
+        summary['queue'] = extra
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent attendance writers")
+    parser.add_argument("--writers", default="1,4,16", help="comma-separated writer counts")
+    parser.add_argument("--writes", type=int, default=500, help="marks per writer")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated setups to run")
+    parser.add_argument("--busy-timeout", type=float, default=5000,
+                        help="SQLite busy_timeout for direct writers, in ms")
+    parser.add_argument("--max-delay", type=float, default=0.0,
+                        help="seconds the write queue waits to grow a group")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode!r}; choose from {', '.join(MODES)}")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for writers in (int(count) for count in args.writers.split(",")):
+            for mode in modes:
+                # The same seeded dataset per run, so every setup starts from identical rows
+                path = os.path.join(workdir, f"writes_{writers}_{mode}.db")
+                db = Database(path, password_iterations=1_000)
+                try:
+                    datagen.generate(db, users=writers, weeks=4, seed=args.seed)
+                finally:
+                    db.close()
+                run = bench_mode(mode, path, writers, args.writes, args.seed,
+                                 args.busy_timeout, args.max_delay)
+                runs.append(run)
+                batch = f"  mean batch {run['queue']['mean_batch']}" if 'queue' in run else ""
+                print(f"{writers:>3} writers  {mode:<9} {run['writes_per_sec']:>9.1f} writes/s  "
+                      f"p50 {run['p50_ms']:>8.3f}  p99 {run['p99_ms']:>8.3f}  max {run['max_ms']:>9.3f} ms  "
+                      f"busy {run['busy']}{batch}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'writes': args.writes, 'busy_timeout_ms': args.busy_timeout,
+                       'max_delay': args.max_delay, 'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import csv
+import json
+import time
+from datetime import date
+
+from database import ATTENDANCE_STATUSES, DAYS, parse_time_slot
+
+# One flat record layout shared by CSV and JSON Lines files. "class" records
+# define a timetable entry under a file-local ``ref``; "attendance" records
+# point at that ref, so a class must appear before its attendance rows.
+RECORD_FIELDS = ["record", "ref", "username", "subject_name", "day_of_week", "time_slot",
+                 "professor", "room_number", "date", "status"]
+
+# Bulk export reads whole tables in rowid order, so these stay out of the
+# Database query registry and its full-scan check.
+EXPORT_CLASSES_SQL = """SELECT c.*, u.username FROM classes c
+                        JOIN users u ON u.id = c.user_id
+                        {where} ORDER BY c.id"""
+EXPORT_ATTENDANCE_SQL = """SELECT a.class_id, a.date, a.status FROM attendance a
+                           {where} ORDER BY a.class_id, a.date"""
+
+
+def detect_format(path):
+    """Guess the file format from its extension"""
+    lowered = str(path).lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    # Plain .json usually holds one array rather than one object per line
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path!r}; use .csv or .jsonl")
+
+
+def read_records(handle, fmt):
+    """Yield raw records from an open text file, one at a time.
+
+    CSV rows come out as dicts; JSON Lines come out as the line's text and
+    are decoded by validate_record, so one bad line only rejects that row.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(handle):
+            yield row
+    elif fmt == "jsonl":
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield line
+    else:
+        raise ValueError(f"Unsupported format: {fmt!r}")
+
+
+def text_field(record, name):
+    """A record's field as stripped text; JSON rows may hold other types"""
+    value = record.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string, not {type(value).__name__}")
+    return value.strip()
+
+
+def validate_record(record):
+    """Normalise one record; returns (kind, record) or raises ValueError"""
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    kind = text_field(record, "record").lower()
+    ref = str(record.get("ref") or "").strip()
+    if not ref:
+        raise ValueError("missing ref")
+
+    if kind == "class":
+        subject = text_field(record, "subject_name")
+        day = text_field(record, "day_of_week").capitalize()
+        time_slot = text_field(record, "time_slot")
+        if not subject or not time_slot:
+            raise ValueError("class needs subject_name and time_slot")
+        if day not in DAYS:
+            raise ValueError(f"invalid day_of_week: {day!r}")
+        start, end = parse_time_slot(time_slot)
+        return kind, {
+            "ref": ref,
+            "username": text_field(record, "username"),
+            "subject_name": subject,
+            "day_of_week": day,
+            "time_slot": time_slot,
+            "professor": text_field(record, "professor"),
+            "room_number": text_field(record, "room_number"),
+            "start_minute": start,
+            "end_minute": end,
+        }
+
+    if kind == "attendance":
+        status = text_field(record, "status").capitalize()
+        date_str = text_field(record, "date")
+        if status not in ATTENDANCE_STATUSES:
+            raise ValueError(f"invalid status: {status!r}")
+        date.fromisoformat(date_str)
+        return kind, {"ref": ref, "date": date_str, "status": status}
+
+    raise ValueError(f"unknown record type: {kind!r}")
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items without materialising the input"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Importer:
+    """Streams validated records into the database in chunked transactions"""
+
+    def __init__(self, db, user_id, chunk_size, max_errors):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.classes = {}  # ref -> (class_id, user_id)
+        self.users = {}    # username -> user_id
+        self.touched_users = set()  # users whose session calendar needs refilling
+        self.report = {
+            "rows": 0,
+            "classes_added": 0,
+            "classes_matched": 0,
+            "attendance": 0,
+            "rejected": 0,
+            "errors": [],
+        }
+
+    def reject(self, line, message):
+        """Count a rejected row, keeping the first few messages"""
+        self.report["rejected"] += 1
+        if len(self.report["errors"]) < self.max_errors:
+            self.report["errors"].append(f"row {line}: {message}")
+
+    def resolve_user(self, username, conn):
+        """Map a username to its id, falling back to the import's user"""
+        if not username:
+            return self.user_id
+        if username not in self.users:
+            row = self.db.fetch_one("user_by_name", (username,), conn)
+            self.users[username] = row["id"] if row else None
+        return self.users[username]
+
+    def add_class(self, record, conn):
+        """Insert a class, or reuse an identical one, and remember its ref; rejects clashes"""
+        user_id = self.resolve_user(record["username"], conn)
+        if user_id is None:
+            raise ValueError(f"unknown user: {record['username'] or '(none)'}")
+        params = (user_id, record["day_of_week"], record["time_slot"], record["subject_name"])
+        existing = self.db.fetch_one("find_class", params, conn)
+        if existing:
+            class_id = existing["id"]
+            self.report["classes_matched"] += 1
+        else:
+            clashes = self.db.find_clashes(user_id, record["day_of_week"], record["start_minute"],
+                                           record["end_minute"], conn)
+            if clashes:
+                other = clashes[0]
+                raise ValueError(f"clashes with {other['subject_name']} ({other['time_slot']}) "
+                                 f"on {record['day_of_week']}")
+            cursor = self.db.execute("add_class", (
+                user_id, record["subject_name"], record["day_of_week"], record["time_slot"],
+                record["professor"], record["room_number"],
+                record["start_minute"], record["end_minute"], date.today().isoformat()), conn)
+            class_id = cursor.lastrowid
+            self.report["classes_added"] += 1
+        self.classes[record["ref"]] = (class_id, user_id)
+
+    def write_chunk(self, chunk):
+        """Write one chunk of (line, record) pairs in a single transaction"""
+        marks = []
+        with self.db.transaction() as conn:
+            for line, raw in chunk:
+                try:
+                    kind, record = validate_record(raw)
+                    if kind == "class":
+                        self.add_class(record, conn)
+                    else:
+                        if record["ref"] not in self.classes:
+                            raise ValueError(f"attendance for unknown class ref {record['ref']!r}")
+                        class_id, user_id = self.classes[record["ref"]]
+                        marks.append((class_id, user_id, record["date"], record["status"]))
+                except (ValueError, TypeError) as e:
+                    self.reject(line, e)
+            if marks:
+                self.db.execute_many("mark_attendance", marks, conn)
+                # Imported history moves a class's start back to its first session
+                first = {}
+                for class_id, user_id, date_str, _ in marks:
+                    if date_str < first.get(class_id, "9999"):
+                        first[class_id] = date_str
+                    self.touched_users.add(user_id)
+                self.db.execute_many("extend_class_start",
+                                     [(day, class_id, day) for class_id, day in first.items()], conn)
+        self.report["attendance"] += len(marks)
+
+
+def import_file(db, path, user_id=None, fmt=None, chunk_size=5000, progress=None, max_errors=100):
+    """Stream a CSV or JSON Lines file of classes and attendance into the database.
+
+    Rows without a username belong to ``user_id``. Memory stays constant in
+    the number of attendance rows; only the class ref map grows with the file.
+    ``progress`` is called with the running report after every chunk.
+    """
+    fmt = fmt or detect_format(path)
+    importer = _Importer(db, user_id, chunk_size, max_errors)
+    report = importer.report
+    start = time.perf_counter()
+
+    try:
+        with open(path, newline="", encoding="utf-8") as handle:
+            numbered = enumerate(read_records(handle, fmt), start=1)
+            for chunk in chunked(numbered, chunk_size):
+                importer.write_chunk(chunk)
+                report["rows"] += len(chunk)
+                if progress:
+                    progress(_with_rate(report, start))
+    finally:
+        for touched in importer.touched_users:
+            db.reset_sessions(touched)
+        db.mark_changed("classes", "attendance", "sessions")
+
+    return _with_rate(report, start)
+
+
+def iter_export_records(db, user_id=None):
+    """Yield export records for one user (or everyone) from one consistent snapshot"""
+    # Classes and attendance are read in two queries; the snapshot keeps
+    # marks written in between from referring to classes that were not exported
+    with db.snapshot() as conn:
+        if user_id is None:
+            class_rows = conn.execute(EXPORT_CLASSES_SQL.format(where=""))
+        else:
+            class_rows = conn.execute(EXPORT_CLASSES_SQL.format(where="WHERE c.user_id = ?"), (user_id,))
+        for row in class_rows:
+            yield {
+                "record": "class",
+                "ref": str(row["id"]),
+                "username": row["username"],
+                "subject_name": row["subject_name"],
+                "day_of_week": row["day_of_week"],
+                "time_slot": row["time_slot"],
+                "professor": row["professor"] or "",
+                "room_number": row["room_number"] or "",
+            }
+
+        if user_id is None:
+            attendance_rows = conn.execute(EXPORT_ATTENDANCE_SQL.format(where=""))
+        else:
+            attendance_rows = conn.execute(EXPORT_ATTENDANCE_SQL.format(where="WHERE a.user_id = ?"),
+                                           (user_id,))
+        for row in attendance_rows:
+            yield {
+                "record": "attendance",
+                "ref": str(row["class_id"]),
+                "date": row["date"],
+                "status": row["status"],
+            }
+
+
+def export_file(db, path, user_id=None, fmt=None):
+    """Stream classes and attendance to a CSV or JSON Lines file"""
+    fmt = fmt or detect_format(path)
+    start = time.perf_counter()
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            writer = csv.DictWriter(handle, fieldnames=RECORD_FIELDS)
+            writer.writeheader()
+            write = writer.writerow
+        elif fmt == "jsonl":
+            def write(record):
+                handle.write(json.dumps(record) + "\n")
+        else:
+            raise ValueError(f"Unsupported format: {fmt!r}")
+
+        for record in iter_export_records(db, user_id):
+            write(record)
+            rows += 1
+
+    return _with_rate({"rows": rows}, start)
+
+
+def _with_rate(report, start):
+    """Copy a report and add elapsed time and throughput"""
+    elapsed = time.perf_counter() - start
+    result = dict(report)
+    if "errors" in result:
+        result["errors"] = list(result["errors"])
+    result["seconds"] = round(elapsed, 3)
+    result["rows_per_sec"] = round(report["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    return result
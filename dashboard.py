@@ -1,12 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
+from datetime import datetime, date
+from virtual_list import VirtualList
 
 
 class DashboardFrame(tk.Frame):
+    # Tables whose writes make this page stale
+    depends_on = ("classes", "attendance")
+    
     def __init__(self, parent, app):
         super().__init__(parent, bg="#0f172a")
         self.app = app
+        # Data key of the last completed render (see AttendifyPro.page_data_key)
+        self.data_key = None
+        # View model: class_id -> card widgets and the class it shows
+        self.cards = {}
+        self.layout_key = None
+        self.today_date = None
+        self.stat_labels = {}
+        self.mark_all_btn = None
+        # Catch-up dialog state: unmarked past sessions still listed
+        self.catch_up_items = []
+        self.catch_up_list = None
         self.create_widgets()
     
     def create_widgets(self):
@@ -29,53 +44,232 @@ class DashboardFrame(tk.Frame):
                 fg="#94a3b8",
                 font=("Segoe UI", 12)).pack(side="right")
         
-        # Stats cards container
+        # Stats cards container; the cards are built once and updated in place
         self.stats_container = tk.Frame(self, bg="#0f172a")
         self.stats_container.pack(fill="x", padx=40, pady=(0, 30))
         
+        stats = [
+            ("total", "Total Classes Today", "#3b82f6"),
+            ("attended", "Attended", "#10b981"),
+            ("absent", "Absent", "#ef4444")
+        ]
+        
+        for i, (key, label, color) in enumerate(stats):
+            self.stat_labels[key] = self.create_stat_card(self.stats_container, label, "–", color, i)
+        
+        # Catch-up banner, packed by update_catch_up while past sessions are unmarked
+        self.catch_up_bar = tk.Frame(self, bg="#422006")
+        
+        self.catch_up_label = tk.Label(self.catch_up_bar,
+                bg="#422006",
+                fg="#fbbf24",
+                font=("Segoe UI", 11, "bold"))
+        self.catch_up_label.pack(side="left", padx=20, pady=12)
+        
+        ttk.Button(self.catch_up_bar,
+                  text="Catch up",
+                  style="Primary.TButton",
+                  command=self.show_catch_up_dialog).pack(side="right", padx=20, pady=8)
+        
         # Classes container
         self.classes_container = tk.Frame(self, bg="#0f172a")
         self.classes_container.pack(fill="both", expand=True, padx=40, pady=(0, 30))
     
     def refresh(self):
         """Refresh dashboard data"""
-        # Clear existing widgets
-        for widget in self.stats_container.winfo_children():
-            widget.destroy()
+        if self.layout_key is None:
+            self.show_loading()
+        data_key = self.app.page_data_key(self)
+        self.app.dispatcher.submit(self.app.service.get_today_schedule,
+                                   self.app.current_user['id'],
+                                   key="dashboard", group="dashboard",
+                                   on_success=lambda schedule: self.render(schedule, data_key))
+    
+    def clear(self):
+        """Remove the class list widgets"""
         for widget in self.classes_container.winfo_children():
             widget.destroy()
+        self.cards = {}
+        self.mark_all_btn = None
+        self.layout_key = None
+    
+    def show_loading(self):
+        """Show a placeholder while today's data loads"""
+        self.clear()
+        tk.Label(self.classes_container,
+                text="Loading today's schedule…",
+                bg="#0f172a",
+                fg="#94a3b8",
+                font=("Segoe UI", 12)).pack(anchor="w")
+    
+    @staticmethod
+    def get_layout_key(schedule):
+        """Identify the card layout; statuses are left out so they can change in place"""
+        return (schedule['date'],) + tuple(
+            (c['id'], c['subject_name'], c['time_slot'], c.get('professor'), c.get('room_number'))
+            for c in schedule['classes'])
+    
+    def render(self, schedule, data_key=None):
+        """Render today's schedule, rebuilding cards only if the class list changed"""
+        self.data_key = data_key
+        layout_key = self.get_layout_key(schedule)
+        if layout_key != self.layout_key:
+            self.clear()
+            self.layout_key = layout_key
+            self.today_date = schedule['date']
+            if not schedule['classes']:
+                self.show_no_classes()
+            else:
+                self.show_classes(schedule['classes'], schedule['date'])
+        else:
+            for class_info in schedule['classes']:
+                self.set_card_status(class_info['id'], class_info['status'])
+        self.update_counters()
+        self.update_catch_up(schedule['catch_up'])
+    
+    def update_catch_up(self, count):
+        """Show or hide the banner about unmarked past sessions"""
+        if count:
+            plural = "session was" if count == 1 else "sessions were"
+            self.catch_up_label.config(text=f"⏰ {count} past {plural} never marked")
+            self.catch_up_bar.pack(fill="x", padx=40, pady=(0, 20), before=self.classes_container)
+        else:
+            self.catch_up_bar.pack_forget()
+    
+    def show_catch_up_dialog(self):
+        """List unmarked past sessions so they can be marked one by one or all at once"""
+        dialog = tk.Toplevel(self)
+        dialog.title("Catch Up")
+        dialog.geometry("640x560")
+        dialog.configure(bg="#1e293b")
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.minsize(520, 400)
         
-        # Get today's data
-        today_classes = self.app.db.get_today_classes(self.app.current_user['id'])
-        today_date = datetime.now().date().isoformat()
-        attendance_records = self.app.db.get_attendance_for_date(self.app.current_user['id'], today_date)
+        # Center dialog
+        dialog.update_idletasks()
+        x = (dialog.winfo_screenwidth() // 2) - (640 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (560 // 2)
+        dialog.geometry(f"640x560+{x}+{y}")
         
-        # Convert to dict for easy lookup
-        attendance_dict = {record['class_id']: record['status'] for record in attendance_records}
+        def close():
+            self.catch_up_list = None
+            dialog.destroy()
+            self.refresh()
         
-        # Calculate stats
-        total_today = len(today_classes)
-        attended = sum(1 for c in today_classes if attendance_dict.get(c['id']) == 'Present')
-        absent = sum(1 for c in today_classes if attendance_dict.get(c['id']) == 'Absent')
+        dialog.protocol("WM_DELETE_WINDOW", close)
         
-        # Display stats cards
-        stats = [
-            ("Total Classes Today", str(total_today), "#3b82f6"),
-            ("Attended", str(attended), "#10b981"),
-            ("Absent", str(absent), "#ef4444")
-        ]
+        tk.Label(dialog,
+                text="Unmarked Sessions",
+                bg="#1e293b",
+                fg="#f1f5f9",
+                font=("Segoe UI", 20, "bold")).pack(anchor="w", padx=30, pady=(25, 5))
         
-        for i, (label, value, color) in enumerate(stats):
-            self.create_stat_card(self.stats_container, label, value, color, i)
+        self.catch_up_status = tk.Label(dialog,
+                text="Loading…",
+                bg="#1e293b",
+                fg="#94a3b8",
+                font=("Segoe UI", 11))
+        self.catch_up_status.pack(anchor="w", padx=30, pady=(0, 15))
         
-        # Display classes
-        if not today_classes:
-            self.show_no_classes()
-        else:
-            self.show_classes(today_classes, attendance_dict, today_date)
+        # Footer with bulk actions
+        footer = tk.Frame(dialog, bg="#1e293b")
+        footer.pack(side="bottom", fill="x", padx=30, pady=20)
+        
+        ttk.Button(footer,
+                  text="✓ Mark All Present",
+                  style="Success.TButton",
+                  command=lambda: self.mark_sessions(self.catch_up_items, "Present")).pack(side="left", padx=(0, 10))
+        
+        ttk.Button(footer,
+                  text="✗ Mark All Absent",
+                  style="Danger.TButton",
+                  command=lambda: self.mark_sessions(self.catch_up_items, "Absent")).pack(side="left")
+        
+        ttk.Button(footer,
+                  text="Close",
+                  style="Secondary.TButton",
+                  command=close).pack(side="right")
+        
+        self.catch_up_items = []
+        self.catch_up_list = VirtualList(dialog,
+                                         {"session": (76, self.create_session_row, self.bind_session_row)},
+                                         bg="#1e293b")
+        self.catch_up_list.pack(fill="both", expand=True, padx=30)
+        
+        self.app.dispatcher.submit(self.app.service.get_unmarked_sessions,
+                                   self.app.current_user['id'],
+                                   key="catch_up", group="dashboard",
+                                   on_success=self.show_catch_up_items)
+    
+    def show_catch_up_items(self, items):
+        """Fill the catch-up list"""
+        if self.catch_up_list is None:
+            return
+        self.catch_up_items = items
+        self.catch_up_list.set_items(items)
+        count = len(items)
+        self.catch_up_status.config(
+            text="All caught up! 🎉" if not count
+            else f"{count} session{'s' if count != 1 else ''} to review, oldest first")
+    
+    def create_session_row(self, parent):
+        """Create an empty, reusable row for one unmarked session"""
+        row = tk.Frame(parent, bg="#1e293b")
+        
+        card = tk.Frame(row, bg="#0f172a")
+        card.pack(fill="both", expand=True, pady=(0, 8))
+        
+        info = tk.Frame(card, bg="#0f172a")
+        info.pack(side="left", fill="both", expand=True, padx=15, pady=10)
+        
+        row.subject_label = tk.Label(info,
+                bg="#0f172a",
+                fg="#f1f5f9",
+                font=("Segoe UI", 12, "bold"))
+        row.subject_label.pack(anchor="w")
+        
+        row.when_label = tk.Label(info,
+                bg="#0f172a",
+                fg="#94a3b8",
+                font=("Segoe UI", 10))
+        row.when_label.pack(anchor="w")
+        
+        row.absent_btn = ttk.Button(card, text="Absent ✗", style="Danger.TButton")
+        row.absent_btn.pack(side="right", padx=(5, 15))
+        
+        row.present_btn = ttk.Button(card, text="Present ✓", style="Success.TButton")
+        row.present_btn.pack(side="right")
+        return row
+    
+    def bind_session_row(self, row, session):
+        """Fill a session row"""
+        when = date.fromisoformat(session['date']).strftime("%a, %b %d %Y")
+        row.subject_label.config(text=session['subject_name'])
+        row.when_label.config(text=f"📅 {when}  •  ⏰ {session['time_slot']}")
+        row.present_btn.config(command=lambda: self.mark_sessions([session], "Present"))
+        row.absent_btn.config(command=lambda: self.mark_sessions([session], "Absent"))
+    
+    def mark_sessions(self, sessions, status):
+        """Mark some unmarked sessions in one batch and drop them from the list"""
+        if not sessions:
+            return
+        records = [(session['class_id'], session['date'], status) for session in sessions]
+        
+        def on_marked(outcomes):
+            done = {(o['class_id'], o['date']) for o in outcomes if o['ok']}
+            self.show_catch_up_items([item for item in self.catch_up_items
+                                      if (item['class_id'], item['date']) not in done])
+            failed = [o for o in outcomes if not o['ok']]
+            if failed:
+                messagebox.showerror("Error", f"Could not mark {len(failed)} session(s): {failed[0]['error']}")
+        
+        self.app.dispatcher.submit(self.app.service.mark_sessions,
+                                   self.app.current_user['id'], records,
+                                   owner=self, on_success=on_marked)
     
     def create_stat_card(self, parent, label, value, color, index):
-        """Create a statistics card"""
+        """Create a statistics card and return its value label"""
         card = tk.Frame(parent, bg="#1e293b", highlightthickness=0)
         card.grid(row=0, column=index, padx=10, sticky="ew")
         parent.grid_columnconfigure(index, weight=1)
@@ -83,17 +277,32 @@ class DashboardFrame(tk.Frame):
         inner = tk.Frame(card, bg="#1e293b")
         inner.pack(padx=30, pady=25)
         
-        tk.Label(inner,
+        value_label = tk.Label(inner,
                 text=value,
                 bg="#1e293b",
                 fg=color,
-                font=("Segoe UI", 36, "bold")).pack()
+                font=("Segoe UI", 36, "bold"))
+        value_label.pack()
         
         tk.Label(inner,
                 text=label,
                 bg="#1e293b",
                 fg="#94a3b8",
                 font=("Segoe UI", 11)).pack()
+        return value_label
+    
+    def update_counters(self):
+        """Recompute the stat cards and mark-all button from the card statuses"""
+        schedule = [card['class'] for card in self.cards.values()]
+        counts = self.app.service.count_statuses(schedule)
+        for key, label in self.stat_labels.items():
+            label.config(text=str(counts[key]))
+        
+        if self.mark_all_btn is not None:
+            if counts['unmarked']:
+                self.mark_all_btn.pack(side="right")
+            else:
+                self.mark_all_btn.pack_forget()
     
     def show_no_classes(self):
         """Show message when no classes today"""
@@ -120,14 +329,23 @@ class DashboardFrame(tk.Frame):
                 fg="#94a3b8",
                 font=("Segoe UI", 11)).pack()
     
-    def show_classes(self, classes, attendance_dict, today_date):
+    def show_classes(self, classes, today_date):
         """Show today's classes with attendance marking"""
         # Header
-        tk.Label(self.classes_container,
+        header = tk.Frame(self.classes_container, bg="#0f172a")
+        header.pack(fill="x", pady=(0, 20))
+        
+        tk.Label(header,
                 text="Today's Schedule",
                 bg="#0f172a",
                 fg="#f1f5f9",
-                font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
+                font=("Segoe UI", 18, "bold")).pack(side="left")
+        
+        # Packed by update_counters while any class is unmarked
+        self.mark_all_btn = ttk.Button(header,
+                                      text="✓ Mark All Present",
+                                      style="Success.TButton",
+                                      command=lambda: self.mark_all_attendance("Present"))
         
         # Scrollable frame
         canvas = tk.Canvas(self.classes_container, bg="#0f172a", highlightthickness=0)
@@ -144,15 +362,13 @@ class DashboardFrame(tk.Frame):
         
         # Class cards
         for class_info in classes:
-            self.create_class_card(scrollable_frame, class_info, attendance_dict, today_date)
+            self.create_class_card(scrollable_frame, class_info, today_date)
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
     
-    def create_class_card(self, parent, class_info, attendance_dict, today_date):
+    def create_class_card(self, parent, class_info, today_date):
         """Create a card for each class"""
-        status = attendance_dict.get(class_info['id'])
-        
         # Card
         card = tk.Frame(parent, bg="#1e293b", highlightthickness=0)
         card.pack(fill="x", pady=(0, 15))
@@ -184,10 +400,28 @@ class DashboardFrame(tk.Frame):
                 fg="#94a3b8",
                 font=("Segoe UI", 10)).pack(anchor="w", pady=(5, 0))
         
-        # Right side - Attendance buttons
+        # Right side - Attendance buttons or status badge
         right = tk.Frame(inner, bg="#1e293b")
         right.pack(side="right", padx=(20, 0))
         
+        self.cards[class_info['id']] = {
+            'frame': card,
+            'right': right,
+            'class': dict(class_info, status=None),
+            'date': today_date
+        }
+        self.set_card_status(class_info['id'], class_info['status'], force=True)
+    
+    def set_card_status(self, class_id, status, force=False):
+        """Swap one card's buttons/badge to match its status"""
+        card = self.cards.get(class_id)
+        if card is None or (card['class']['status'] == status and not force):
+            return
+        card['class']['status'] = status
+        right = card['right']
+        for widget in right.winfo_children():
+            widget.destroy()
+        
         if status == "Present":
             tk.Label(right,
                     text="✓ Present",
@@ -211,17 +445,46 @@ class DashboardFrame(tk.Frame):
             present_btn = ttk.Button(btn_frame,
                                     text="Present ✓",
                                     style="Success.TButton",
-                                    command=lambda: self.mark_attendance(class_info['id'], "Present", today_date))
+                                    command=lambda: self.mark_attendance(class_id, "Present", card['date']))
             present_btn.pack(side="left", padx=(0, 10))
             
             absent_btn = ttk.Button(btn_frame,
                                    text="Absent ✗",
                                    style="Danger.TButton",
-                                   command=lambda: self.mark_attendance(class_info['id'], "Absent", today_date))
+                                   command=lambda: self.mark_attendance(class_id, "Absent", card['date']))
             absent_btn.pack(side="left")
     
     def mark_attendance(self, class_id, status, date):
-        """Mark attendance for a class"""
-        success = self.app.db.mark_attendance(class_id, self.app.current_user['id'], status, date)
-        if success:
-            self.refresh()
\ No newline at end of file
+        """Mark attendance for a class and update only its card"""
+        def on_marked(success):
+            if success:
+                self.set_card_status(class_id, status)
+                self.update_counters()
+                # The card already shows this write, so it doesn't need a reload
+                self.data_key = self.app.page_data_key(self)
+        
+        self.app.dispatcher.submit(self.app.service.mark_attendance,
+                                   self.app.current_user['id'], class_id, status, date,
+                                   owner=self, on_success=on_marked)
+    
+    def mark_all_attendance(self, status):
+        """Mark every unmarked class in one batch"""
+        class_ids = [class_id for class_id, card in self.cards.items()
+                     if card['class']['status'] is None]
+        if not class_ids:
+            return
+        self.app.dispatcher.submit(self.app.service.mark_many,
+                                   self.app.current_user['id'], class_ids, status, self.today_date,
+                                   owner=self, on_success=self.on_marked_all)
+    
+    def on_marked_all(self, outcomes):
+        """Apply a batch mark to the affected cards and report failures"""
+        for outcome in outcomes:
+            if outcome['ok']:
+                self.set_card_status(outcome['class_id'], outcome['status'])
+        self.update_counters()
+        self.data_key = self.app.page_data_key(self)
+        
+        failed = [o for o in outcomes if not o['ok']]
+        if failed:
+            messagebox.showerror("Error", f"Could not mark {len(failed)} class(es): {failed[0]['error']}")
@@ -1,223 +1,1262 @@
 import sqlite3
-import hashlib
-from datetime import datetime, date
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+import passwords
+from query_cache import QueryCache, copy_result
+
+
+# Every statement the Database runs, by name. Keeping the SQL text constant lets
+# sqlite3's per-connection statement cache reuse the compiled statement, and the
+# names key the latency metrics in QueryStats.
+QUERIES = {
+    'create_user': "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+    'create_user_with_id': "INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)",
+    'user_credentials': "SELECT id, password_hash FROM users WHERE username = ?",
+    'update_password_hash': "UPDATE users SET password_hash = ? WHERE id = ?",
+    'add_class': """INSERT INTO classes (user_id, subject_name, day_of_week, time_slot, professor, room_number,
+                                    start_minute, end_minute, created_on)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    'extend_class_start': "UPDATE classes SET created_on = ? WHERE id = ? AND created_on > ?",
+    'user_classes': """SELECT * FROM classes WHERE user_id = ?
+               ORDER BY CASE day_of_week
+                   WHEN 'Monday' THEN 1
+                   WHEN 'Tuesday' THEN 2
+                   WHEN 'Wednesday' THEN 3
+                   WHEN 'Thursday' THEN 4
+                   WHEN 'Friday' THEN 5
+                   WHEN 'Saturday' THEN 6
+                   WHEN 'Sunday' THEN 7
+               END, start_minute, time_slot""",
+    'today_classes': """SELECT * FROM classes WHERE user_id = ? AND day_of_week = ?
+               ORDER BY start_minute, time_slot""",
+    'current_class': """SELECT * FROM classes
+               WHERE user_id = ? AND day_of_week = ? AND start_minute <= ? AND end_minute > ?
+               ORDER BY start_minute DESC LIMIT 1""",
+    'next_class': """SELECT * FROM classes
+               WHERE user_id = ? AND day_of_week = ? AND start_minute > ?
+               ORDER BY start_minute LIMIT 1""",
+    'class_clashes': """SELECT id, subject_name, time_slot FROM classes
+               WHERE user_id = ? AND day_of_week = ? AND start_minute < ? AND end_minute > ?
+               ORDER BY start_minute""",
+    'user_by_name': "SELECT id FROM users WHERE username = ?",
+    'find_class': """SELECT id FROM classes
+               WHERE user_id = ? AND day_of_week = ? AND time_slot = ? AND subject_name = ?""",
+    'user_class_ids': "SELECT id FROM classes WHERE user_id = ?",
+    'class_owner': "SELECT user_id FROM classes WHERE id = ?",
+    'delete_class': "DELETE FROM classes WHERE id = ?",
+    'prune_attendance_changes': "DELETE FROM attendance_changes WHERE seq <= ?",
+    'mark_attendance': """INSERT INTO attendance (class_id, user_id, date, status)
+                   VALUES (?, ?, ?, ?)
+               ON CONFLICT (class_id, date) DO UPDATE SET
+                   user_id = excluded.user_id, status = excluded.status""",
+    'attendance_for_date': """SELECT a.*, c.subject_name FROM attendance a
+               JOIN classes c ON a.class_id = c.id
+               WHERE a.user_id = ? AND a.date = ?""",
+    'overall_stats': """SELECT SUM(total) as total, SUM(present) as present
+               FROM attendance_summary WHERE user_id = ?""",
+    'subject_stats': """SELECT
+                c.subject_name,
+                SUM(s.total) as total,
+                SUM(s.present) as present
+               FROM classes c
+               JOIN attendance_summary s ON s.class_id = c.id
+               WHERE c.user_id = ?
+               GROUP BY c.subject_name
+               HAVING total > 0
+               ORDER BY c.subject_name""",
+    # Session calendar: concrete dates of each weekly class, materialized up
+    # to a per-user horizon
+    'session_horizon': "SELECT materialized_until FROM session_horizons WHERE user_id = ?",
+    'set_session_horizon': """INSERT INTO session_horizons (user_id, materialized_until) VALUES (?, ?)
+               ON CONFLICT (user_id) DO UPDATE SET
+                   materialized_until = MAX(materialized_until, excluded.materialized_until)""",
+    'reset_session_horizon': "DELETE FROM session_horizons WHERE user_id = ?",
+    'class_schedule': "SELECT id, day_of_week, created_on FROM classes WHERE user_id = ?",
+    'add_session': "INSERT OR IGNORE INTO sessions (class_id, user_id, date) VALUES (?, ?, ?)",
+    'unmarked_sessions': """SELECT s.class_id, s.date, c.subject_name, c.time_slot, c.professor, c.room_number
+               FROM sessions s
+               JOIN classes c ON c.id = s.class_id
+               WHERE s.user_id = ? AND s.date < ?
+                 AND NOT EXISTS (SELECT 1 FROM attendance a
+                                 WHERE a.class_id = s.class_id AND a.date = s.date)
+               ORDER BY s.date, c.start_minute
+               LIMIT ?""",
+    'unmarked_session_count': """SELECT COUNT(*) AS count FROM sessions s
+               WHERE s.user_id = ? AND s.date < ?
+                 AND NOT EXISTS (SELECT 1 FROM attendance a
+                                 WHERE a.class_id = s.class_id AND a.date = s.date)""",
+    'user_settings': "SELECT key, value FROM user_settings WHERE user_id = ?",
+    'set_user_setting': """INSERT INTO user_settings (user_id, key, value) VALUES (?, ?, ?)
+               ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value""",
+    # Trends: range scans over idx_attendance_user_date, bucketed in SQL; the
+    # cumulative columns come from a window over the buckets.
+    'attendance_trend_week': """SELECT period, total, present,
+                SUM(total) OVER running AS cumulative_total,
+                SUM(present) OVER running AS cumulative_present
+               FROM (SELECT date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')
+                            AS period,
+                            COUNT(*) AS total, SUM(status = 'Present') AS present
+                     FROM attendance
+                     WHERE user_id = ? AND date >= ? AND date <= ?
+                     GROUP BY period)
+               WINDOW running AS (ORDER BY period ROWS UNBOUNDED PRECEDING)
+               ORDER BY period""",
+    'attendance_trend_month': """SELECT period, total, present,
+                SUM(total) OVER running AS cumulative_total,
+                SUM(present) OVER running AS cumulative_present
+               FROM (SELECT strftime('%Y-%m-01', date) AS period,
+                            COUNT(*) AS total, SUM(status = 'Present') AS present
+                     FROM attendance
+                     WHERE user_id = ? AND date >= ? AND date <= ?
+                     GROUP BY period)
+               WINDOW running AS (ORDER BY period ROWS UNBOUNDED PRECEDING)
+               ORDER BY period""",
+    # Per-subject, per-day counts, then a RANGE window over the previous
+    # N-1 days. Rows before the range start are read only as look-back.
+    'rolling_attendance': """WITH daily AS (
+                   SELECT c.subject_name AS subject, a.date AS date,
+                          COUNT(*) AS total, SUM(a.status = 'Present') AS present
+                   FROM attendance a
+                   JOIN classes c ON c.id = a.class_id
+                   WHERE a.user_id = ? AND a.date >= date(?, '-' || ? || ' days') AND a.date <= ?
+                   GROUP BY c.subject_name, a.date
+               )
+               SELECT * FROM (
+                   SELECT subject, date, total, present,
+                          SUM(total) OVER recent AS window_total,
+                          SUM(present) OVER recent AS window_present
+                   FROM daily
+                   WINDOW recent AS (PARTITION BY subject ORDER BY julianday(date)
+                                     RANGE BETWEEN ? PRECEDING AND CURRENT ROW)
+               )
+               WHERE date >= ?
+               ORDER BY subject, date""",
+}
+
+
+class QueryStats:
+    """Per-query call counts, latency percentiles and row counts.
+
+    Latencies are kept in a bounded window per query so long-running processes
+    report recent behaviour without growing memory.
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, name, seconds, rows):
+        """Record one execution of a named query"""
+        with self._lock:
+            entry = self._queries.get(name)
+            if entry is None:
+                entry = self._queries[name] = {
+                    'calls': 0, 'rows': 0, 'total_time': 0.0,
+                    'latencies': deque(maxlen=self.window),
+                }
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_time'] += seconds
+            entry['latencies'].append(seconds)
+
+    def reset(self):
+        """Forget all recorded executions"""
+        with self._lock:
+            self._queries.clear()
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        """Nearest-rank percentile of an already sorted list"""
+        if not ordered:
+            return 0.0
+        index = max(0, math.ceil(fraction * len(ordered)) - 1)
+        return ordered[index]
+
+    def snapshot(self):
+        """Return metrics per query name, latencies in milliseconds"""
+        with self._lock:
+            items = [(name, dict(entry, latencies=sorted(entry['latencies'])))
+                     for name, entry in self._queries.items()]
+
+        result = {}
+        for name, entry in items:
+            ordered = entry['latencies']
+            calls = entry['calls']
+            result[name] = {
+                'calls': calls,
+                'rows': entry['rows'],
+                'rows_per_call': round(entry['rows'] / calls, 2) if calls else 0,
+                'total_ms': round(entry['total_time'] * 1000, 3),
+                'mean_ms': round(entry['total_time'] * 1000 / calls, 3) if calls else 0,
+                'p50_ms': round(self._percentile(ordered, 0.50) * 1000, 3),
+                'p95_ms': round(self._percentile(ordered, 0.95) * 1000, 3),
+                'p99_ms': round(self._percentile(ordered, 0.99) * 1000, 3),
+            }
+        return result
+
+    def to_json(self, **kwargs):
+        """Return the snapshot serialized as JSON"""
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+class ConcurrencyStats:
+    """How much reading and writing overlapped in time.
+
+    Reads are statements (or whole snapshots) on read-only connections;
+    writes are transactions and standalone write statements. Time is
+    accumulated between consecutive begin/end events, so the totals are
+    exact for the recorded spans.
+    """
+
+    KINDS = ('read', 'write')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded spans"""
+        with self._lock:
+            self._active = dict.fromkeys(self.KINDS, 0)
+            self._count = dict.fromkeys(self.KINDS, 0)
+            self._peak = dict.fromkeys(self.KINDS, 0)
+            self._busy = dict.fromkeys(self.KINDS, 0.0)
+            self._overlap = 0.0
+            self._reads_during_writes = 0
+            self._since = time.perf_counter()
+
+    def _advance(self):
+        now = time.perf_counter()
+        elapsed = now - self._since
+        for kind in self.KINDS:
+            if self._active[kind]:
+                self._busy[kind] += elapsed
+        if self._active['read'] and self._active['write']:
+            self._overlap += elapsed
+        self._since = now
+
+    def begin(self, kind):
+        """Record that a read or write started"""
+        with self._lock:
+            self._advance()
+            if kind == 'read' and self._active['write']:
+                self._reads_during_writes += 1
+            self._active[kind] += 1
+            self._count[kind] += 1
+            self._peak[kind] = max(self._peak[kind], self._active[kind])
+
+    def end(self, kind):
+        """Record that a read or write finished"""
+        with self._lock:
+            self._advance()
+            self._active[kind] -= 1
+
+    def snapshot(self):
+        """Return counts, peaks and busy/overlap seconds"""
+        with self._lock:
+            self._advance()
+            write_busy = self._busy['write']
+            return {
+                'reads': self._count['read'],
+                'writes': self._count['write'],
+                'peak_readers': self._peak['read'],
+                'peak_writers': self._peak['write'],
+                'read_busy_seconds': round(self._busy['read'], 6),
+                'write_busy_seconds': round(write_busy, 6),
+                'overlap_seconds': round(self._overlap, 6),
+                # Share of write time during which at least one read also ran
+                'overlap_share': round(self._overlap / write_busy, 4) if write_busy else 0.0,
+                'reads_during_writes': self._reads_during_writes,
+            }
+
+
+ATTENDANCE_STATUSES = ("Present", "Absent")
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+TIME_SLOT_PATTERN = re.compile(
+    r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?\s*(?:-|–|—|to)\s*"
+    r"(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?\s*$",
+    re.IGNORECASE)
+
+
+def _to_minute(hour, minute, meridiem):
+    """Minutes after midnight for one side of a time slot"""
+    hour = int(hour)
+    minute = int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid hour: {hour}")
+        hour = hour % 12 + (12 if meridiem[0].lower() == "p" else 0)
+    if minute > 59 or hour > 24 or (hour == 24 and minute):
+        raise ValueError(f"Invalid time: {hour}:{minute:02d}")
+    return hour * 60 + minute
+
+
+def parse_time_slot(time_slot):
+    """Parse "09:00 - 10:30" style text into (start_minute, end_minute).
+
+    Accepts 24-hour or am/pm times, optional minutes and -, –, — or "to"
+    as the separator. A start without am/pm takes the end's if that keeps
+    it before the end ("10 - 11:30 am"). Raises ValueError otherwise.
+    """
+    match = TIME_SLOT_PATTERN.match(time_slot or "")
+    if not match:
+        raise ValueError(f"Time slot must look like 09:00 - 10:30, got {time_slot!r}")
+    start_hour, start_min, start_mer, end_hour, end_min, end_mer = match.groups()
+    end = _to_minute(end_hour, end_min, end_mer)
+    start = _to_minute(start_hour, start_min, start_mer)
+    if not start_mer and end_mer and int(start_hour) <= 12:
+        inherited = _to_minute(start_hour, start_min, end_mer)
+        if inherited < end:
+            start = inherited
+    if start >= end:
+        raise ValueError(f"Time slot must end after it starts: {time_slot!r}")
+    return start, end
+
+
+TREND_PERIODS = ("week", "month")
+
+# Per-user preferences and their defaults. Values are stored as text and
+# converted back with the default's type (semester_end is an ISO date).
+DEFAULT_SETTINGS = {
+    'target_percentage': 75.0,
+    'warning_percentage': 60.0,
+    'semester_end': None,
+}
+
+
+def percentage(present, total):
+    """Attendance percentage rounded like the statistics pages show it"""
+    return round(present / total * 100, 2) if total else 0
+
+
+def _iso(day):
+    """Accept a date or an ISO string; return the ISO string"""
+    return day.isoformat() if isinstance(day, date) else date.fromisoformat(day).isoformat()
+
+
+def weekly_dates(day_of_week, first, last):
+    """Dates from first to last (inclusive) that fall on a weekday"""
+    day = first + timedelta(days=(DAYS.index(day_of_week) - first.weekday()) % 7)
+    while day <= last:
+        yield day
+        day += timedelta(weeks=1)
+
+
+def is_full_scan(detail, derived=()):
+    """Whether an EXPLAIN QUERY PLAN detail line reads a whole table or index.
+
+    Scans of subquery results and of the CTEs named in ``derived`` only
+    walk rows the query already produced, so they don't count.
+    """
+    if not detail.startswith("SCAN ") or "CONSTANT ROW" in detail:
+        return False
+    source = detail[len("SCAN "):].split(" ")[0]
+    return not source.startswith("(subquery-") and source not in derived
+
+
+def derived_tables(details):
+    """Names of the CTEs a query plan builds (CO-ROUTINE / MATERIALIZE lines)"""
+    return {detail.split(" ")[1] for detail in details
+            if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+
+
+def _create_base_tables(conn):
+    """Version 1: users, classes and attendance tables"""
+    # Users table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Classes table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS classes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            subject_name TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            professor TEXT,
+            room_number TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Attendance table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            status TEXT NOT NULL,
+            FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            UNIQUE(class_id, date)
+        )
+    ''')
+
+
+def _create_access_indexes(conn):
+    """Version 2: covering indexes for the timetable, dashboard and statistics reads"""
+    # get_user_classes / get_today_classes (and ON DELETE CASCADE from users)
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_classes_user_day
+                    ON classes (user_id, day_of_week, time_slot)""")
+    # get_attendance_for_date and get_overall_statistics
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_attendance_user_date
+                    ON attendance (user_id, date, class_id, status)""")
+    # get_subject_statistics joins attendance by class
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_attendance_class_status
+                    ON attendance (class_id, status)""")
+
+
+def _create_attendance_summary(conn):
+    """Version 3: per-class attendance counters maintained by triggers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendance_summary (
+            class_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            present INTEGER NOT NULL DEFAULT 0,
+            absent INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_attendance_summary_user
+                    ON attendance_summary (user_id, total, present)""")
+
+    # Marks are upserts (ON CONFLICT DO UPDATE), so a re-mark fires the update
+    # trigger, which takes the old status out before adding the new one.
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_insert
+        AFTER INSERT ON attendance
+        BEGIN
+            INSERT INTO attendance_summary (class_id, user_id, total, present, absent)
+            VALUES (NEW.class_id, NEW.user_id, 1,
+                    NEW.status = 'Present', NEW.status = 'Absent')
+            ON CONFLICT (class_id) DO UPDATE SET
+                total = total + 1,
+                present = present + (NEW.status = 'Present'),
+                absent = absent + (NEW.status = 'Absent');
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_delete
+        AFTER DELETE ON attendance
+        BEGIN
+            UPDATE attendance_summary SET
+                total = total - 1,
+                present = present - (OLD.status = 'Present'),
+                absent = absent - (OLD.status = 'Absent')
+            WHERE class_id = OLD.class_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_update
+        AFTER UPDATE OF class_id, status ON attendance
+        BEGIN
+            UPDATE attendance_summary SET
+                total = total - 1,
+                present = present - (OLD.status = 'Present'),
+                absent = absent - (OLD.status = 'Absent')
+            WHERE class_id = OLD.class_id;
+            INSERT INTO attendance_summary (class_id, user_id, total, present, absent)
+            VALUES (NEW.class_id, NEW.user_id, 1,
+                    NEW.status = 'Present', NEW.status = 'Absent')
+            ON CONFLICT (class_id) DO UPDATE SET
+                total = total + 1,
+                present = present + (NEW.status = 'Present'),
+                absent = absent + (NEW.status = 'Absent');
+        END
+    ''')
+    _rebuild_attendance_summary(conn)
+
+
+def _add_time_slot_minutes(conn):
+    """Version 4: parsed start/end minutes for time slots, indexed per day"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(classes)")}
+    for column in ("start_minute", "end_minute"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE classes ADD COLUMN {column} INTEGER")
+
+    # Rows whose text can't be parsed keep NULL minutes; they still list and
+    # sort (first within their day), they just never count as current, next or clashing.
+    updates = []
+    for class_id, time_slot in conn.execute(
+            "SELECT id, time_slot FROM classes WHERE start_minute IS NULL"):
+        try:
+            updates.append(parse_time_slot(time_slot) + (class_id,))
+        except ValueError:
+            continue
+    conn.executemany("UPDATE classes SET start_minute = ?, end_minute = ? WHERE id = ?", updates)
+
+    # Replaces the index on the time_slot text
+    conn.execute("DROP INDEX IF EXISTS idx_classes_user_day")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_classes_user_day_start
+                    ON classes (user_id, day_of_week, start_minute, end_minute)""")
+
+
+def _create_user_settings(conn):
+    """Version 5: per-user key/value settings"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (user_id, key),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def _create_sessions(conn):
+    """Version 6: materialized class sessions and when each class started"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(classes)")}
+    if "created_on" not in columns:
+        conn.execute("ALTER TABLE classes ADD COLUMN created_on DATE")
+    # Existing classes start at their first marked date; classes never marked
+    # start today rather than inventing a backlog of unmarked sessions.
+    conn.execute("""UPDATE classes SET created_on = COALESCE(
+                        (SELECT MIN(date) FROM attendance WHERE class_id = classes.id),
+                        date('now', 'localtime'))
+                    WHERE created_on IS NULL""")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            class_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            PRIMARY KEY (class_id, date),
+            FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_sessions_user_date
+                    ON sessions (user_id, date)""")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_horizons (
+            user_id INTEGER PRIMARY KEY,
+            materialized_until DATE NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def _create_attendance_changes(conn):
+    """Version 7: log which attendance keys changed, for incremental readers"""
+    # Marks are upserted in place, so row ids alone can't tell a reader what
+    # changed since it last looked; every insert, update and delete appends
+    # the affected (class_id, date) here instead. See analytics.py.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendance_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            date DATE NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_changes_insert
+        AFTER INSERT ON attendance
+        BEGIN
+            INSERT INTO attendance_changes (class_id, date) VALUES (NEW.class_id, NEW.date);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_changes_delete
+        AFTER DELETE ON attendance
+        BEGIN
+            INSERT INTO attendance_changes (class_id, date) VALUES (OLD.class_id, OLD.date);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_changes_update
+        AFTER UPDATE OF class_id, date, status ON attendance
+        BEGIN
+            INSERT INTO attendance_changes (class_id, date)
+            SELECT OLD.class_id, OLD.date
+            WHERE OLD.class_id != NEW.class_id OR OLD.date != NEW.date;
+            INSERT INTO attendance_changes (class_id, date) VALUES (NEW.class_id, NEW.date);
+        END
+    ''')
+
+
+# The change log keeps the newest CHANGE_LOG_KEEP entries, trimmed every
+# CHANGE_LOG_TRIM_EVERY inserts; readers further behind than that reload in full
+CHANGE_LOG_KEEP = 100_000
+CHANGE_LOG_TRIM_EVERY = 1_000
+
+
+def _bound_attendance_changes(conn):
+    """Version 8: cap the attendance change log so it can't grow without limit"""
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_changes_trim
+        AFTER INSERT ON attendance_changes
+        WHEN NEW.seq % {CHANGE_LOG_TRIM_EVERY} = 0
+        BEGIN
+            DELETE FROM attendance_changes WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+        END
+    ''')
+
+
+def _rebuild_attendance_summary(conn):
+    """Recompute attendance_summary from the attendance history"""
+    conn.execute("DELETE FROM attendance_summary")
+    conn.execute(SUMMARY_REBUILD_SQL)
+
+
+# Maintenance statements read the whole attendance history on purpose, so they
+# are kept out of QUERIES and its full-scan check.
+SUMMARY_REBUILD_SQL = """
+    INSERT INTO attendance_summary (class_id, user_id, total, present, absent)
+    SELECT class_id, MIN(user_id), COUNT(*),
+           SUM(status = 'Present'), SUM(status = 'Absent')
+    FROM attendance
+    GROUP BY class_id
+"""
+
+SUMMARY_VERIFY_SQL = """
+    WITH actual AS (
+        SELECT class_id, COUNT(*) AS total,
+               SUM(status = 'Present') AS present, SUM(status = 'Absent') AS absent
+        FROM attendance GROUP BY class_id
+    )
+    SELECT s.class_id AS class_id,
+           COALESCE(a.total, 0) AS expected_total, s.total AS stored_total,
+           COALESCE(a.present, 0) AS expected_present, s.present AS stored_present,
+           COALESCE(a.absent, 0) AS expected_absent, s.absent AS stored_absent
+    FROM attendance_summary s
+    LEFT JOIN actual a ON a.class_id = s.class_id
+    WHERE s.total != COALESCE(a.total, 0)
+       OR s.present != COALESCE(a.present, 0)
+       OR s.absent != COALESCE(a.absent, 0)
+    UNION ALL
+    SELECT a.class_id, a.total, 0, a.present, 0, a.absent, 0
+    FROM actual a
+    WHERE NOT EXISTS (SELECT 1 FROM attendance_summary s WHERE s.class_id = a.class_id)
+"""
+
+
+# Ordered schema migrations: (version, description, step). Steps must be safe to
+# re-run because databases created before versioning already have the base tables.
+MIGRATIONS = [
+    (1, "Create users, classes and attendance tables", _create_base_tables),
+    (2, "Add covering indexes for classes and attendance", _create_access_indexes),
+    (3, "Add trigger-maintained attendance_summary counters", _create_attendance_summary),
+    (4, "Parse time slots into indexed start/end minutes", _add_time_slot_minutes),
+    (5, "Add per-user settings", _create_user_settings),
+    (6, "Add the materialized session calendar", _create_sessions),
+    (7, "Log attendance changes for incremental analytics", _create_attendance_changes),
+    (8, "Cap the attendance change log", _bound_attendance_changes),
+]
+
+
+class ConnectionPool:
+    """Thread-aware pool handing each thread one long-lived SQLite connection.
+
+    Connections are opened lazily, configured with PRAGMAs once, and stay bound
+    to the thread that asked for them. At most ``max_connections`` are open at a
+    time; when the pool is full, connections owned by finished threads are
+    reclaimed before a caller has to wait for ``release()``.
+    """
+
+    PRAGMAS = (
+        "PRAGMA foreign_keys = ON;",
+        "PRAGMA journal_mode=WAL;",
+        "PRAGMA synchronous=NORMAL;",
+        "PRAGMA busy_timeout=5000;",
+    )
+
+    # Read-only connections: mode=ro at open time, plus query_only as a backstop
+    READ_ONLY_PRAGMAS = (
+        "PRAGMA query_only = ON;",
+        "PRAGMA busy_timeout=5000;",
+    )
+
+    def __init__(self, db_name, max_connections=8, timeout=15.0, cached_statements=128, read_only=False):
+        self.db_name = db_name
+        self.read_only = read_only
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cached_statements = max(cached_statements, len(QUERIES))
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._owners = {}  # connection -> owning thread
+        self._idle = []
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.reclaimed = 0
+
+    def _open(self):
+        """Open and configure a new connection"""
+        if self.read_only:
+            conn = sqlite3.connect(Path(self.db_name).absolute().as_uri() + "?mode=ro", uri=True,
+                                   timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=self.timeout,
+                                   isolation_level=None, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.READ_ONLY_PRAGMAS if self.read_only else self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _reclaim_dead(self):
+        """Move connections owned by finished threads to the idle list"""
+        for conn, owner in list(self._owners.items()):
+            if owner is not None and not owner.is_alive():
+                self._owners[conn] = None
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+                self.reclaimed += 1
+
+    def current(self):
+        """Return the calling thread's connection if it holds one, else None"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+        return None
+
+    def acquire(self):
+        """Return the calling thread's connection, opening one if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            self.hits += 1
+            return conn
+
+        thread = threading.current_thread()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if not self._idle and len(self._owners) >= self.max_connections:
+                    self._reclaim_dead()
+                if self._idle:
+                    conn = self._idle.pop()
+                    self.hits += 1
+                    break
+                if len(self._owners) < self.max_connections:
+                    conn = self._open()
+                    self.misses += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        "Timed out waiting for a pooled connection")
+                self.waits += 1
+                # Owners may exit without calling release(), so re-check periodically
+                self._cond.wait(min(remaining, 0.05))
+            self._owners[conn] = thread
+            self._local.conn = conn
+            self._local.generation = self._generation
+        return conn
+
+    def release(self):
+        """Give the calling thread's connection back to the pool"""
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._cond:
+            if self._owners.get(conn, False) is False:
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            self._owners[conn] = None
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._cond:
+            for conn in self._owners:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._owners.clear()
+            self._idle.clear()
+            self._generation += 1
+            self._cond.notify_all()
+        self._local = threading.local()
+
+    def stats(self):
+        """Return pool usage counters"""
+        with self._cond:
+            in_use = sum(1 for owner in self._owners.values() if owner is not None)
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'reclaimed': self.reclaimed,
+                'open': len(self._owners),
+                'in_use': in_use,
+                'max_connections': self.max_connections,
+            }
 
 
 class Database:
-    def __init__(self, db_name="attendify.db"):
+    def __init__(self, db_name="attendify.db", max_connections=8, statement_cache_size=128,
+                 cache_size=1024, cache_ttl=300.0, password_iterations=passwords.DEFAULT_ITERATIONS,
+                 read_connections=None):
         self.db_name = db_name
+        # PBKDF2 work factor for new hashes; see bench_auth.py to calibrate it
+        self.password_iterations = password_iterations
+        self.pool = ConnectionPool(db_name, max_connections=max_connections,
+                                   cached_statements=statement_cache_size)
+        self.query_stats = QueryStats()
+        self.concurrency = ConcurrencyStats()
+        # Read results per (query, user, args); cache_size=0 turns it off
+        self.cache = QueryCache(max_entries=cache_size, ttl=cache_ttl)
+        # Bumped by every write so views can tell whether their data is stale
+        self.versions = {'users': 0, 'classes': 0, 'attendance': 0, 'settings': 0, 'sessions': 0}
+        self._versions_lock = threading.Lock()
         self.create_tables()
+        # Reads go to their own read-only connections (None = as many as writers,
+        # 0 = share the write connections). In-memory databases can't be reopened.
+        if read_connections is None:
+            read_connections = max_connections
+        self.readers = None
+        if read_connections and db_name != ":memory:":
+            self.readers = ConnectionPool(db_name, max_connections=read_connections,
+                                          cached_statements=statement_cache_size, read_only=True)
 
     def close(self):
-        """Provided for API symmetry; connections are short-lived per call."""
-        try:
-            # No persistent connection to close; method exists for callers to use safely
-            pass
-        except Exception:
-            pass
+        """Close all pooled connections"""
+        self.pool.close()
+        if self.readers is not None:
+            self.readers.close()
 
     def get_connection(self):
-        """Get database connection configured for concurrency and short transactions."""
-        conn = sqlite3.connect(
-            self.db_name, timeout=15.0, isolation_level=None)
-        conn.row_factory = sqlite3.Row
-        # Improve concurrency and durability; apply per-connection PRAGMAs
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
-        return conn
+        """Get the calling thread's pooled connection"""
+        return self.pool.acquire()
+
+    def read_connection(self):
+        """Get the calling thread's connection for reads.
+
+        Inside a write transaction that is the write connection, so the
+        transaction sees its own changes; otherwise a read-only one.
+        """
+        if self.readers is None:
+            return self.get_connection()
+        conn = self.pool.current()
+        if conn is not None and conn.in_transaction:
+            return conn
+        return self.readers.acquire()
+
+    def release_connection(self):
+        """Return the calling thread's connections to the pools (for worker threads)"""
+        self.pool.release()
+        if self.readers is not None:
+            self.readers.release()
+
+    def pool_stats(self):
+        """Get connection pool hit/miss/wait counters"""
+        stats = self.pool.stats()
+        if self.readers is not None:
+            stats['readers'] = self.readers.stats()
+        return stats
+
+    def concurrency_stats(self):
+        """Get how much reads and writes overlapped"""
+        return self.concurrency.snapshot()
+
+    @contextmanager
+    def snapshot(self):
+        """Run the enclosed reads against one consistent view of the database.
+
+        Writers carry on meanwhile; their commits become visible after the
+        block ends. Nested use joins the outer snapshot.
+        """
+        conn = self.read_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            # A deferred transaction only takes its snapshot at the first read
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+            self.concurrency.begin('read')
+            try:
+                yield conn
+            finally:
+                self.concurrency.end('read')
+        finally:
+            conn.execute("COMMIT")
+
+    def mark_changed(self, *tables, user_id=None):
+        """Record that a write touched these tables (for one user, or unknown)"""
+        with self._versions_lock:
+            for table in tables:
+                self.versions[table] = self.versions.get(table, 0) + 1
+        self.cache.invalidate(tables, user_id)
+
+    def cached(self, name, user_id, args, tables, loader):
+        """Serve a read through the cache; the result is a copy callers may modify"""
+        if self._in_transaction():
+            # Uncommitted writes or an old snapshot must not end up in the cache
+            return loader()
+        return copy_result(self.cache.get_or_load(name, user_id, args, tables, loader))
+
+    def _in_transaction(self):
+        for pool in (self.pool, self.readers):
+            conn = pool.current() if pool is not None else None
+            if conn is not None and conn.in_transaction:
+                return True
+        return False
+
+    def cache_stats(self):
+        """Get read cache hit rate and eviction counters"""
+        return self.cache.stats()
+
+    def get_version(self, *tables):
+        """Get the data version of some tables; changes whenever they are written"""
+        with self._versions_lock:
+            return tuple(self.versions.get(table, 0) for table in tables)
+
+    @contextmanager
+    def _span(self, kind, conn):
+        # Statements inside a transaction or snapshot are covered by its span
+        if conn.in_transaction:
+            yield
+            return
+        self.concurrency.begin(kind)
+        try:
+            yield
+        finally:
+            self.concurrency.end(kind)
+
+    def execute(self, name, params=(), conn=None):
+        """Run a registered write statement and return its cursor"""
+        conn = conn or self.get_connection()
+        with self._span('write', conn):
+            start = time.perf_counter()
+            cursor = conn.execute(QUERIES[name], params)
+        self.query_stats.record(name, time.perf_counter() - start, max(cursor.rowcount, 0))
+        return cursor
+
+    def execute_many(self, name, seq_of_params, conn=None):
+        """Run a registered write statement once per parameter tuple"""
+        conn = conn or self.get_connection()
+        with self._span('write', conn):
+            start = time.perf_counter()
+            cursor = conn.executemany(QUERIES[name], seq_of_params)
+        self.query_stats.record(name, time.perf_counter() - start, max(cursor.rowcount, 0))
+        return cursor
+
+    def fetch_all(self, name, params=(), conn=None):
+        """Run a registered query and return all rows"""
+        conn = conn or self.read_connection()
+        with self._span('read', conn):
+            start = time.perf_counter()
+            rows = conn.execute(QUERIES[name], params).fetchall()
+        self.query_stats.record(name, time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetch_one(self, name, params=(), conn=None):
+        """Run a registered query and return its first row"""
+        conn = conn or self.read_connection()
+        with self._span('read', conn):
+            start = time.perf_counter()
+            row = conn.execute(QUERIES[name], params).fetchone()
+        self.query_stats.record(name, time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    def get_query_stats(self):
+        """Get per-query call counts, latency percentiles and rows returned"""
+        return self.query_stats.snapshot()
 
     def create_tables(self):
-        """Create all necessary tables"""
+        """Create all necessary tables by bringing the schema up to date"""
+        self.migrate()
+
+    def schema_version(self):
+        """Get the schema version stored in PRAGMA user_version"""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self, target=None):
+        """Apply pending schema migrations in order, one transaction each"""
+        if target is None:
+            target = MIGRATIONS[-1][0]
         conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Classes table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS classes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                subject_name TEXT NOT NULL,
-                day_of_week TEXT NOT NULL,
-                time_slot TEXT NOT NULL,
-                professor TEXT,
-                room_number TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
-
-        # Attendance table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                status TEXT NOT NULL,
-                FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                UNIQUE(class_id, date)
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
+        applied = []
+        for version, description, step in MIGRATIONS:
+            if version > target:
+                break
+            with self.transaction():
+                # Re-read inside the write lock in case another process migrated first
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+            applied.append((version, description))
+        return applied
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements in a single write transaction.
+
+        Nested use joins the outer transaction, so helpers can be composed.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self.concurrency.begin('write')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self.concurrency.end('write')
+
+    def prune_attendance_changes(self, upto=None):
+        """Drop attendance change log entries up to a seq (default: all); returns how many"""
+        if upto is None:
+            upto = (1 << 63) - 1
+        return self.execute('prune_attendance_changes', (upto,)).rowcount
+
+    def rebuild_summary(self):
+        """Recompute the attendance_summary counters from scratch"""
+        with self.transaction() as conn:
+            _rebuild_attendance_summary(conn)
+        self.mark_changed('attendance')
+        return True
+
+    def verify_summary(self):
+        """Get summary rows whose counters drifted from the attendance history"""
+        rows = self.read_connection().execute(SUMMARY_VERIFY_SQL).fetchall()
+        return [dict(row) for row in rows]
+
+    def reconcile_summary(self):
+        """Rebuild the summary if it drifted; returns the drifted rows found"""
+        drift = self.verify_summary()
+        if drift:
+            self.rebuild_summary()
+        return drift
+
+    def explain_query_plans(self):
+        """Get the EXPLAIN QUERY PLAN details of every registered query"""
+        conn = self.get_connection()
+        plans = {}
+        for name, sql in QUERIES.items():
+            params = (None,) * sql.count('?')
+            rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            plans[name] = [row['detail'] for row in rows]
+        return plans
+
+    def check_query_plans(self):
+        """Fail if any registered query falls back to a full table scan"""
+        plans = self.explain_query_plans()
+        offenders = {name: [d for d in details if is_full_scan(d, derived_tables(details))]
+                     for name, details in plans.items()}
+        offenders = {name: details for name, details in offenders.items() if details}
+        if offenders:
+            lines = [f"{name}: {'; '.join(details)}" for name, details in sorted(offenders.items())]
+            raise RuntimeError("Full table scans in registered queries:\n" + "\n".join(lines))
+        return plans
 
     def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password using salted PBKDF2-SHA256"""
+        return passwords.hash_password(password, self.password_iterations)
 
-    def create_user(self, username, password):
-        """Create a new user"""
+    def create_user(self, username, password, user_id=None):
+        """Create a new user; ``user_id`` fixes the id (sharding allocates ids globally)"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
             password_hash = self.hash_password(password)
-            cursor.execute(
-                "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-                (username, password_hash)
-            )
-            conn.commit()
-            user_id = cursor.lastrowid
-            conn.close()
-            return True, user_id
+            if user_id is None:
+                cursor = self.execute('create_user', (username, password_hash))
+            else:
+                cursor = self.execute('create_user_with_id', (user_id, username, password_hash))
+            self.mark_changed('users', user_id=cursor.lastrowid)
+            return True, cursor.lastrowid
         except sqlite3.IntegrityError:
             return False, "Username already exists"
 
+    def get_user_id(self, username):
+        """Get the id of a username, or None"""
+        row = self.fetch_one('user_by_name', (username,))
+        return row['id'] if row else None
+
     def authenticate_user(self, username, password):
-        """Authenticate user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        password_hash = self.hash_password(password)
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ? AND password_hash = ?",
-            (username, password_hash)
-        )
-        user = cursor.fetchone()
-        conn.close()
+        """Authenticate user, upgrading legacy or outdated password hashes"""
+        user = self.fetch_one('user_credentials', (username,))
+        if user is None:
+            passwords.dummy_verify(password, self.password_iterations)
+            return False, None
 
-        if user:
-            return True, user['id']
-        return False, None
+        matches, needs_rehash = passwords.verify_password(password, user['password_hash'],
+                                                          self.password_iterations)
+        if not matches:
+            return False, None
+        if needs_rehash:
+            self.execute('update_password_hash', (self.hash_password(password), user['id']))
+        return True, user['id']
 
     def add_class(self, user_id, subject_name, day_of_week, time_slot, professor="", room_number=""):
-        """Add a new class to timetable"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO classes (user_id, subject_name, day_of_week, time_slot, professor, room_number)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (user_id, subject_name, day_of_week, time_slot, professor, room_number)
-        )
-        conn.commit()
-        conn.close()
-        return True
+        """Add a new class to timetable; returns (True, class_id) or (False, message)"""
+        try:
+            start, end = parse_time_slot(time_slot)
+        except ValueError as e:
+            return False, str(e)
+
+        with self.transaction() as conn:
+            clashes = self.find_clashes(user_id, day_of_week, start, end, conn)
+            if clashes:
+                other = clashes[0]
+                return False, f"Clashes with {other['subject_name']} ({other['time_slot']}) on {day_of_week}"
+            today = date.today()
+            cursor = self.execute('add_class', (user_id, subject_name, day_of_week, time_slot,
+                                                professor, room_number, start, end, today.isoformat()),
+                                  conn)
+            # Keep the calendar complete up to the horizon already materialized
+            horizon = self.fetch_one('session_horizon', (user_id,), conn)
+            if horizon:
+                until = date.fromisoformat(horizon['materialized_until'])
+                self.execute_many('add_session', [(cursor.lastrowid, user_id, day.isoformat())
+                                                  for day in weekly_dates(day_of_week, today, until)], conn)
+        self.mark_changed('classes', 'sessions', user_id=user_id)
+        return True, cursor.lastrowid
+
+    def find_clashes(self, user_id, day_of_week, start_minute, end_minute, conn=None):
+        """Get a user's classes on a day that overlap [start_minute, end_minute)"""
+        rows = self.fetch_all('class_clashes', (user_id, day_of_week, end_minute, start_minute), conn)
+        return [dict(row) for row in rows]
+
+    def get_current_class(self, user_id, now=None):
+        """Get the class in progress right now, or None"""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        row = self.fetch_one('current_class', (user_id, now.strftime("%A"), minute, minute))
+        return dict(row, date=now.date().isoformat()) if row else None
+
+    def get_next_class(self, user_id, now=None):
+        """Get the next class to start after now, looking up to a week ahead, or None"""
+        now = now or datetime.now()
+        after = now.hour * 60 + now.minute
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            row = self.fetch_one('next_class', (user_id, day.strftime("%A"), after))
+            if row:
+                return dict(row, date=day.isoformat())
+            after = -1
+        return None
 
     def get_user_classes(self, user_id):
         """Get all classes for a user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT * FROM classes WHERE user_id = ? 
-               ORDER BY CASE day_of_week
-                   WHEN 'Monday' THEN 1
-                   WHEN 'Tuesday' THEN 2
-                   WHEN 'Wednesday' THEN 3
-                   WHEN 'Thursday' THEN 4
-                   WHEN 'Friday' THEN 5
-                   WHEN 'Saturday' THEN 6
-                   WHEN 'Sunday' THEN 7
-               END, time_slot""",
-            (user_id,)
-        )
-        classes = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in classes]
+        return self.cached('user_classes', user_id, (), ('classes',),
+                           lambda: [dict(row) for row in self.fetch_all('user_classes', (user_id,))])
 
     def get_today_classes(self, user_id):
         """Get classes for today"""
         today = datetime.now().strftime("%A")
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM classes WHERE user_id = ? AND day_of_week = ? ORDER BY time_slot",
-            (user_id, today)
-        )
-        classes = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in classes]
+        return self.cached('today_classes', user_id, (today,), ('classes',),
+                           lambda: [dict(row) for row in self.fetch_all('today_classes', (user_id, today))])
+
+    def get_class_owner(self, class_id):
+        """Get the id of the user a class belongs to, or None if it doesn't exist"""
+        row = self.fetch_one('class_owner', (class_id,))
+        return row['user_id'] if row else None
 
     def delete_class(self, class_id):
         """Delete a class and its attendance records"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM classes WHERE id = ?", (class_id,))
-        conn.commit()
-        conn.close()
+        owner = self.get_class_owner(class_id)
+        self.execute('delete_class', (class_id,))
+        # An unknown owner (class already gone) still invalidates conservatively
+        self.mark_changed('classes', 'attendance', 'sessions', user_id=owner)
         return True
 
     def mark_attendance(self, class_id, user_id, status, date_str=None):
-        """Mark attendance for a class"""
+        """Mark attendance for a class; returns False if the row is rejected.
+
+        Lock timeouts and other operational errors propagate instead of
+        looking like a rejected mark; see write_queue.py for many writers.
+        """
         if date_str is None:
             date_str = date.today().isoformat()
 
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                """INSERT OR REPLACE INTO attendance (class_id, user_id, date, status)
-                   VALUES (?, ?, ?, ?)""",
-                (class_id, user_id, date_str, status)
-            )
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            conn.close()
+            self.execute('mark_attendance', (class_id, user_id, date_str, status))
+        except sqlite3.IntegrityError:
             return False
+        self.mark_changed('attendance', user_id=user_id)
+        return True
+
+    def mark_attendance_many(self, user_id, records):
+        """Mark attendance for many (class_id, date, status) rows in one transaction.
+
+        Returns one outcome dict per input row, in order; rows that fail
+        validation are reported and skipped while the rest are written.
+        """
+        outcomes = []
+        valid = []
+        with self.transaction() as conn:
+            owned = {row['id'] for row in self.fetch_all('user_class_ids', (user_id,), conn)}
+            for class_id, date_str, status in records:
+                if date_str is None:
+                    date_str = date.today().isoformat()
+                error = None
+                if status not in ATTENDANCE_STATUSES:
+                    error = f"Invalid status: {status!r}"
+                elif class_id not in owned:
+                    error = f"Unknown class: {class_id!r}"
+                else:
+                    try:
+                        date.fromisoformat(date_str)
+                    except (TypeError, ValueError):
+                        error = f"Invalid date: {date_str!r}"
+                outcomes.append({
+                    'class_id': class_id,
+                    'date': date_str,
+                    'status': status,
+                    'ok': error is None,
+                    'error': error
+                })
+                if error is None:
+                    valid.append((class_id, user_id, date_str, status))
+
+            if valid:
+                self.execute_many('mark_attendance', valid, conn)
+        if valid:
+            self.mark_changed('attendance', user_id=user_id)
+        return outcomes
 
     def get_attendance_for_date(self, user_id, date_str=None):
         """Get attendance records for a specific date"""
         if date_str is None:
             date_str = date.today().isoformat()
 
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT a.*, c.subject_name FROM attendance a
-               JOIN classes c ON a.class_id = c.id
-               WHERE a.user_id = ? AND a.date = ?""",
-            (user_id, date_str)
-        )
-        records = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in records]
+        return self.cached('attendance_for_date', user_id, (date_str,), ('classes', 'attendance'),
+                           lambda: [dict(row) for row in
+                                    self.fetch_all('attendance_for_date', (user_id, date_str))])
 
     def get_overall_statistics(self, user_id):
         """Get overall attendance statistics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present
-               FROM attendance WHERE user_id = ?""",
-            (user_id,)
-        )
-        stats = cursor.fetchone()
-        conn.close()
+        return self.cached('overall_stats', user_id, (), ('attendance',),
+                           lambda: self._load_overall_statistics(user_id))
+
+    def _load_overall_statistics(self, user_id):
+        stats = self.fetch_one('overall_stats', (user_id,))
 
         total = stats['total'] if stats['total'] else 0
         present = stats['present'] if stats['present'] else 0
@@ -232,24 +1271,11 @@ class Database:
 
     def get_subject_statistics(self, user_id):
         """Get attendance statistics per subject"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self.cached('subject_stats', user_id, (), ('classes', 'attendance'),
+                           lambda: self._load_subject_statistics(user_id))
 
-        cursor.execute(
-            """SELECT 
-                c.subject_name,
-                COUNT(a.id) as total,
-                SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) as present
-               FROM classes c
-               LEFT JOIN attendance a ON c.id = a.class_id
-               WHERE c.user_id = ?
-               GROUP BY c.subject_name
-               HAVING total > 0
-               ORDER BY c.subject_name""",
-            (user_id,)
-        )
-        results = cursor.fetchall()
-        conn.close()
+    def _load_subject_statistics(self, user_id):
+        results = self.fetch_all('subject_stats', (user_id,))
 
         stats = []
         for row in results:
@@ -266,3 +1292,133 @@ class Database:
             })
 
         return stats
+
+    def get_attendance_trend(self, user_id, start_date=None, end_date=None, period="week"):
+        """Get attendance per week or month between two dates (inclusive).
+
+        Each point has the period start date, that period's counts and
+        percentage, and the running percentage since ``start_date``.
+        Defaults to the last 12 weeks.
+        """
+        if period not in TREND_PERIODS:
+            raise ValueError(f"period must be one of {TREND_PERIODS}, got {period!r}")
+        end_date = _iso(end_date or date.today())
+        start_date = _iso(start_date or date.fromisoformat(end_date) - timedelta(weeks=12))
+        name = 'attendance_trend_' + period
+        return self.cached(name, user_id, (start_date, end_date), ('attendance',),
+                           lambda: [{
+                               'period': row['period'],
+                               'total': row['total'],
+                               'present': row['present'],
+                               'absent': row['total'] - row['present'],
+                               'percentage': percentage(row['present'], row['total']),
+                               'cumulative_percentage': percentage(row['cumulative_present'],
+                                                                   row['cumulative_total'])
+                           } for row in self.fetch_all(name, (user_id, start_date, end_date))])
+
+    def get_rolling_attendance(self, user_id, start_date=None, end_date=None, window_days=30):
+        """Get each subject's attendance over a rolling window of days.
+
+        Returns {subject: [points]} with one point per day that subject
+        had records in the range; each point's window covers that day and
+        the ``window_days - 1`` days before it, including days before
+        ``start_date``. Defaults to the last 90 days.
+        """
+        if window_days < 1:
+            raise ValueError("window_days must be at least 1")
+        end_date = _iso(end_date or date.today())
+        start_date = _iso(start_date or date.fromisoformat(end_date) - timedelta(days=90))
+        return self.cached('rolling_attendance', user_id, (start_date, end_date, window_days),
+                           ('classes', 'attendance'),
+                           lambda: self._load_rolling_attendance(user_id, start_date, end_date, window_days))
+
+    def _load_rolling_attendance(self, user_id, start_date, end_date, window_days):
+        lookback = window_days - 1
+        rows = self.fetch_all('rolling_attendance',
+                              (user_id, start_date, lookback, end_date, lookback, start_date))
+        series = {}
+        for row in rows:
+            series.setdefault(row['subject'], []).append({
+                'date': row['date'],
+                'total': row['total'],
+                'present': row['present'],
+                'window_total': row['window_total'],
+                'window_present': row['window_present'],
+                'percentage': percentage(row['window_present'], row['window_total'])
+            })
+        return series
+
+    def get_settings(self, user_id):
+        """Get a user's settings, with defaults for anything never set"""
+        return self.cached('user_settings', user_id, (), ('settings',),
+                           lambda: self._load_settings(user_id))
+
+    def _load_settings(self, user_id):
+        settings = dict(DEFAULT_SETTINGS)
+        for row in self.fetch_all('user_settings', (user_id,)):
+            default = DEFAULT_SETTINGS.get(row['key'])
+            value = row['value']
+            if value is None:
+                continue
+            settings[row['key']] = float(value) if isinstance(default, float) else value
+        return settings
+
+    def set_settings(self, user_id, **settings):
+        """Store settings (None clears a value back to unset); unknown keys raise ValueError"""
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        rows = [(user_id, key, None if value is None else str(value)) for key, value in settings.items()]
+        with self.transaction() as conn:
+            self.execute_many('set_user_setting', rows, conn)
+        self.mark_changed('settings', user_id=user_id)
+        return True
+
+    def ensure_sessions(self, user_id, until=None):
+        """Materialize a user's class sessions up to ``until`` (default today).
+
+        Only dates past the stored horizon are generated, each class from
+        the day it was created. Returns the number of sessions added.
+        """
+        until = date.fromisoformat(_iso(until or date.today()))
+        horizon = self.fetch_one('session_horizon', (user_id,))
+        if horizon and horizon['materialized_until'] >= until.isoformat():
+            return 0
+
+        with self.transaction() as conn:
+            # Re-read under the write lock in case another thread got here first
+            horizon = self.fetch_one('session_horizon', (user_id,), conn)
+            after = date.fromisoformat(horizon['materialized_until']) if horizon else None
+            if after and after >= until:
+                return 0
+            rows = []
+            for cls in self.fetch_all('class_schedule', (user_id,), conn):
+                first = date.fromisoformat(cls['created_on'])
+                if after and after >= first:
+                    first = after + timedelta(days=1)
+                rows.extend((cls['id'], user_id, day.isoformat())
+                            for day in weekly_dates(cls['day_of_week'], first, until))
+            added = self.execute_many('add_session', rows, conn).rowcount if rows else 0
+            self.execute('set_session_horizon', (user_id, until.isoformat()), conn)
+        self.mark_changed('sessions', user_id=user_id)
+        return max(added, 0)
+
+    def reset_sessions(self, user_id):
+        """Forget a user's horizon so the next ensure_sessions fills any gaps"""
+        self.execute('reset_session_horizon', (user_id,))
+
+    def get_unmarked_sessions(self, user_id, before=None, limit=None):
+        """Get sessions before a date (default today) with no attendance, oldest first"""
+        before = _iso(before or date.today())
+        limit = -1 if limit is None else limit
+        return self.cached('unmarked_sessions', user_id, (before, limit),
+                           ('classes', 'attendance', 'sessions'),
+                           lambda: [dict(row) for row in
+                                    self.fetch_all('unmarked_sessions', (user_id, before, limit))])
+
+    def count_unmarked_sessions(self, user_id, before=None):
+        """Count sessions before a date (default today) with no attendance"""
+        before = _iso(before or date.today())
+        return self.cached('unmarked_session_count', user_id, (before,),
+                           ('classes', 'attendance', 'sessions'),
+                           lambda: self.fetch_one('unmarked_session_count', (user_id, before))['count'])
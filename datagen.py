@@ -0,0 +1,120 @@
+"""Synthetic Attendify datasets.
+
+Generates users, weekly timetables and a semester of attendance history
+through the normal Database write paths. The same seed always produces
+the same dataset, so benchmark runs on different versions compare like
+with like.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from database import Database, DAYS
+
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Biology", "Computer Science",
+            "English", "History", "Economics", "Statistics", "Philosophy",
+            "Data Structures", "Operating Systems", "Databases", "Networks",
+            "Linear Algebra", "Electronics", "Psychology", "Sociology"]
+PROFESSORS = ["Dr. Smith", "Dr. Johnson", "Prof. Lee", "Dr. Garcia", "Prof. Patel",
+              "Dr. Brown", "Prof. Kim", "Dr. Nguyen", "Prof. Rossi", "Dr. Müller"]
+TEACHING_DAYS = DAYS[:5]
+FIRST_HOUR = 8
+LAST_HOUR = 17
+
+# Every generated user shares this password; it is hashed once per dataset.
+PASSWORD = "password"
+DEFAULT_START = date(2026, 1, 5)
+
+
+def username_for(index):
+    """Deterministic username of the index-th generated user"""
+    return f"user{index:06d}"
+
+
+def make_timetable(rng, min_subjects=4, max_subjects=8, max_sessions=3):
+    """Random weekly timetable for one user, without clashing slots"""
+    free = [(day, hour) for day in TEACHING_DAYS for hour in range(FIRST_HOUR, LAST_HOUR)]
+    rng.shuffle(free)
+    classes = []
+    for subject in rng.sample(SUBJECTS, rng.randint(min_subjects, max_subjects)):
+        professor = rng.choice(PROFESSORS)
+        room = f"{rng.choice('ABCDE')}-{rng.randint(100, 499)}"
+        for _ in range(rng.randint(1, max_sessions)):
+            if not free:
+                return classes
+            day, hour = free.pop()
+            classes.append((subject, day, f"{hour:02d}:00 - {hour + 1:02d}:00", professor, room,
+                            hour * 60, hour * 60 + 60))
+    return classes
+
+
+def class_dates(day_of_week, start, weeks):
+    """Dates a weekly class meets during the semester"""
+    first = start + timedelta(days=(DAYS.index(day_of_week) - start.weekday()) % 7)
+    return [first + timedelta(weeks=week) for week in range(weeks)]
+
+
+def generate(db, users=100, weeks=16, start=DEFAULT_START, seed=0,
+             unmarked_rate=0.05, first_user=0, progress=None):
+    """Fill a database with a reproducible dataset; returns row counts and timings.
+
+    Each user gets an attendance propensity between 55% and 98%, so
+    per-user statistics spread across the colour bands the UI uses.
+    """
+    rng = random.Random(seed)
+    password_hash = db.hash_password(PASSWORD)
+    counts = {'users': 0, 'classes': 0, 'attendance': 0}
+    began = time.perf_counter()
+
+    for index in range(first_user, first_user + users):
+        with db.transaction() as conn:
+            user_id = db.execute('create_user', (username_for(index), password_hash), conn).lastrowid
+            propensity = rng.uniform(0.55, 0.98)
+            rows = []
+            for subject, day, slot, professor, room, start_minute, end_minute in make_timetable(rng):
+                class_id = db.execute('add_class', (user_id, subject, day, slot, professor, room,
+                                                    start_minute, end_minute, start.isoformat()),
+                                      conn).lastrowid
+                counts['classes'] += 1
+                for when in class_dates(day, start, weeks):
+                    if rng.random() < unmarked_rate:
+                        continue
+                    status = "Present" if rng.random() < propensity else "Absent"
+                    rows.append((class_id, user_id, when.isoformat(), status))
+            db.execute_many('mark_attendance', rows, conn)
+        counts['users'] += 1
+        counts['attendance'] += len(rows)
+        if progress and counts['users'] % 1000 == 0:
+            progress(dict(counts))
+
+    db.mark_changed('users', 'classes', 'attendance')
+    counts['seconds'] = round(time.perf_counter() - began, 3)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Attendify database")
+    parser.add_argument("database", help="SQLite file to create or extend")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=16, help="semester length")
+    parser.add_argument("--start", type=date.fromisoformat, default=DEFAULT_START,
+                        help="first day of the semester (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first-user", type=int, default=0,
+                        help="index of the first generated username, to extend a dataset")
+    args = parser.parse_args()
+
+    db = Database(args.database)
+    try:
+        counts = generate(db, users=args.users, weeks=args.weeks, start=args.start,
+                          seed=args.seed, first_user=args.first_user,
+                          progress=lambda c: print(f"{c['users']} users, {c['attendance']} attendance rows"))
+    finally:
+        db.close()
+    print(f"Generated {counts['users']} users, {counts['classes']} classes and "
+          f"{counts['attendance']} attendance rows in {counts['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
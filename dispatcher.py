@@ -0,0 +1,154 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Request:
+    """One dispatched call and the callbacks waiting for it"""
+
+    def __init__(self, key, group, owner, on_success, on_error):
+        self.key = key
+        self.group = group
+        self.owner = owner
+        self.on_success = on_success
+        self.on_error = on_error
+        self.future = None
+        self.started = False
+        self.cancelled = False
+
+
+class QueryDispatcher:
+    """Runs blocking database calls on worker threads, off the Tk event loop.
+
+    Results are handed back through a queue that the Tk thread drains with
+    ``after()``, so callbacks always run on the UI thread. Requests carry an
+    optional ``key`` (duplicate refreshes of the same thing) and ``group``
+    (usually the page that asked, so it can be cancelled on navigation).
+    Writes should run even if the user moves on, so they take no group;
+    an ``owner`` widget instead drops their callbacks once it is destroyed.
+    """
+
+    def __init__(self, root, max_workers=2, poll_interval=15):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="attendify-db")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._by_key = {}
+        self._polling = False
+        self._closed = False
+
+    def submit(self, fn, *args, key=None, group=None, owner=None, on_success=None, on_error=None,
+               **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background.
+
+        If a request with the same ``key`` is still queued, it is reused and
+        only the newest callbacks fire. If it is already running it may have
+        read stale data, so it is superseded: its result is dropped and the
+        call is queued again.
+        """
+        if self._closed:
+            return None
+        with self._lock:
+            existing = self._by_key.get(key) if key is not None else None
+            if existing is not None and not existing.cancelled:
+                if not existing.started:
+                    existing.on_success = on_success
+                    existing.on_error = on_error
+                    existing.group = group
+                    existing.owner = owner
+                    return existing
+                existing.cancelled = True
+
+            request = _Request(key, group, owner, on_success, on_error)
+            self._pending.add(request)
+            if key is not None:
+                self._by_key[key] = request
+        request.future = self._executor.submit(self._run, request, fn, args, kwargs)
+        self._schedule_poll()
+        return request
+
+    def _run(self, request, fn, args, kwargs):
+        """Worker-thread body: run the call and queue its outcome"""
+        with self._lock:
+            if request.cancelled:
+                self._results.put((request, False, None))
+                return
+            request.started = True
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._results.put((request, False, sys.exc_info()))
+        else:
+            self._results.put((request, True, result))
+
+    def _schedule_poll(self):
+        """Make sure the Tk thread is draining results"""
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.root.after(self.poll_interval, self._drain)
+
+    def _drain(self):
+        """Tk-thread side: deliver finished requests to their callbacks"""
+        self._polling = False
+        while True:
+            try:
+                request, ok, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pending.discard(request)
+                if request.key is not None and self._by_key.get(request.key) is request:
+                    del self._by_key[request.key]
+                if request.cancelled:
+                    continue
+            # The page or dialog waiting for this was closed (e.g. by logging out)
+            gone = request.owner is not None and not request.owner.winfo_exists()
+            if ok:
+                if request.on_success and not gone:
+                    request.on_success(payload)
+            elif payload is not None:
+                if request.on_error and not gone:
+                    request.on_error(payload[1])
+                else:
+                    self.root.report_callback_exception(*payload)
+        if self._pending:
+            self._schedule_poll()
+
+    def cancel(self, key):
+        """Cancel the request with this key, if any"""
+        with self._lock:
+            request = self._by_key.get(key)
+            if request is not None:
+                request.cancelled = True
+
+    def cancel_group(self, group):
+        """Cancel every request submitted for a group"""
+        with self._lock:
+            for request in self._pending:
+                if request.group == group:
+                    request.cancelled = True
+
+    def cancel_all(self, keep_group=None):
+        """Cancel every request except those belonging to ``keep_group``"""
+        with self._lock:
+            for request in self._pending:
+                if request.group is not None and request.group != keep_group:
+                    request.cancelled = True
+
+    def is_busy(self, key):
+        """Whether a request with this key is queued or running"""
+        with self._lock:
+            request = self._by_key.get(key)
+            return request is not None and not request.cancelled
+
+    def shutdown(self):
+        """Stop accepting work and drop undelivered results"""
+        self._closed = True
+        with self._lock:
+            for request in self._pending:
+                request.cancelled = True
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,225 @@
+"""Load test for server.py.
+
+Opens ``--clients`` keep-alive connections, signs each in as one of a few
+seeded users and sends a weighted mix of API calls for ``--duration``
+seconds, then reports requests/sec and latency percentiles per endpoint.
+Point it at a running server with ``--url``, or pass ``--spawn`` to start
+one on a throwaway database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from database import DAYS, QueryStats
+
+# Name -> (method, path, body factory); the factory gets the client's state
+SCENARIOS = {
+    'classes': ("GET", "/api/classes", None),
+    'schedule': ("GET", "/api/schedule", None),
+    'statistics': ("GET", "/api/statistics", None),
+    'mark': ("POST", "/api/attendance", lambda state: {
+        'class_id': state.rng.choice(state.class_ids),
+        'date': (date.today() - timedelta(days=state.rng.randrange(120))).isoformat(),
+        'status': state.rng.choice(("Present", "Absent")),
+    }),
+}
+DEFAULT_MIX = "classes:4,schedule:2,statistics:1,mark:3"
+SEED_SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Biology", "History", "Economics"]
+
+
+class Connection:
+    """A minimal keep-alive HTTP/1.1 client for one socket"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.token = None
+
+    async def request(self, method, path, body=None):
+        """Send one request; returns (status, decoded JSON body)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(data)}\r\n"
+        if self.token:
+            head += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + data)
+
+        status_line, _, rest = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").partition("\r\n")
+        headers = {}
+        for line in rest.split("\r\n"):
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return int(status_line.split(" ")[1]), json.loads(payload) if payload else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class ClientState:
+    """Per-client random stream and the class ids it may mark"""
+
+    def __init__(self, seed, class_ids):
+        self.rng = random.Random(seed)
+        self.class_ids = class_ids
+
+
+def parse_mix(text):
+    """Parse "name:weight,..." into parallel name and weight lists"""
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+async def seed_user(host, port, username, password, classes):
+    """Create (or reuse) a user with a small timetable; returns its class ids"""
+    conn = Connection(host, port)
+    try:
+        status, payload = await conn.request("POST", "/api/users", {'username': username, 'password': password})
+        if status not in (201, 409):
+            raise RuntimeError(f"signup failed: {status} {payload}")
+        status, payload = await conn.request("POST", "/api/login", {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f"login failed: {status} {payload}")
+        conn.token = payload['token']
+        for index in range(classes):
+            await conn.request("POST", "/api/classes", {
+                'subject_name': SEED_SUBJECTS[index % len(SEED_SUBJECTS)],
+                'day_of_week': DAYS[index % 5],
+                'time_slot': f"{9 + index // 5:02d}:00 - {10 + index // 5:02d}:00",
+            })
+        status, payload = await conn.request("GET", "/api/classes")
+        return [cls['id'] for cls in payload]
+    finally:
+        await conn.close()
+
+
+async def run_client(host, port, username, password, class_ids, names, weights, deadline, seed, results):
+    """Sign in, then send requests back to back on one connection until the deadline"""
+    conn = Connection(host, port)
+    state = ClientState(seed, class_ids)
+    try:
+        _, payload = await conn.request("POST", "/api/login", {'username': username, 'password': password})
+        conn.token = payload['token']
+        while time.perf_counter() < deadline:
+            name = state.rng.choices(names, weights)[0]
+            method, path, make_body = SCENARIOS[name]
+            body = make_body(state) if make_body else None
+            start = time.perf_counter()
+            status, _ = await conn.request(method, path, body)
+            results.setdefault(name, []).append((time.perf_counter() - start, status))
+    finally:
+        await conn.close()
+
+
+def report(results, wall):
+    """Requests/sec and latency percentiles, per scenario and overall"""
+    rows = {}
+    everything = []
+    for name, samples in list(results.items()) + [("all", None)]:
+        if samples is None:
+            samples = everything
+        else:
+            everything.extend(samples)
+        latencies = sorted(elapsed for elapsed, _ in samples)
+        rows[name] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status >= 400),
+            'requests_per_sec': round(len(samples) / wall, 1),
+            'p50_ms': round(QueryStats._percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(QueryStats._percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(QueryStats._percentile(latencies, 0.99) * 1000, 3),
+        }
+    return rows
+
+
+async def load_test(host, port, clients, users, duration, mix, seed, password="loadtest-password"):
+    names, weights = parse_mix(mix)
+    timetables = []
+    for index in range(users):
+        timetables.append(await seed_user(host, port, f"loadtest{index:03d}", password, classes=8))
+
+    results = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, f"loadtest{i % users:03d}", password, timetables[i % users],
+                                      names, weights, start + duration, seed + i, results)
+                           for i in range(clients)))
+    return report(results, time.perf_counter() - start)
+
+
+def spawn_server(workdir, workers):
+    """Start server.py on a fresh database and a free port; returns (process, host, port)"""
+    process = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                                "--db", os.path.join(workdir, "loadtest.db"), "--port", "0",
+                                "--workers", str(workers), "--password-iterations", "1000"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError("server did not start")
+    address = urlsplit(line.split()[-1])
+    return process, address.hostname, address.port
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test an Attendify API server")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start server.py on a throwaway database instead of using --url")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads for --spawn")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--users", type=int, default=4, help="distinct accounts the clients share")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted scenarios, name:weight,...")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        if args.spawn:
+            process, host, port = spawn_server(workdir, args.workers)
+        else:
+            address = urlsplit(args.url)
+            host, port = address.hostname, address.port or 80
+        try:
+            rows = asyncio.run(load_test(host, port, args.clients, args.users, args.duration,
+                                         args.mix, args.seed))
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    for name, row in rows.items():
+        print(f"{name:<12} {row['requests']:>8} req  {row['requests_per_sec']:>9.1f} req/s  "
+              f"p50 {row['p50_ms']:>8.3f}  p95 {row['p95_ms']:>8.3f}  p99 {row['p99_ms']:>8.3f} ms  "
+              f"errors {row['errors']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'clients': args.clients, 'users': args.users, 'duration': args.duration,
+                       'mix': args.mix, 'results': rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import hashlib
-from datetime import datetime
+from datetime import datetime, date
 from database import Database
+from services import AttendanceService
+from dispatcher import QueryDispatcher
 from auth import AuthFrame
 from dashboard import DashboardFrame
 from timetable import TimetableFrame
@@ -10,7 +12,14 @@ from statistics import StatisticsFrame
 
 
 class AttendifyPro(tk.Tk):
-    def __init__(self):
+    # Page name -> frame class; frames are built on first visit
+    PAGES = {
+        "dashboard": DashboardFrame,
+        "timetable": TimetableFrame,
+        "statistics": StatisticsFrame
+    }
+
+    def __init__(self, db=None):
         super().__init__()
 
         # Window configuration
@@ -24,8 +33,11 @@ class AttendifyPro(tk.Tk):
         y = (self.winfo_screenheight() // 2) - (750 // 2)
         self.geometry(f"1200x750+{x}+{y}")
 
-        # Initialize database
-        self.db = Database()
+        # Initialize database (benchmarks and scripts may pass their own)
+        self.db = db if db is not None else Database()
+        self.service = AttendanceService(self.db)
+        # Runs database work off the Tk event loop
+        self.dispatcher = QueryDispatcher(self)
         self.current_user = None
         # Ensure DB closes cleanly on window exit
         self.protocol("WM_DELETE_WINDOW", self.on_quit)
@@ -239,26 +251,27 @@ class AttendifyPro(tk.Tk):
 
         self.current_frame = main_frame
 
-        # Initialize page frames
-        self.frames = {
-            "dashboard": DashboardFrame(self.content_frame, self),
-            "timetable": TimetableFrame(self.content_frame, self),
-            "statistics": StatisticsFrame(self.content_frame, self)
-        }
+        # Page frames are created lazily by get_page
+        self.frames = {}
 
         # Show dashboard by default
         self.show_page("dashboard")
 
     def show_page(self, page_name):
         """Switch between pages"""
+        # Drop pending loads for pages that are no longer visible
+        self.dispatcher.cancel_all(keep_group=page_name)
+
         # Hide all frames
         for frame in self.frames.values():
             frame.pack_forget()
 
-        # Show selected frame
-        if page_name in self.frames:
-            self.frames[page_name].pack(fill="both", expand=True)
-            self.frames[page_name].refresh()
+        # Show selected frame, reloading only if its data changed since it was rendered
+        frame = self.get_page(page_name)
+        if frame is not None:
+            frame.pack(fill="both", expand=True)
+            if frame.data_key != self.page_data_key(frame):
+                frame.refresh()
 
         # Update navigation button styles
         for btn, btn_page in self.nav_buttons:
@@ -267,14 +280,26 @@ class AttendifyPro(tk.Tk):
             else:
                 btn.config(bg="#1e293b", fg="#f1f5f9")
 
+    def get_page(self, page_name):
+        """Get a page frame, building it on first use"""
+        if page_name not in self.frames and page_name in self.PAGES:
+            self.frames[page_name] = self.PAGES[page_name](self.content_frame, self)
+        return self.frames.get(page_name)
+
+    def page_data_key(self, frame):
+        """Identify the data a page shows: table versions it reads, plus today's date"""
+        return self.db.get_version(*frame.depends_on), date.today()
+
     def logout(self):
         """Logout and return to auth screen"""
+        self.dispatcher.cancel_all()
         self.current_user = None
         self.frames = {}
         self.show_auth()
 
     def on_quit(self):
         try:
+            self.dispatcher.shutdown()
             self.db.close()
         finally:
             self.destroy()
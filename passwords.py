@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+import os
+
+
+# Stored format: pbkdf2_sha256$<iterations>$<salt>$<hash>, salt and hash in
+# unpadded base64. Raise the work factor as hardware gets faster; rows hashed
+# with a different count are rehashed on their next successful login.
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 200_000
+SALT_BYTES = 16
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    """Hash a password with a fresh random salt"""
+    salt = salt if salt is not None else os.urandom(SALT_BYTES)
+    digest = _pbkdf2(password, salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def is_legacy_hash(stored):
+    """Whether a stored hash is the old unsalted SHA-256 hex digest"""
+    return len(stored) == 64 and all(ch in "0123456789abcdef" for ch in stored)
+
+
+def verify_password(password, stored, iterations=DEFAULT_ITERATIONS):
+    """Check a password against a stored hash; returns (matches, needs_rehash)"""
+    if is_legacy_hash(stored):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        matches = hmac.compare_digest(legacy, stored)
+        return matches, matches
+
+    try:
+        algorithm, rounds, salt, digest = stored.split("$")
+        rounds = int(rounds)
+        salt = _b64decode(salt)
+        digest = _b64decode(digest)
+    except ValueError:
+        return False, False
+    if algorithm != ALGORITHM:
+        return False, False
+
+    matches = hmac.compare_digest(_pbkdf2(password, salt, rounds), digest)
+    return matches, matches and rounds != iterations
+
+
+def dummy_verify(password, iterations=DEFAULT_ITERATIONS):
+    """Spend the same time as a real check, for logins with an unknown username"""
+    _pbkdf2(password, b"\0" * SALT_BYTES, iterations)
+    return False, False
@@ -0,0 +1,79 @@
+"""Attendance projections: how many upcoming classes a user can skip.
+
+Remaining occurrences of each weekly class are counted in closed form from
+the weekday and the date range, and each subject's skip / must-attend
+numbers come from one inequality, so a projection costs one pass over the
+timetable no matter how long the semester is.
+"""
+from datetime import date
+from fractions import Fraction
+
+from database import DAYS
+
+
+def count_weekday(day_of_week, start, end):
+    """Number of dates in [start, end] that fall on a weekday"""
+    if end < start:
+        return 0
+    first = start.toordinal() + (DAYS.index(day_of_week) - start.weekday()) % 7
+    if first > end.toordinal():
+        return 0
+    return (end.toordinal() - first) // 7 + 1
+
+
+def remaining_by_subject(classes, start, end, marked_on_start=()):
+    """Count each subject's classes still to come between start and end (inclusive).
+
+    ``marked_on_start`` holds ids of classes already marked on ``start``;
+    those occurrences have happened and are not counted again.
+    """
+    marked = set(marked_on_start)
+    remaining = {}
+    for cls in classes:
+        count = count_weekday(cls['day_of_week'], start, end)
+        if count and cls['id'] in marked and cls['day_of_week'] == DAYS[start.weekday()]:
+            count -= 1
+        remaining[cls['subject_name']] = remaining.get(cls['subject_name'], 0) + count
+    return remaining
+
+
+def project_subject(present, total, remaining, target_percentage):
+    """Skip / must-attend counts for one subject to finish at or above the target.
+
+    With P present out of T so far and R classes left, attending all but s
+    of them ends at (P + R - s) / (T + R). The largest s that keeps this at
+    or above the target is floor(P + R - target * (T + R)); must_attend is
+    what's left of R. If even attending everything falls short the target
+    is unreachable and every remaining class must be attended.
+    """
+    target = Fraction(str(target_percentage)) / 100
+    final_total = total + remaining
+    slack = present + remaining - target * final_total
+    reachable = slack >= 0
+    can_skip = min(int(slack), remaining) if reachable else 0
+    best = (present + remaining) / final_total * 100 if final_total else 0
+    return {
+        'remaining': remaining,
+        'can_skip': can_skip,
+        'must_attend': remaining - can_skip,
+        'reachable': reachable,
+        'best_percentage': round(best, 2)
+    }
+
+
+def project(subject_stats, classes, end, target_percentage, start=None, marked_on_start=()):
+    """Project every subject at once; returns {subject: projection}.
+
+    ``subject_stats`` is Database.get_subject_statistics output and
+    ``classes`` the user's timetable. Subjects with classes but no
+    attendance yet are included with zero history.
+    """
+    start = start or date.today()
+    remaining = remaining_by_subject(classes, start, end, marked_on_start)
+    history = {s['subject']: s for s in subject_stats}
+    projections = {}
+    for subject in sorted(set(remaining) | set(history)):
+        stats = history.get(subject, {'present': 0, 'total': 0})
+        projections[subject] = project_subject(stats['present'], stats['total'],
+                                               remaining.get(subject, 0), target_percentage)
+    return projections
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def copy_result(value):
+    """Copy the lists and dicts of a cached result so callers can't mutate the cache"""
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    return value
+
+
+class QueryCache:
+    """In-process LRU + TTL cache for read query results.
+
+    Entries are keyed by ``(query, user_id, args)`` and tagged with the user
+    and the tables they were read from, so a write only drops the results it
+    can have changed. Writes that don't know the user (``user_id=None``)
+    drop every user's entries for those tables.
+
+    Each (user, table) tag has a generation counter. A loader that started
+    before an invalidation of one of its tags doesn't get to store its
+    result, so a slow read racing a write can't put stale rows back.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tagged = {}  # (user_id, table) -> set of keys
+        self._generations = {}  # (user_id, table) or (None, table) -> int
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _generation(self, user_id, tables):
+        """Snapshot the counters an entry's freshness depends on"""
+        return tuple((self._generations.get((user_id, table), 0),
+                      self._generations.get((None, table), 0))
+                     for table in tables)
+
+    def _drop(self, key):
+        """Remove an entry and its tag references (lock held)"""
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get(self, key):
+        """Get a cached value, or (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] <= self.clock():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def put(self, key, value, user_id, tables, generation=None):
+        """Store a value; skipped if its tags were invalidated since ``generation``"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation(user_id, tables):
+                return
+            if key in self._entries:
+                self._drop(key)
+            tags = [(user_id, table) for table in tables]
+            self._entries[key] = (self.clock() + self.ttl, tags, value)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, query, user_id, args, tables, loader):
+        """Return the cached result of ``loader()`` for this query, user and args"""
+        if not self.enabled:
+            return loader()
+        key = (query, user_id, args)
+        found, value = self.get(key)
+        if found:
+            return value
+        with self._lock:
+            generation = self._generation(user_id, tables)
+        value = loader()
+        self.put(key, value, user_id, tables, generation)
+        return value
+
+    def invalidate(self, tables, user_id=None):
+        """Drop entries read from these tables, for one user or for everyone"""
+        with self._lock:
+            for table in tables:
+                self._generations[(user_id, table)] = self._generations.get((user_id, table), 0) + 1
+                if user_id is None:
+                    tags = [tag for tag in self._tagged if tag[1] == table]
+                else:
+                    tags = [(user_id, table)]
+                for tag in tags:
+                    for key in list(self._tagged.get(tag, ())):
+                        self._drop(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+
+    def stats(self):
+        """Get hit/miss/eviction counters and the hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,375 @@
+"""JSON over HTTP for Attendify, so kiosks, scripts and web front ends can share one database.
+
+    python server.py --db attendify.db --port 8080 --workers 8
+    python server.py --db directory.db --shards shard0.db,shard1.db   # sharded
+
+One asyncio loop parses HTTP/1.1 (keep-alive unless the client says
+otherwise) and hands every Database call to a bounded thread pool; each
+worker thread keeps its own pooled SQLite connection. Sign in with
+POST /api/login and send the token back as ``Authorization: Bearer <token>``.
+
+    POST   /api/users          {"username", "password"}        create an account
+    POST   /api/login          {"username", "password"}        -> {"token", "user_id"}
+    POST   /api/logout
+    GET    /api/classes                                        the timetable
+    POST   /api/classes        {"subject_name", "day_of_week", "time_slot",
+                                "professor", "room_number"}    -> {"id"}
+    DELETE /api/classes/<id>
+    GET    /api/schedule?date=YYYY-MM-DD                       a day's classes with status
+    GET    /api/attendance?date=YYYY-MM-DD
+    POST   /api/attendance     {"class_id", "status", "date"} or
+                               {"records": [[class_id, date, status], ...]}
+    GET    /api/statistics
+    GET    /api/health                                         pool, cache and concurrency counters
+"""
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import passwords
+from database import DAYS, Database
+from services import AttendanceService
+from sharding import ShardedDatabase
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class HttpError(Exception):
+    """An error response: status code plus a message for the client"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_date(text, default=None):
+    """Parse an optional YYYY-MM-DD parameter"""
+    if not text:
+        return default
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise HttpError(400, f"Invalid date: {text!r}") from None
+
+
+def string_field(body, name):
+    """Get an optional string field of a JSON body"""
+    value = body.get(name)
+    if value is not None and not isinstance(value, str):
+        raise HttpError(400, f"{name} must be a string")
+    return value
+
+
+def mark_record(class_id, date_str, status):
+    """Check the JSON types of one (class_id, date, status) row"""
+    # bool is an int subclass, but true must not mean class 1
+    if not isinstance(class_id, int) or isinstance(class_id, bool):
+        raise HttpError(400, "class_id must be an integer")
+    if date_str is not None and not isinstance(date_str, str):
+        raise HttpError(400, "date must be a string")
+    if not isinstance(status, str):
+        raise HttpError(400, "status must be a string")
+    return class_id, date_str, status
+
+
+class Api:
+    """The endpoints. Handlers run on worker threads and return (status, payload)."""
+
+    def __init__(self, db):
+        self.db = db
+        self.service = AttendanceService(db)
+        self.tokens = {}  # token -> user_id
+        self._tokens_lock = threading.Lock()
+        # (method, path pattern, handler, needs a signed-in user)
+        self.routes = [(method, re.compile(pattern + "$"), handler, auth) for method, pattern, handler, auth in [
+            ("POST", r"/api/users", self.signup, False),
+            ("POST", r"/api/login", self.login, False),
+            ("POST", r"/api/logout", self.logout, True),
+            ("GET", r"/api/classes", self.list_classes, True),
+            ("POST", r"/api/classes", self.add_class, True),
+            ("DELETE", r"/api/classes/(\d+)", self.delete_class, True),
+            ("GET", r"/api/schedule", self.schedule, True),
+            ("GET", r"/api/attendance", self.attendance, True),
+            ("POST", r"/api/attendance", self.mark, True),
+            ("GET", r"/api/statistics", self.statistics, True),
+            ("GET", r"/api/health", self.health, False),
+        ]]
+
+    def route(self, method, path):
+        """Find the handler for a request; returns (handler, needs auth, path arguments)"""
+        allowed = False
+        for route_method, pattern, handler, auth in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, auth, match.groups()
+                allowed = True
+        if allowed:
+            raise HttpError(405, f"Method {method} not allowed on {path}")
+        raise HttpError(404, f"No such endpoint: {path}")
+
+    def user_for(self, token):
+        """Get the user a token was issued to, or None"""
+        with self._tokens_lock:
+            return self.tokens.get(token)
+
+    def signup(self, request):
+        body = request['body']
+        success, result = self.service.create_user(string_field(body, 'username'),
+                                                   string_field(body, 'password'))
+        if not success:
+            raise HttpError(409 if result == "Username already exists" else 400, result)
+        return 201, {'user_id': result}
+
+    def login(self, request):
+        body = request['body']
+        success, result = self.service.authenticate(string_field(body, 'username'),
+                                                    string_field(body, 'password'))
+        if not success:
+            raise HttpError(401, result)
+        token = secrets.token_urlsafe(32)
+        with self._tokens_lock:
+            self.tokens[token] = result
+        return 200, {'token': token, 'user_id': result}
+
+    def logout(self, request):
+        with self._tokens_lock:
+            self.tokens.pop(request['token'], None)
+        return 200, {}
+
+    def list_classes(self, request):
+        return 200, self.db.get_user_classes(request['user_id'])
+
+    def add_class(self, request):
+        body = request['body']
+        subject = str(body.get('subject_name') or "").strip()
+        day = str(body.get('day_of_week') or "").strip().capitalize()
+        time_slot = str(body.get('time_slot') or "").strip()
+        if not subject or not time_slot:
+            raise HttpError(400, "subject_name and time_slot are required")
+        if day not in DAYS:
+            raise HttpError(400, f"Invalid day: {day!r}")
+        success, result = self.db.add_class(request['user_id'], subject, day, time_slot,
+                                            str(body.get('professor') or "").strip(),
+                                            str(body.get('room_number') or "").strip())
+        if not success:
+            raise HttpError(409 if result.startswith("Clashes") else 400, result)
+        return 201, {'id': result}
+
+    def delete_class(self, request, class_id):
+        class_id = int(class_id)
+        if self.db.get_class_owner(class_id) != request['user_id']:
+            raise HttpError(404, f"Unknown class: {class_id}")
+        self.db.delete_class(class_id)
+        return 200, {'id': class_id}
+
+    def schedule(self, request):
+        on_date = parse_date(request['query'].get('date'), date.today())
+        return 200, self.service.get_today_schedule(request['user_id'], on_date)
+
+    def attendance(self, request):
+        on_date = parse_date(request['query'].get('date'), date.today())
+        return 200, self.db.get_attendance_for_date(request['user_id'], on_date.isoformat())
+
+    def mark(self, request):
+        body = request['body']
+        if 'records' in body:
+            try:
+                records = [(class_id, date_str, status) for class_id, date_str, status in body['records']]
+            except (TypeError, ValueError):
+                raise HttpError(400, "records must be [class_id, date, status] triples") from None
+            records = [mark_record(*record) for record in records]
+            outcomes = self.db.mark_attendance_many(request['user_id'], records)
+            return 200, {'marked': sum(1 for o in outcomes if o['ok']), 'outcomes': outcomes}
+
+        record = mark_record(body.get('class_id'), body.get('date'), body.get('status'))
+        outcome, = self.db.mark_attendance_many(request['user_id'], [record])
+        if not outcome['ok']:
+            raise HttpError(400, outcome['error'])
+        return 200, outcome
+
+    def statistics(self, request):
+        return 200, self.service.get_statistics(request['user_id'])
+
+    def health(self, request):
+        return 200, {'status': 'ok', 'pool': self.db.pool_stats(), 'cache': self.db.cache_stats(),
+                     'concurrency': self.db.concurrency_stats()}
+
+
+def encode_response(status, payload, keep_alive):
+    """Serialise a JSON response with its status line and headers"""
+    body = json.dumps(payload, default=str).encode()
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class Server:
+    """Accepts connections on the event loop and runs handlers on a thread pool"""
+
+    def __init__(self, db, workers=8, max_pending=256):
+        self.api = Api(db)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="attendify-http")
+        # Requests waiting for a worker; beyond this, connections stop being read
+        self.pending = asyncio.Semaphore(max_pending)
+        self.requests = 0
+        self.connections = 0
+
+    async def read_request(self, reader):
+        """Read one request; returns (method, target, headers, body) or None at EOF"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HttpError(400, "Incomplete request") from None
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "Request headers too large") from None
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(400, "Malformed request line") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        headers[':version'] = version
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411, "Send a Content-Length instead of chunked encoding")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def wants_keep_alive(headers):
+        connection = headers.get("connection", "").lower()
+        if headers[':version'] == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def respond(self, method, target, headers, body):
+        """Route, authenticate and run one request; returns (status, payload)"""
+        url = urlsplit(target)
+        handler, needs_auth, args = self.api.route(method, url.path)
+        request = {
+            'query': {key: values[-1] for key, values in parse_qs(url.query).items()},
+            'token': None,
+            'user_id': None,
+            'body': {},
+        }
+        if needs_auth:
+            scheme, _, token = headers.get("authorization", "").partition(" ")
+            user_id = self.api.user_for(token) if scheme.lower() == "bearer" else None
+            if user_id is None:
+                raise HttpError(401, "Sign in first")
+            request['token'] = token
+            request['user_id'] = user_id
+        if body:
+            try:
+                request['body'] = json.loads(body)
+            except ValueError:
+                raise HttpError(400, "Body is not valid JSON") from None
+            if not isinstance(request['body'], dict):
+                raise HttpError(400, "Body must be a JSON object")
+
+        async with self.pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, lambda: handler(request, *args))
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes or asks to"""
+        self.connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = self.wants_keep_alive(request[2])
+                    status, payload = await self.respond(*request)
+                except HttpError as e:
+                    status, payload = e.status, {'error': str(e)}
+                    # After a framing error the rest of the stream can't be trusted
+                    keep_alive = keep_alive and e.status not in (400, 411, 413, 431)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception:
+                    traceback.print_exc()
+                    status, payload = 500, {'error': "Internal server error"}
+                self.requests += 1
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        """Listen until cancelled; ``ready`` is called with the bound (host, port)"""
+        server = await asyncio.start_server(self.handle_connection, host, port,
+                                            limit=MAX_HEADER_BYTES)
+        if ready:
+            ready(server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an Attendify database as a JSON API")
+    parser.add_argument("--db", default="attendify.db", help="SQLite database file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=8, help="database worker threads")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="requests queued for a worker before reads pause")
+    parser.add_argument("--password-iterations", type=int, default=passwords.DEFAULT_ITERATIONS,
+                        help="PBKDF2 work factor for new hashes (see bench_auth.py)")
+    parser.add_argument("--shards", help="comma-separated shard files; serves a sharded "
+                                         "deployment with --db as its directory (see sharding.py)")
+    args = parser.parse_args()
+
+    # One connection per worker, plus the one the main thread opened to migrate
+    options = {'max_connections': args.workers + 1, 'password_iterations': args.password_iterations}
+    if args.shards:
+        db = ShardedDatabase(args.db, args.shards.split(","), **options)
+    else:
+        db = Database(args.db, **options)
+    server = Server(db, workers=args.workers, max_pending=args.max_pending)
+
+    def ready(address):
+        print(f"listening on http://{address[0]}:{address[1]}", flush=True)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+import projection
+from database import ATTENDANCE_STATUSES, DAYS, percentage
+
+
+MIN_PASSWORD_LENGTH = 4
+
+
+class AttendanceService:
+    """UI-free application logic on top of Database.
+
+    Every method takes plain values and returns plain dicts/lists, so the Tk
+    frames, scripts, benchmarks and worker threads all share the same paths.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    # Accounts
+
+    def create_user(self, username, password):
+        """Validate and create an account; returns (success, user_id or message)"""
+        username = (username or "").strip()
+        if not username or not password:
+            return False, "Please enter both username and password"
+        if len(password) < MIN_PASSWORD_LENGTH:
+            return False, f"Password must be at least {MIN_PASSWORD_LENGTH} characters"
+        return self.db.create_user(username, password)
+
+    def authenticate(self, username, password):
+        """Check credentials; returns (success, user_id or message)"""
+        username = (username or "").strip()
+        if not username or not password:
+            return False, "Please enter both username and password"
+        success, user_id = self.db.authenticate_user(username, password)
+        if success:
+            return True, user_id
+        return False, "Invalid username or password"
+
+    # Timetable
+
+    def get_timetable(self, user_id):
+        """Get a user's classes grouped by weekday, in week order"""
+        by_day = {day: [] for day in DAYS}
+        for cls in self.db.get_user_classes(user_id):
+            by_day.setdefault(cls['day_of_week'], []).append(cls)
+        return [{'day': day, 'classes': classes} for day, classes in by_day.items() if classes]
+
+    def add_class(self, user_id, subject_name, day_of_week, time_slot, professor="", room_number=""):
+        """Validate and add a class; returns (success, message)"""
+        subject_name = (subject_name or "").strip()
+        time_slot = (time_slot or "").strip()
+        if not subject_name or not day_of_week or not time_slot:
+            return False, "Please fill in all required fields"
+        if day_of_week not in DAYS:
+            return False, f"Invalid day: {day_of_week}"
+        success, result = self.db.add_class(user_id, subject_name, day_of_week, time_slot,
+                                            (professor or "").strip(), (room_number or "").strip())
+        if not success:
+            return False, result
+        return True, "Class added successfully!"
+
+    def get_current_and_next(self, user_id, now=None):
+        """Get the class in progress and the next one to start (either may be None)"""
+        return {
+            'current': self.db.get_current_class(user_id, now),
+            'next': self.db.get_next_class(user_id, now)
+        }
+
+    def delete_class(self, class_id):
+        """Delete a class and its attendance history"""
+        return self.db.delete_class(class_id)
+
+    # Attendance
+
+    def get_today_schedule(self, user_id, on_date=None):
+        """Get the classes scheduled on a date with their attendance status and counts"""
+        on_date = on_date or date.today()
+        date_str = on_date.isoformat()
+        if on_date == date.today():
+            classes = self.db.get_today_classes(user_id)
+        else:
+            classes = [c for c in self.db.get_user_classes(user_id)
+                       if c['day_of_week'] == on_date.strftime("%A")]
+        statuses = {record['class_id']: record['status']
+                    for record in self.db.get_attendance_for_date(user_id, date_str)}
+
+        schedule = [dict(cls, status=statuses.get(cls['id'])) for cls in classes]
+        # Future dates are only previewed; sessions never run past today
+        self.db.ensure_sessions(user_id, min(on_date, date.today()))
+        return {
+            'date': date_str,
+            'classes': schedule,
+            'stats': self.count_statuses(schedule),
+            'catch_up': self.db.count_unmarked_sessions(user_id, date_str)
+        }
+
+    @staticmethod
+    def count_statuses(schedule):
+        """Count total/attended/absent/unmarked entries of a schedule"""
+        attended = sum(1 for c in schedule if c['status'] == 'Present')
+        absent = sum(1 for c in schedule if c['status'] == 'Absent')
+        return {
+            'total': len(schedule),
+            'attended': attended,
+            'absent': absent,
+            'unmarked': len(schedule) - attended - absent
+        }
+
+    def mark_attendance(self, user_id, class_id, status, date_str=None):
+        """Mark one class; returns True on success"""
+        if status not in ATTENDANCE_STATUSES:
+            return False
+        return self.db.mark_attendance(class_id, user_id, status, date_str)
+
+    def mark_many(self, user_id, class_ids, status, date_str=None):
+        """Mark several classes with the same status in one transaction"""
+        date_str = date_str or date.today().isoformat()
+        records = [(class_id, date_str, status) for class_id in class_ids]
+        return self.db.mark_attendance_many(user_id, records)
+
+    def get_unmarked_sessions(self, user_id, before=None):
+        """Get past sessions that were never marked, oldest first"""
+        before = before or date.today()
+        self.db.ensure_sessions(user_id, before)
+        return self.db.get_unmarked_sessions(user_id, before)
+
+    def mark_sessions(self, user_id, records):
+        """Mark many (class_id, date, status) sessions in one transaction"""
+        return self.db.mark_attendance_many(user_id, records)
+
+    # Statistics
+
+    def get_statistics(self, user_id, trend_weeks=12, recent_days=30):
+        """Get overall and per-subject statistics plus recent trends.
+
+        'trend' is the weekly attendance for the last ``trend_weeks`` weeks;
+        each subject also gets 'recent_percentage' over the last
+        ``recent_days`` days (None if it had no classes in that window).
+        """
+        # One snapshot keeps the figures consistent while writers commit;
+        # sharded databases have no snapshot and read each query as it comes
+        snapshot = getattr(self.db, 'snapshot', None)
+        with snapshot() if snapshot else nullcontext():
+            today = date.today()
+            subjects = self.db.get_subject_statistics(user_id)
+            rolling = self.db.get_rolling_attendance(user_id, today - timedelta(days=recent_days - 1),
+                                                     today, recent_days)
+            for subject in subjects:
+                # Every point lies inside the window, so their day counts add up to it
+                points = rolling.get(subject['subject'], [])
+                total = sum(point['total'] for point in points)
+                present = sum(point['present'] for point in points)
+                subject['recent_percentage'] = percentage(present, total) if total else None
+            settings = self.db.get_settings(user_id)
+            projections = self.get_projection(user_id, settings, subjects)
+            for subject in subjects:
+                subject['projection'] = projections.get(subject['subject']) if projections else None
+            return {
+                'overall': self.db.get_overall_statistics(user_id),
+                'subjects': subjects,
+                'trend': self.db.get_attendance_trend(user_id, today - timedelta(weeks=trend_weeks), today),
+                'recent_days': recent_days,
+                'settings': settings
+            }
+
+    def get_projection(self, user_id, settings=None, subjects=None):
+        """Per-subject skip / must-attend counts up to the semester end (None if unset or past)"""
+        settings = settings or self.db.get_settings(user_id)
+        if not settings['semester_end']:
+            return None
+        today = date.today()
+        end = date.fromisoformat(settings['semester_end'])
+        if end < today:
+            return None
+        if subjects is None:
+            subjects = self.db.get_subject_statistics(user_id)
+        marked_today = [record['class_id']
+                        for record in self.db.get_attendance_for_date(user_id, today.isoformat())]
+        return projection.project(subjects, self.db.get_user_classes(user_id), end,
+                                  settings['target_percentage'], today, marked_today)
+
+    # Settings
+
+    def get_settings(self, user_id):
+        """Get a user's thresholds and semester end date"""
+        return self.db.get_settings(user_id)
+
+    def update_settings(self, user_id, target_percentage, warning_percentage, semester_end):
+        """Validate and save thresholds and the semester end; returns (success, message)"""
+        try:
+            target = float(target_percentage)
+            warning = float(warning_percentage)
+        except (TypeError, ValueError):
+            return False, "Thresholds must be numbers"
+        if not 0 < warning <= target <= 100:
+            return False, "Thresholds must satisfy 0 < warning ≤ target ≤ 100"
+        semester_end = (semester_end or "").strip() or None
+        if semester_end:
+            try:
+                semester_end = date.fromisoformat(semester_end).isoformat()
+            except ValueError:
+                return False, "Semester end must be a date like 2026-12-18"
+        self.db.set_settings(user_id, target_percentage=target, warning_percentage=warning,
+                             semester_end=semester_end)
+        return True, "Settings saved"
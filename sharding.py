@@ -0,0 +1,467 @@
+"""Optional sharded storage: tenants spread over several SQLite files.
+
+A small directory database hands out globally unique user ids, maps each
+username to its tenant (the user itself, or an institution shared by many
+users) and each tenant to the shard file holding all of its rows.
+ShardedDatabase offers the Database methods the service layer uses and
+forwards each call to the right shard, so AttendanceService, server.py
+and the Tk app run on it unchanged:
+
+    db = ShardedDatabase("directory.db", ["shard0.db", "shard1.db", "shard2.db"])
+    AttendanceService(db).create_user("alice", "secret")
+
+New tenants are placed by a stable hash of their name. ``move_tenant``
+relocates one while the others keep working; from the shell:
+
+    python sharding.py --directory directory.db --shards shard0.db,shard1.db,shard2.db status
+    python sharding.py ... move <tenant> <shard>
+    python sharding.py ... rebalance [--dry-run]
+
+Raw SQL helpers (execute, fetch_*, transaction) and therefore bulk_io
+work per shard only.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import passwords
+from database import ConnectionPool, Database
+
+# Classes take ids from a per-shard range, so a bare class id (as in
+# delete_class) names its shard. Moved classes get new ids in their new range.
+CLASS_ID_SPAN = 1 << 40
+
+DIRECTORY_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS directory (
+           user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+           username TEXT UNIQUE NOT NULL,
+           tenant TEXT NOT NULL
+       )""",
+    "CREATE INDEX IF NOT EXISTS idx_directory_tenant ON directory (tenant)",
+    """CREATE TABLE IF NOT EXISTS tenants (
+           tenant TEXT PRIMARY KEY,
+           shard INTEGER NOT NULL
+       )""",
+)
+
+DIRECTORY_QUERIES = {
+    'add_user': "INSERT INTO directory (username, tenant) VALUES (?, ?)",
+    'remove_user': "DELETE FROM directory WHERE user_id = ?",
+    'place_tenant': "INSERT OR IGNORE INTO tenants (tenant, shard) VALUES (?, ?)",
+    'set_tenant_shard': "UPDATE tenants SET shard = ? WHERE tenant = ?",
+    'tenant_shard': "SELECT shard FROM tenants WHERE tenant = ?",
+    'tenant_users': "SELECT user_id FROM directory WHERE tenant = ?",
+    'route_by_name': """SELECT d.user_id, d.tenant, t.shard FROM directory d
+                        JOIN tenants t ON t.tenant = d.tenant WHERE d.username = ?""",
+    'route_by_id': """SELECT d.user_id, d.tenant, t.shard FROM directory d
+                      JOIN tenants t ON t.tenant = d.tenant WHERE d.user_id = ?""",
+    # Admin only: whole-directory summaries for status and rebalance
+    'tenant_sizes': """SELECT t.tenant, t.shard, COUNT(d.user_id) AS users FROM tenants t
+                       LEFT JOIN directory d ON d.tenant = t.tenant GROUP BY t.tenant""",
+}
+
+# Per-user tables in copy order (parents first); the rest follow by cascade
+MOVE_TABLES = ("users", "user_settings", "session_horizons", "classes", "attendance", "sessions")
+ID_BATCH = 500
+
+# Database methods whose first argument is the user id they act for
+USER_METHODS = (
+    "add_class", "find_clashes", "get_current_class", "get_next_class", "get_user_classes",
+    "get_today_classes", "mark_attendance_many", "get_attendance_for_date",
+    "get_overall_statistics", "get_subject_statistics", "get_attendance_trend",
+    "get_rolling_attendance", "get_settings", "set_settings", "ensure_sessions",
+    "reset_sessions", "get_unmarked_sessions", "count_unmarked_sessions",
+)
+
+
+def hash_shard(tenant, shards):
+    """Stable shard index for a tenant name (the same in every process)"""
+    digest = hashlib.blake2b(tenant.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def _id_batches(ids):
+    for start in range(0, len(ids), ID_BATCH):
+        yield ids[start:start + ID_BATCH]
+
+
+def _select_user_rows(conn, table, user_ids):
+    """Stream a table's rows for some users"""
+    column = "id" if table == "users" else "user_id"
+    for batch in _id_batches(user_ids):
+        marks = ", ".join("?" * len(batch))
+        yield from conn.execute(f"SELECT * FROM {table} WHERE {column} IN ({marks})", batch)
+
+
+def _delete_users(conn, user_ids):
+    """Delete users; foreign keys cascade to every other per-user table"""
+    for batch in _id_batches(user_ids):
+        marks = ", ".join("?" * len(batch))
+        conn.execute(f"DELETE FROM users WHERE id IN ({marks})", batch)
+
+
+def _insert_rows(conn, table, rows, drop=(), remap=None):
+    """Insert row dicts, leaving out ``drop`` columns and rewriting class ids via ``remap``"""
+    columns = None
+    values = []
+    for row in rows:
+        if columns is None:
+            columns = [name for name in row.keys() if name not in drop]
+        values.append(tuple(remap[row[name]] if remap is not None and name == "class_id" else row[name]
+                            for name in columns))
+    if values:
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' * len(columns))})", values)
+    return len(values)
+
+
+def reserve_class_ids(db, shard):
+    """Make a shard allocate class ids from its own range"""
+    floor = shard * CLASS_ID_SPAN
+    if not floor:
+        return
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'classes', 0 "
+                     "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'classes')")
+        conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'classes' AND seq < ?",
+                     (floor, floor))
+
+
+class ShardedDatabase:
+    """Routes Database calls to per-tenant shard files through a directory database"""
+
+    def __init__(self, directory, shards, **database_options):
+        self.directory = ConnectionPool(directory, max_connections=database_options.get('max_connections', 8))
+        with self._directory_transaction() as conn:
+            for statement in DIRECTORY_SCHEMA:
+                conn.execute(statement)
+        self.shards = [Database(path, **database_options) for path in shards]
+        for index, shard in enumerate(self.shards):
+            reserve_class_ids(shard, index)
+        self.password_iterations = self.shards[0].password_iterations
+        self._routes = {}  # user_id -> shard index
+        self._routes_lock = threading.Lock()
+        self._seen = threading.local()  # directory data_version last seen by this thread
+        self._moving = set()  # user ids whose tenant is being moved by this process
+        self._moving_cond = threading.Condition()
+
+    def close(self):
+        """Close every shard and the directory"""
+        for shard in self.shards:
+            shard.close()
+        self.directory.close()
+
+    # Directory
+
+    @contextmanager
+    def _directory_transaction(self):
+        conn = self.directory.acquire()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _directory_one(self, name, params):
+        return self.directory.acquire().execute(DIRECTORY_QUERIES[name], params).fetchone()
+
+    def _check_directory(self):
+        """Forget cached routes once another connection has changed the directory"""
+        version = self.directory.acquire().execute("PRAGMA data_version").fetchone()[0]
+        seen = getattr(self._seen, "version", None)
+        if seen != version:
+            if seen is not None:
+                with self._routes_lock:
+                    self._routes.clear()
+            self._seen.version = version
+
+    def shard_index(self, user_id):
+        """Index of the shard holding a user's rows"""
+        if user_id in self._moving:
+            with self._moving_cond:
+                while user_id in self._moving:
+                    self._moving_cond.wait()
+        self._check_directory()
+        index = self._routes.get(user_id)
+        if index is None:
+            row = self._directory_one('route_by_id', (user_id,))
+            if row is None:
+                raise LookupError(f"Unknown user id: {user_id!r}")
+            index = row['shard']
+            with self._routes_lock:
+                self._routes[user_id] = index
+        return index
+
+    def shard_for_user(self, user_id):
+        return self.shards[self.shard_index(user_id)]
+
+    def shard_for_class(self, class_id):
+        index = class_id // CLASS_ID_SPAN
+        if not 0 <= index < len(self.shards):
+            raise LookupError(f"Unknown class id: {class_id!r}")
+        return self.shards[index]
+
+    def tenant_shard(self, tenant):
+        """Index of a tenant's shard, or None for an unknown tenant"""
+        row = self._directory_one('tenant_shard', (tenant,))
+        return row['shard'] if row else None
+
+    # Accounts
+
+    def hash_password(self, password):
+        return self.shards[0].hash_password(password)
+
+    def create_user(self, username, password, user_id=None, tenant=None):
+        """Create a user in its tenant's shard (placing new tenants by hash).
+
+        ``tenant`` defaults to the username, i.e. one tenant per user. Ids
+        come from the directory; ``user_id`` is accepted for Database
+        compatibility but must be None.
+        """
+        if user_id is not None:
+            raise ValueError("ShardedDatabase allocates user ids itself")
+        tenant = tenant or username
+        try:
+            with self._directory_transaction() as conn:
+                user_id = conn.execute(DIRECTORY_QUERIES['add_user'], (username, tenant)).lastrowid
+                conn.execute(DIRECTORY_QUERIES['place_tenant'],
+                             (tenant, hash_shard(tenant, len(self.shards))))
+                index = conn.execute(DIRECTORY_QUERIES['tenant_shard'], (tenant,)).fetchone()['shard']
+        except sqlite3.IntegrityError:
+            return False, "Username already exists"
+
+        success, result = self.shards[index].create_user(username, password, user_id=user_id)
+        if not success:
+            with self._directory_transaction() as conn:
+                conn.execute(DIRECTORY_QUERIES['remove_user'], (user_id,))
+            return success, result
+        # A move of this tenant may have run between placement and insert; follow it
+        current = self.tenant_shard(tenant)
+        while current != index:
+            self._relocate([user_id], index, current)
+            index, current = current, self.tenant_shard(tenant)
+        return True, user_id
+
+    def get_user_id(self, username):
+        row = self._directory_one('route_by_name', (username,))
+        return row['user_id'] if row else None
+
+    def authenticate_user(self, username, password):
+        row = self._directory_one('route_by_name', (username,))
+        if row is None:
+            passwords.dummy_verify(password, self.password_iterations)
+            return False, None
+        return self.shard_for_user(row['user_id']).authenticate_user(username, password)
+
+    # Per-user and per-class calls
+
+    def mark_attendance(self, class_id, user_id, status, date_str=None):
+        return self.shard_for_user(user_id).mark_attendance(class_id, user_id, status, date_str)
+
+    def get_class_owner(self, class_id):
+        try:
+            return self.shard_for_class(class_id).get_class_owner(class_id)
+        except LookupError:
+            return None
+
+    def delete_class(self, class_id):
+        return self.shard_for_class(class_id).delete_class(class_id)
+
+    # Whole-database calls fan out to every shard
+
+    def mark_changed(self, *tables, user_id=None):
+        shards = [self.shard_for_user(user_id)] if user_id is not None else self.shards
+        for shard in shards:
+            shard.mark_changed(*tables, user_id=user_id)
+
+    def get_version(self, *tables):
+        """Sum of the shards' versions, so any shard's write changes it"""
+        return tuple(sum(column) for column in zip(*(shard.get_version(*tables) for shard in self.shards)))
+
+    def rebuild_summary(self):
+        return all(shard.rebuild_summary() for shard in self.shards)
+
+    def verify_summary(self):
+        return [dict(row, shard=index) for index, shard in enumerate(self.shards)
+                for row in shard.verify_summary()]
+
+    def check_query_plans(self):
+        return [shard.check_query_plans() for shard in self.shards]
+
+    def get_query_stats(self):
+        return [shard.get_query_stats() for shard in self.shards]
+
+    def cache_stats(self):
+        return [shard.cache_stats() for shard in self.shards]
+
+    def pool_stats(self):
+        return [shard.pool_stats() for shard in self.shards]
+
+    def concurrency_stats(self):
+        return [shard.concurrency_stats() for shard in self.shards]
+
+    # Moving tenants
+
+    def move_tenant(self, tenant, target):
+        """Move every row of a tenant to another shard; returns what moved.
+
+        The source shard's write lock is held while the tenant is copied,
+        so its other tenants' writes wait for the copy (reads don't) and no
+        write to the moving tenant can slip in unseen. Callers in this
+        process wait for the move; other processes may see a failed write
+        or an empty read for that tenant until they pick up the new route.
+        Moved classes get new ids from the target's range.
+        """
+        source = self.tenant_shard(tenant)
+        if source is None:
+            raise LookupError(f"Unknown tenant: {tenant!r}")
+        if not 0 <= target < len(self.shards):
+            raise ValueError(f"No shard {target}; there are {len(self.shards)}")
+        if source == target:
+            return {'tenant': tenant, 'from': source, 'to': target, 'users': 0}
+
+        user_ids = [row['user_id'] for row in
+                    self.directory.acquire().execute(DIRECTORY_QUERIES['tenant_users'], (tenant,))]
+        with self._moving_cond:
+            self._moving.update(user_ids)
+        try:
+            moved = self._relocate(user_ids, source, target, tenant)
+        finally:
+            with self._moving_cond:
+                self._moving.difference_update(user_ids)
+                self._moving_cond.notify_all()
+        report = {'tenant': tenant, 'from': source, 'to': target, 'users': len(user_ids)}
+        report.update(moved)
+        return report
+
+    def _relocate(self, user_ids, source, target, tenant=None):
+        """Copy users' rows from source to target, repoint the tenant, delete the originals"""
+        src, dst = self.shards[source], self.shards[target]
+        counts = dict.fromkeys(MOVE_TABLES, 0)
+        with src.transaction() as src_conn:
+            present = [row['id'] for row in _select_user_rows(src_conn, "users", user_ids)]
+            if present:
+                with dst.transaction() as dst_conn:
+                    # Leftovers of an interrupted earlier move
+                    _delete_users(dst_conn, present)
+                    class_ids = {}
+                    for table in MOVE_TABLES:
+                        rows = _select_user_rows(src_conn, table, present)
+                        if table == "classes":
+                            # One at a time: each class needs its new id for the remap
+                            for row in rows:
+                                columns = [name for name in row.keys() if name != "id"]
+                                cursor = dst_conn.execute(
+                                    f"INSERT INTO classes ({', '.join(columns)}) "
+                                    f"VALUES ({', '.join('?' * len(columns))})",
+                                    [row[name] for name in columns])
+                                class_ids[row['id']] = cursor.lastrowid
+                                counts[table] += 1
+                        elif table in ("attendance", "sessions"):
+                            counts[table] = _insert_rows(dst_conn, table, rows, drop=("id",), remap=class_ids)
+                        else:
+                            counts[table] = _insert_rows(dst_conn, table, rows)
+            if tenant is not None:
+                with self._directory_transaction() as conn:
+                    conn.execute(DIRECTORY_QUERIES['set_tenant_shard'], (target, tenant))
+            if present:
+                _delete_users(src_conn, present)
+
+        with self._routes_lock:
+            for user_id in user_ids:
+                self._routes[user_id] = target
+        for shard in (src, dst):
+            shard.mark_changed(*shard.versions)
+        return counts
+
+    def tenant_sizes(self):
+        """Every tenant with its shard and user count"""
+        rows = self.directory.acquire().execute(DIRECTORY_QUERIES['tenant_sizes']).fetchall()
+        return [dict(row) for row in rows]
+
+    def status(self):
+        """Tenants, users and file size per shard"""
+        shards = [{'shard': index, 'path': shard.db_name, 'tenants': 0, 'users': 0,
+                   'file_mb': round(os.path.getsize(shard.db_name) / 2**20, 2)
+                   if os.path.exists(shard.db_name) else 0.0}
+                  for index, shard in enumerate(self.shards)]
+        for tenant in self.tenant_sizes():
+            if 0 <= tenant['shard'] < len(shards):
+                shards[tenant['shard']]['tenants'] += 1
+                shards[tenant['shard']]['users'] += tenant['users']
+        return shards
+
+    def plan_rebalance(self):
+        """Moves (tenant, from, to) that even out users per shard, largest useful tenant first"""
+        load = [0] * len(self.shards)
+        tenants = [[] for _ in self.shards]
+        for tenant in self.tenant_sizes():
+            load[tenant['shard']] += tenant['users']
+            tenants[tenant['shard']].append((tenant['users'], tenant['tenant']))
+        moves = []
+        while True:
+            heavy = max(range(len(load)), key=load.__getitem__)
+            light = min(range(len(load)), key=load.__getitem__)
+            gap = load[heavy] - load[light]
+            # Moving a tenant of size s changes the gap to |gap - 2s|; only s < gap helps
+            candidates = [t for t in tenants[heavy] if 0 < t[0] < gap]
+            if not candidates:
+                return moves
+            size, name = max(candidates)
+            tenants[heavy].remove((size, name))
+            tenants[light].append((size, name))
+            load[heavy] -= size
+            load[light] += size
+            moves.append((name, heavy, light))
+
+
+def _routed(name):
+    def method(self, user_id, *args, **kwargs):
+        return getattr(self.shard_for_user(user_id), name)(user_id, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(Database, name).__doc__
+    return method
+
+
+for _name in USER_METHODS:
+    setattr(ShardedDatabase, _name, _routed(_name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and rebalance a sharded Attendify deployment")
+    parser.add_argument("--directory", required=True, help="directory database file")
+    parser.add_argument("--shards", required=True, help="comma-separated shard files, in shard order")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="tenants, users and size per shard")
+    move = commands.add_parser("move", help="move one tenant to another shard, online")
+    move.add_argument("tenant")
+    move.add_argument("shard", type=int)
+    rebalance = commands.add_parser("rebalance", help="move tenants until users per shard are even")
+    rebalance.add_argument("--dry-run", action="store_true", help="only print the planned moves")
+    args = parser.parse_args()
+
+    db = ShardedDatabase(args.directory, args.shards.split(","))
+    try:
+        if args.command == "status":
+            result = db.status()
+        elif args.command == "move":
+            result = db.move_tenant(args.tenant, args.shard)
+        else:
+            moves = db.plan_rebalance()
+            result = [{'tenant': tenant, 'from': source, 'to': target} for tenant, source, target in moves]
+            if not args.dry_run:
+                result = [db.move_tenant(tenant, target) for tenant, _, target in moves]
+        print(json.dumps(result, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
+from datetime import date
+from virtual_list import VirtualList
 
 
 class StatisticsFrame(tk.Frame):
+    # Tables whose writes make this page stale
+    depends_on = ("classes", "attendance", "settings")
+
     def __init__(self, parent, app):
         super().__init__(parent, bg="#0f172a")
         self.app = app
+        # Data key of the last completed render (see AttendifyPro.page_data_key)
+        self.data_key = None
+        self.recent_days = 30
+        # Colour bands, replaced by the user's settings on every render
+        self.target_percentage = 75
+        self.warning_percentage = 60
         self.create_widgets()
     
     def create_widgets(self):
@@ -20,35 +31,119 @@ class StatisticsFrame(tk.Frame):
                 fg="#f1f5f9",
                 font=("Segoe UI", 28, "bold")).pack(side="left")
         
+        # Thresholds and semester end used for colours and projections
+        settings_frame = tk.Frame(header, bg="#0f172a")
+        settings_frame.pack(side="right")
+        
+        self.settings_entries = {}
+        for key, label, width in [("target_percentage", "Target %", 5),
+                                  ("warning_percentage", "Warning %", 5),
+                                  ("semester_end", "Semester ends", 11)]:
+            tk.Label(settings_frame,
+                    text=label,
+                    bg="#0f172a",
+                    fg="#94a3b8",
+                    font=("Segoe UI", 10)).pack(side="left", padx=(10, 5))
+            entry = ttk.Entry(settings_frame, style="Modern.TEntry", width=width, font=("Segoe UI", 10))
+            entry.pack(side="left")
+            self.settings_entries[key] = entry
+        
+        self.save_settings_btn = ttk.Button(settings_frame,
+                                           text="Save",
+                                           style="Secondary.TButton",
+                                           command=self.save_settings)
+        self.save_settings_btn.pack(side="left", padx=(10, 0))
+        
         # Overall stats container
         self.overall_container = tk.Frame(self, bg="#0f172a")
         self.overall_container.pack(fill="x", padx=40, pady=(0, 30))
         
+        # Weekly trend container
+        self.trend_container = tk.Frame(self, bg="#0f172a")
+        self.trend_container.pack(fill="x", padx=40, pady=(0, 30))
+        
         # Subject stats container
         self.subject_container = tk.Frame(self, bg="#0f172a")
         self.subject_container.pack(fill="both", expand=True, padx=40, pady=(0, 30))
     
     def refresh(self):
         """Refresh statistics display"""
-        # Clear existing
+        self.show_loading()
+        data_key = self.app.page_data_key(self)
+        self.app.dispatcher.submit(self.app.service.get_statistics,
+                                   self.app.current_user['id'],
+                                   key="statistics", group="statistics",
+                                   on_success=lambda stats: self.render(stats, data_key))
+    
+    def clear(self):
+        """Remove the current statistics widgets"""
         for widget in self.overall_container.winfo_children():
             widget.destroy()
+        for widget in self.trend_container.winfo_children():
+            widget.destroy()
         for widget in self.subject_container.winfo_children():
             widget.destroy()
-        
-        # Get statistics
-        overall = self.app.db.get_overall_statistics(self.app.current_user['id'])
-        subjects = self.app.db.get_subject_statistics(self.app.current_user['id'])
+    
+    def show_loading(self):
+        """Show a placeholder while statistics load"""
+        self.clear()
+        tk.Label(self.overall_container,
+                text="Loading statistics…",
+                bg="#0f172a",
+                fg="#94a3b8",
+                font=("Segoe UI", 12)).pack(anchor="w")
+    
+    def render(self, stats, data_key=None):
+        """Render statistics returned by the service"""
+        self.data_key = data_key
+        self.clear()
+        self.show_settings(stats['settings'])
         
         # Display overall stats
-        self.show_overall_stats(overall)
+        self.show_overall_stats(stats['overall'])
+        
+        # Display weekly trend
+        if stats['trend']:
+            self.show_trend(stats['trend'])
         
         # Display subject stats
-        if subjects:
-            self.show_subject_stats(subjects)
+        if stats['subjects']:
+            self.recent_days = stats['recent_days']
+            self.show_subject_stats(stats['subjects'])
         else:
             self.show_no_data()
     
+    def show_settings(self, settings):
+        """Apply the user's thresholds and show them in the header fields"""
+        self.target_percentage = settings['target_percentage']
+        self.warning_percentage = settings['warning_percentage']
+        for key, entry in self.settings_entries.items():
+            value = settings[key]
+            if isinstance(value, float):
+                value = f"{value:g}"
+            entry.delete(0, tk.END)
+            entry.insert(0, value or "")
+    
+    def save_settings(self):
+        """Validate and store the header settings, then re-render"""
+        values = {key: entry.get() for key, entry in self.settings_entries.items()}
+        
+        def on_saved(result):
+            self.save_settings_btn.state(["!disabled"])
+            success, message = result
+            if not success:
+                messagebox.showerror("Error", message)
+                return
+            self.refresh()
+        
+        self.save_settings_btn.state(["disabled"])
+        self.app.dispatcher.submit(self.app.service.update_settings,
+                                   self.app.current_user['id'],
+                                   values['target_percentage'],
+                                   values['warning_percentage'],
+                                   values['semester_end'],
+                                   owner=self, on_success=on_saved)
+    
     def show_overall_stats(self, stats):
         """Display overall statistics in grid format"""
         # Title
@@ -85,10 +180,10 @@ class StatisticsFrame(tk.Frame):
                 font=("Segoe UI", 12)).pack(pady=(10, 0))
         
         # Status indicator
-        if stats['percentage'] >= 75:
+        if stats['percentage'] >= self.target_percentage:
             status_text = "✓ Excellent"
             status_color = "#10b981"
-        elif stats['percentage'] >= 60:
+        elif stats['percentage'] >= self.warning_percentage:
             status_text = "⚠ Needs Improvement"
             status_color = "#f59e0b"
         else:
@@ -164,6 +259,39 @@ class StatisticsFrame(tk.Frame):
         grid_container.grid_rowconfigure(0, weight=1)
         grid_container.grid_rowconfigure(1, weight=1)
     
+    def show_trend(self, trend):
+        """Display weekly attendance as a bar chart"""
+        tk.Label(self.trend_container,
+                text="Weekly Trend",
+                bg="#0f172a",
+                fg="#f1f5f9",
+                font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
+        
+        chart = tk.Canvas(self.trend_container, bg="#1e293b", height=170, highlightthickness=0)
+        chart.pack(fill="x")
+        chart.bind("<Configure>", lambda e: self.draw_trend(chart, trend))
+    
+    def draw_trend(self, chart, trend):
+        """Draw one bar per week, scaled to the canvas width"""
+        chart.delete("all")
+        width = chart.winfo_width()
+        top, bottom, side = 25, 140, 20
+        slot = (width - 2 * side) / max(len(trend), 1)
+        for i, point in enumerate(trend):
+            x0 = side + i * slot + slot * 0.2
+            x1 = side + (i + 1) * slot - slot * 0.2
+            y0 = bottom - (bottom - top) * point['percentage'] / 100
+            color = self.get_color_for_percentage(point['percentage'])
+            chart.create_rectangle(x0, y0, x1, bottom, fill=color, outline="")
+            chart.create_text((x0 + x1) / 2, y0 - 10,
+                              text=f"{point['percentage']:.0f}%",
+                              fill="#f1f5f9",
+                              font=("Segoe UI", 9, "bold"))
+            chart.create_text((x0 + x1) / 2, bottom + 15,
+                              text=date.fromisoformat(point['period']).strftime("%b %d"),
+                              fill="#94a3b8",
+                              font=("Segoe UI", 9))
+    
     def show_subject_stats(self, subjects):
 
         tk.Label(self.subject_container,
@@ -172,33 +300,18 @@ class StatisticsFrame(tk.Frame):
                 fg="#f1f5f9",
                 font=("Segoe UI", 18, "bold")).pack(anchor="w", pady=(0, 20))
         
-        canvas = tk.Canvas(self.subject_container, bg="#0f172a", highlightthickness=0)
-        scrollbar = ttk.Scrollbar(self.subject_container, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg="#0f172a")
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Subject cards
-        for subject in subjects:
-            self.create_subject_card(scrollable_frame, subject)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        # Only the subject cards in view are materialized
+        subject_list = VirtualList(self.subject_container,
+                                   {"subject": (230, self.create_subject_card, self.bind_subject_card)})
+        subject_list.pack(fill="both", expand=True)
+        subject_list.set_items(subjects)
     
-    def create_subject_card(self, parent, subject):
-        """Create a card for each subject"""
-        card = tk.Frame(parent, bg="#1e293b", highlightthickness=0)
-        card.pack(fill="x", pady=(0, 15))
+    def create_subject_card(self, parent):
+        """Create an empty, reusable card for a subject"""
+        row = tk.Frame(parent, bg="#0f172a")
+        
+        card = tk.Frame(row, bg="#1e293b", highlightthickness=0)
+        card.pack(fill="both", expand=True, pady=(0, 15))
         
         inner = tk.Frame(card, bg="#1e293b")
         inner.pack(fill="x", padx=30, pady=25)
@@ -206,22 +319,19 @@ class StatisticsFrame(tk.Frame):
         top = tk.Frame(inner, bg="#1e293b")
         top.pack(fill="x", pady=(0, 15))
         
-        tk.Label(top,
-                text=subject['subject'],
+        row.subject_label = tk.Label(top,
                 bg="#1e293b",
                 fg="#f1f5f9",
-                font=("Segoe UI", 16, "bold")).pack(side="left")
+                font=("Segoe UI", 16, "bold"))
+        row.subject_label.pack(side="left")
         
-        color = self.get_color_for_percentage(subject['percentage'])
+        row.perc_frame = tk.Frame(top, padx=15, pady=8)
+        row.perc_frame.pack(side="right")
         
-        perc_frame = tk.Frame(top, bg=color, padx=15, pady=8)
-        perc_frame.pack(side="right")
-        
-        tk.Label(perc_frame,
-                text=f"{subject['percentage']}%",
-                bg=color,
+        row.perc_label = tk.Label(row.perc_frame,
                 fg="white",
-                font=("Segoe UI", 16, "bold")).pack()
+                font=("Segoe UI", 16, "bold"))
+        row.perc_label.pack()
         
 
         stats_frame = tk.Frame(inner, bg="#1e293b")
@@ -229,20 +339,21 @@ class StatisticsFrame(tk.Frame):
         
  
         stat_items = [
-            ("Present", subject['present'], "#10b981"),
-            ("Absent", subject['absent'], "#ef4444"),
-            ("Total", subject['total'], "#3b82f6")
+            ("present", "Present", "#10b981"),
+            ("absent", "Absent", "#ef4444"),
+            ("total", "Total", "#3b82f6")
         ]
         
-        for label, value, stat_color in stat_items:
+        row.stat_labels = {}
+        for key, label, stat_color in stat_items:
             item = tk.Frame(stats_frame, bg="#1e293b")
             item.pack(side="left", padx=(0, 30))
             
-            tk.Label(item,
-                    text=str(value),
+            row.stat_labels[key] = tk.Label(item,
                     bg="#1e293b",
                     fg=stat_color,
-                    font=("Segoe UI", 20, "bold")).pack(side="left", padx=(0, 8))
+                    font=("Segoe UI", 20, "bold"))
+            row.stat_labels[key].pack(side="left", padx=(0, 8))
             
             tk.Label(item,
                     text=label,
@@ -250,13 +361,62 @@ class StatisticsFrame(tk.Frame):
                     fg="#94a3b8",
                     font=("Segoe UI", 10)).pack(side="left")
         
+        row.recent_label = tk.Label(stats_frame,
+                bg="#1e293b",
+                fg="#94a3b8",
+                font=("Segoe UI", 10))
+        row.recent_label.pack(side="right")
+        
         # Progress bar
         progress_bg = tk.Frame(inner, bg="#334155", height=10)
         progress_bg.pack(fill="x")
         
-        progress_width = subject['percentage']
-        progress_bar = tk.Frame(progress_bg, bg=color, height=10)
-        progress_bar.place(x=0, y=0, relwidth=progress_width/100, relheight=1)
+        row.progress_bar = tk.Frame(progress_bg, height=10)
+        row.progress_bar.place(x=0, y=0, relwidth=0, relheight=1)
+        
+        # Projection to the semester end
+        row.projection_label = tk.Label(inner,
+                bg="#1e293b",
+                fg="#94a3b8",
+                font=("Segoe UI", 10))
+        row.projection_label.pack(anchor="w", pady=(10, 0))
+        return row
+    
+    def bind_subject_card(self, row, subject):
+        """Fill a subject card with one subject's statistics"""
+        color = self.get_color_for_percentage(subject['percentage'])
+        
+        row.subject_label.config(text=subject['subject'])
+        row.perc_frame.config(bg=color)
+        row.perc_label.config(text=f"{subject['percentage']}%", bg=color)
+        for key, label in row.stat_labels.items():
+            label.config(text=str(subject[key]))
+        recent = subject.get('recent_percentage')
+        row.recent_label.config(
+            text=f"Last {self.recent_days} days: {'—' if recent is None else f'{recent}%'}",
+            fg="#94a3b8" if recent is None else self.get_color_for_percentage(recent))
+        row.projection_label.config(**self.describe_projection(subject.get('projection')))
+        row.progress_bar.config(bg=color)
+        row.progress_bar.place_configure(relwidth=subject['percentage']/100)
+    
+    def describe_projection(self, projection):
+        """Label text and colour for a subject's semester projection"""
+        if projection is None:
+            return {'text': "Set a semester end date to see how many classes you can skip",
+                    'fg': "#64748b"}
+        target = f"{self.target_percentage:g}%"
+        if not projection['remaining']:
+            return {'text': "No classes left this semester", 'fg': "#64748b"}
+        if not projection['reachable']:
+            return {'text': f"✗ {target} is out of reach — attend all {projection['remaining']} remaining "
+                            f"to finish at {projection['best_percentage']}%",
+                    'fg': "#ef4444"}
+        if projection['can_skip']:
+            return {'text': f"✓ Can skip {projection['can_skip']} of {projection['remaining']} remaining "
+                            f"and stay above {target}",
+                    'fg': "#10b981"}
+        return {'text': f"⚠ Must attend all {projection['remaining']} remaining to stay above {target}",
+                'fg': "#f59e0b"}
     
     def show_no_data(self):
         card = tk.Frame(self.subject_container, bg="#1e293b")
@@ -283,9 +443,9 @@ class StatisticsFrame(tk.Frame):
                 font=("Segoe UI", 11)).pack()
     
     def get_color_for_percentage(self, percentage):
-        if percentage >= 75:
+        if percentage >= self.target_percentage:
             return "#10b981"  
-        elif percentage >= 60:
+        elif percentage >= self.warning_percentage:
             return "#f59e0b"  
         else:
             return "#ef4444"  
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import Analytics  # noqa: E402
+from database import CHANGE_LOG_KEEP, CHANGE_LOG_TRIM_EVERY, Database  # noqa: E402
+
+
+class ChangeLogTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.workdir.name, "test.db"), password_iterations=1_000)
+        _, self.user_id = self.db.create_user("alice", "password")
+        _, self.class_id = self.db.add_class(self.user_id, "Physics", "Monday", "09:00 - 10:00")
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def log_size(self):
+        return self.db.get_connection().execute("SELECT COUNT(*) FROM attendance_changes").fetchone()[0]
+
+    def mark(self, day, status):
+        self.assertTrue(self.db.mark_attendance(self.class_id, self.user_id, status, f"2026-03-{day:02d}"))
+
+    def test_pruning_reader_empties_the_log(self):
+        analytics = Analytics(self.db, prune=True)
+        analytics.refresh()
+        for round_ in range(20):
+            for day in range(1, 11):
+                self.mark(day, "Present" if (day + round_) % 2 else "Absent")
+            analytics.refresh()
+            self.assertEqual(self.log_size(), 0)
+        self.assertEqual(analytics.overall()['total'], 10)
+        self.assertEqual(analytics.overall()['present'], 5)
+
+    def test_reader_behind_a_prune_reloads(self):
+        behind = Analytics(self.db)
+        ahead = Analytics(self.db, prune=True)
+        behind.load()
+        ahead.load()
+        self.mark(2, "Present")
+        ahead.refresh()
+        self.assertEqual(self.log_size(), 0)
+        self.mark(9, "Absent")
+        self.assertEqual(behind.refresh()['mode'], 'full')
+        self.assertEqual(behind.overall()['total'], 2)
+
+    def test_readers_stay_incremental_by_default(self):
+        for day in range(1, 11):
+            self.mark(day, "Absent")
+        first, second = Analytics(self.db), Analytics(self.db)
+        first.load()
+        second.load()
+        for day in range(1, 4):
+            self.mark(day, "Present")
+            self.assertEqual(first.refresh()['mode'], 'incremental')
+            self.assertEqual(second.refresh()['mode'], 'incremental')
+        self.assertEqual(self.log_size(), 13)
+        self.assertEqual(first.overall(), second.overall())
+
+    def test_log_trims_itself_without_readers(self):
+        conn = self.db.get_connection()
+        with self.db.transaction():
+            conn.executemany("INSERT INTO attendance_changes (class_id, date) VALUES (?, '2026-03-02')",
+                             [(self.class_id,)] * (CHANGE_LOG_KEEP + 3 * CHANGE_LOG_TRIM_EVERY))
+        self.assertLessEqual(self.log_size(), CHANGE_LOG_KEEP + CHANGE_LOG_TRIM_EVERY)
+
+    def test_prune_changes_command_empties_the_log(self):
+        self.mark(2, "Present")
+        self.assertEqual(self.db.prune_attendance_changes(), 1)
+        self.assertEqual(self.log_size(), 0)
+
+
+class RatesTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.workdir.name, "test.db"), password_iterations=1_000)
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def test_user_rates_are_ordered_by_user_id(self):
+        _, first = self.db.create_user("alice", "password")
+        _, second = self.db.create_user("bob", "password")
+        # bob's class gets the lower class id, so bob gets the lower internal code
+        for user_id, status in ((second, "Absent"), (first, "Present")):
+            _, class_id = self.db.add_class(user_id, "Physics", "Monday", "09:00 - 10:00")
+            self.assertTrue(self.db.mark_attendance(class_id, user_id, status, "2026-03-02"))
+        analytics = Analytics(self.db)
+        analytics.load()
+        self.assertEqual(analytics.user_ids, [second, first])
+        self.assertEqual([(row['user_id'], row['present']) for row in analytics.user_rates()],
+                         [(first, 1), (second, 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passwords  # noqa: E402
+from database import MIGRATIONS, Database, _create_base_tables  # noqa: E402
+
+
+class MigrationTest(unittest.TestCase):
+    """Upgrades an attendify.db written before the schema was versioned"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, "legacy.db")
+        conn = sqlite3.connect(self.path)
+        _create_base_tables(conn)
+        conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'alice', ?)",
+                     (hashlib.sha256(b"secret").hexdigest(),))
+        conn.executemany("INSERT INTO classes (id, user_id, subject_name, day_of_week, time_slot) "
+                         "VALUES (?, 1, ?, 'Monday', ?)",
+                         [(1, "Physics", "9:00 AM - 10:00 AM"), (2, "Maths", "after lunch")])
+        conn.executemany("INSERT INTO attendance (class_id, user_id, date, status) VALUES (1, 1, ?, ?)",
+                         [("2026-02-02", "Present"), ("2026-02-09", "Absent"), ("2026-02-16", "Present")])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def open(self):
+        db = Database(self.path, password_iterations=1_000)
+        self.addCleanup(db.close)
+        return db
+
+    def test_upgrades_to_latest_version(self):
+        db = self.open()
+        self.assertEqual(db.schema_version(), MIGRATIONS[-1][0])
+        self.assertEqual(db.migrate(), [])
+        self.assertEqual(db.verify_summary(), [])
+        self.assertEqual(db.get_overall_statistics(1)['total'], 3)
+
+        classes = {c['subject_name']: c for c in db.get_user_classes(1)}
+        self.assertEqual((classes['Physics']['start_minute'], classes['Physics']['end_minute']), (540, 600))
+        self.assertIsNone(classes['Maths']['start_minute'])
+        self.assertEqual(classes['Physics']['created_on'], "2026-02-02")
+
+    def test_steps_apply_in_order_and_resume(self):
+        db = self.open()
+        conn = db.get_connection()
+        conn.execute("PRAGMA user_version = 0")
+        self.assertEqual([version for version, _ in db.migrate(target=3)], [1, 2, 3])
+        self.assertEqual(db.schema_version(), 3)
+        self.assertEqual([version for version, _ in db.migrate()],
+                         [version for version, _, _ in MIGRATIONS[3:]])
+        self.assertEqual(db.verify_summary(), [])
+
+    def test_legacy_password_is_rehashed_on_login(self):
+        db = self.open()
+        self.assertEqual(db.authenticate_user("alice", "wrong"), (False, None))
+        self.assertEqual(db.authenticate_user("alice", "secret"), (True, 1))
+        stored = db.get_connection().execute("SELECT password_hash FROM users WHERE id = 1").fetchone()[0]
+        self.assertFalse(passwords.is_legacy_hash(stored))
+        self.assertTrue(stored.startswith(f"{passwords.ALGORITHM}$1000$"))
+        self.assertEqual(db.authenticate_user("alice", "secret"), (True, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import projection  # noqa: E402
+from database import DAYS  # noqa: E402
+
+
+class ProjectionTest(unittest.TestCase):
+    def test_count_weekday_matches_walking_the_calendar(self):
+        start = date(2026, 3, 1)
+        for length in range(-1, 30):
+            end = start + timedelta(days=length)
+            for day in DAYS:
+                walked = sum(1 for offset in range(length + 1)
+                             if (start + timedelta(days=offset)).strftime("%A") == day)
+                self.assertEqual(projection.count_weekday(day, start, end), walked, (day, length))
+
+    def test_can_skip_is_the_largest_safe_number(self):
+        for present in range(0, 8):
+            for total in range(present, 8):
+                for remaining in range(0, 8):
+                    result = projection.project_subject(present, total, remaining, 75)
+                    safe = [s for s in range(remaining + 1)
+                            if (present + remaining - s) * 100 >= 75 * (total + remaining)]
+                    self.assertEqual(result['reachable'], bool(safe))
+                    self.assertEqual(result['can_skip'], max(safe) if safe else 0)
+                    self.assertEqual(result['can_skip'] + result['must_attend'], remaining)
+
+    def test_fractional_target_has_no_rounding_error(self):
+        # 7 of 10 is exactly 70%, which float arithmetic puts just below 0.7 * 10
+        self.assertEqual(projection.project_subject(7, 10, 0, 70.0)['reachable'], True)
+        self.assertEqual(projection.project_subject(1, 3, 0, 33.34)['reachable'], False)
+
+    def test_marked_class_on_the_start_day_is_not_counted_again(self):
+        monday = date(2026, 3, 2)
+        classes = [{'id': 1, 'subject_name': "Physics", 'day_of_week': "Monday"},
+                   {'id': 2, 'subject_name': "Physics", 'day_of_week': "Wednesday"},
+                   {'id': 3, 'subject_name': "Maths", 'day_of_week': "Monday"}]
+        end = monday + timedelta(days=13)
+        self.assertEqual(projection.remaining_by_subject(classes, monday, end, marked_on_start=[1]),
+                         {"Physics": 3, "Maths": 2})
+
+        projections = projection.project([{'subject': "Art", 'present': 1, 'total': 1}],
+                                         classes, end, 75, monday)
+        self.assertEqual(sorted(projections), ["Art", "Maths", "Physics"])
+        self.assertEqual(projections["Art"]['remaining'], 0)
+        self.assertEqual(projections["Physics"]['can_skip'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
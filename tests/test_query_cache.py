@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from query_cache import QueryCache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class QueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryCache(max_entries=3, ttl=10.0, clock=self.clock)
+        self.loads = []
+
+    def load(self, query, user_id=1, tables=('attendance',), value=None):
+        def loader():
+            self.loads.append((query, user_id))
+            return value if value is not None else f"{query}:{user_id}"
+        return self.cache.get_or_load(query, user_id, (), tables, loader)
+
+    def test_entries_expire_after_ttl(self):
+        self.load('a')
+        self.clock.now = 9.9
+        self.load('a')
+        self.assertEqual(len(self.loads), 1)
+        self.clock.now = 10.0
+        self.load('a')
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for query in ('a', 'b', 'c'):
+            self.load(query)
+        self.load('a')
+        self.load('d')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertEqual(self.cache.get(('b', 1, ()))[0], False)
+        for query in ('a', 'c', 'd'):
+            self.assertEqual(self.cache.get((query, 1, ()))[0], True)
+
+    def test_invalidation_is_per_user_and_table(self):
+        self.load('stats', user_id=1, tables=('attendance',))
+        self.load('stats', user_id=2, tables=('attendance',))
+        self.load('classes', user_id=1, tables=('classes',))
+        self.cache.invalidate(('attendance',), user_id=1)
+        self.assertEqual(self.cache.get(('stats', 1, ()))[0], False)
+        self.assertEqual(self.cache.get(('stats', 2, ()))[0], True)
+        self.assertEqual(self.cache.get(('classes', 1, ()))[0], True)
+
+        self.cache.invalidate(('attendance',))
+        self.assertEqual(self.cache.get(('stats', 2, ()))[0], False)
+        self.assertEqual(self.cache.get(('classes', 1, ()))[0], True)
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        def loader():
+            self.cache.invalidate(('attendance',), user_id=1)
+            return "stale"
+        self.assertEqual(self.cache.get_or_load('stats', 1, (), ('attendance',), loader), "stale")
+        self.assertEqual(self.cache.get(('stats', 1, ()))[0], False)
+
+    def test_disabled_cache_always_loads(self):
+        self.cache = QueryCache(max_entries=0, clock=self.clock)
+        self.load('a')
+        self.load('a')
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+
+class DatabaseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.workdir.name, "test.db"), password_iterations=1_000)
+        _, self.user_id = self.db.create_user("alice", "password")
+        _, self.other_id = self.db.create_user("bob", "password")
+        _, self.class_id = self.db.add_class(self.user_id, "Physics", "Monday", "09:00 - 10:00")
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def test_writes_refresh_only_their_users_results(self):
+        self.assertEqual(self.db.get_overall_statistics(self.user_id)['total'], 0)
+        self.db.get_overall_statistics(self.other_id)
+        hits = self.db.cache_stats()['hits']
+        self.db.mark_attendance(self.class_id, self.user_id, "Present", "2026-03-02")
+        self.assertEqual(self.db.get_overall_statistics(self.user_id)['total'], 1)
+        self.db.get_overall_statistics(self.other_id)
+        self.assertEqual(self.db.cache_stats()['hits'], hits + 1)
+
+    def test_results_are_copies(self):
+        self.db.get_user_classes(self.user_id)[0]['subject_name'] = "Changed"
+        self.assertEqual(self.db.get_user_classes(self.user_id)[0]['subject_name'], "Physics")
+
+
+if __name__ == "__main__":
+    unittest.main()
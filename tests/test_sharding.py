@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharding import CLASS_ID_SPAN, ShardedDatabase, hash_shard  # noqa: E402
+
+
+class ShardingTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        path = self.workdir.name
+        self.db = ShardedDatabase(os.path.join(path, "directory.db"),
+                                  [os.path.join(path, f"shard{index}.db") for index in range(3)],
+                                  password_iterations=1_000)
+        _, self.alice = self.db.create_user("alice", "password", tenant="college")
+        _, self.bob = self.db.create_user("bob", "password", tenant="college")
+        _, self.carol = self.db.create_user("carol", "password")
+        self.source = self.db.tenant_shard("college")
+        self.target = (self.source + 1) % 3
+
+        _, self.physics = self.db.add_class(self.alice, "Physics", "Monday", "09:00 - 10:00")
+        _, self.maths = self.db.add_class(self.bob, "Maths", "Tuesday", "09:00 - 10:00")
+        self.db.mark_attendance(self.physics, self.alice, "Present", "2026-03-02")
+        self.db.mark_attendance(self.physics, self.alice, "Absent", "2026-03-09")
+        self.db.mark_attendance(self.maths, self.bob, "Present", "2026-03-03")
+        self.db.set_settings(self.alice, target_percentage=80.0)
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def test_placement_and_class_id_ranges(self):
+        self.assertEqual(self.source, hash_shard("college", 3))
+        self.assertEqual(self.db.tenant_shard("carol"), hash_shard("carol", 3))
+        self.assertEqual(self.db.shard_index(self.alice), self.db.shard_index(self.bob))
+        for class_id in (self.physics, self.maths):
+            self.assertEqual(class_id // CLASS_ID_SPAN, self.source)
+            self.assertIs(self.db.shard_for_class(class_id), self.db.shards[self.source])
+
+    def test_move_tenant_keeps_every_row(self):
+        before = {user_id: (self.db.get_overall_statistics(user_id), self.db.get_subject_statistics(user_id))
+                  for user_id in (self.alice, self.bob)}
+        report = self.db.move_tenant("college", self.target)
+        self.assertEqual((report['from'], report['to'], report['users']), (self.source, self.target, 2))
+        self.assertEqual((report['classes'], report['attendance']), (2, 3))
+
+        self.assertEqual(self.db.tenant_shard("college"), self.target)
+        self.assertEqual(self.db.shard_index(self.alice), self.target)
+        for user_id in (self.alice, self.bob):
+            self.assertEqual((self.db.get_overall_statistics(user_id), self.db.get_subject_statistics(user_id)),
+                             before[user_id])
+        self.assertEqual(self.db.get_settings(self.alice)['target_percentage'], 80.0)
+        self.assertEqual(self.db.authenticate_user("alice", "password"), (True, self.alice))
+        self.assertEqual(self.db.verify_summary(), [])
+
+        source_conn = self.db.shards[self.source].get_connection()
+        for table in ("users", "classes", "attendance", "attendance_summary"):
+            self.assertEqual(source_conn.execute(f"SELECT COUNT(*) FROM {table} WHERE "
+                                                 f"{'id' if table == 'users' else 'user_id'} IN (?, ?)",
+                                                 (self.alice, self.bob)).fetchone()[0], 0, table)
+
+    def test_moved_classes_take_ids_from_the_target_range(self):
+        self.db.move_tenant("college", self.target)
+        classes = self.db.get_user_classes(self.alice) + self.db.get_user_classes(self.bob)
+        self.assertEqual(len(classes), 2)
+        for cls in classes:
+            self.assertEqual(cls['id'] // CLASS_ID_SPAN, self.target)
+            self.assertEqual(self.db.get_class_owner(cls['id']), cls['user_id'])
+        self.assertIsNone(self.db.get_class_owner(self.physics))
+
+        physics = next(cls['id'] for cls in classes if cls['subject_name'] == "Physics")
+        self.assertTrue(self.db.mark_attendance(physics, self.alice, "Present", "2026-03-16"))
+        self.assertEqual(self.db.get_overall_statistics(self.alice)['total'], 3)
+        success, new_id = self.db.add_class(self.alice, "Art", "Friday", "09:00 - 10:00")
+        self.assertTrue(success)
+        self.assertEqual(new_id // CLASS_ID_SPAN, self.target)
+
+    def test_move_to_the_same_shard_is_a_no_op(self):
+        self.assertEqual(self.db.move_tenant("college", self.source)['users'], 0)
+        with self.assertRaises(LookupError):
+            self.db.move_tenant("nobody", self.target)
+        with self.assertRaises(ValueError):
+            self.db.move_tenant("college", 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+class SummaryTriggerTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.workdir.name, "test.db"), password_iterations=1_000)
+        _, self.user_id = self.db.create_user("alice", "password")
+        _, self.physics = self.db.add_class(self.user_id, "Physics", "Monday", "09:00 - 10:00")
+        _, self.maths = self.db.add_class(self.user_id, "Maths", "Monday", "10:00 - 11:00")
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def counters(self, class_id):
+        row = self.db.get_connection().execute(
+            "SELECT total, present, absent FROM attendance_summary WHERE class_id = ?", (class_id,)).fetchone()
+        return tuple(row) if row else None
+
+    def test_mark_and_remark(self):
+        self.db.mark_attendance(self.physics, self.user_id, "Present", "2026-03-02")
+        self.assertEqual(self.counters(self.physics), (1, 1, 0))
+        self.db.mark_attendance(self.physics, self.user_id, "Absent", "2026-03-02")
+        self.assertEqual(self.counters(self.physics), (1, 0, 1))
+        self.db.mark_attendance(self.physics, self.user_id, "Absent", "2026-03-02")
+        self.assertEqual(self.counters(self.physics), (1, 0, 1))
+        self.db.mark_attendance_many(self.user_id, [(self.physics, "2026-03-02", "Present"),
+                                                    (self.physics, "2026-03-09", "Absent"),
+                                                    (self.maths, "2026-03-09", "Present")])
+        self.assertEqual(self.counters(self.physics), (2, 1, 1))
+        self.assertEqual(self.counters(self.maths), (1, 1, 0))
+        self.assertEqual(self.db.verify_summary(), [])
+
+    def test_delete(self):
+        for day, status in (("2026-03-02", "Present"), ("2026-03-09", "Absent"), ("2026-03-16", "Present")):
+            self.db.mark_attendance(self.physics, self.user_id, status, day)
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM attendance WHERE class_id = ? AND date = '2026-03-02'", (self.physics,))
+        self.assertEqual(self.counters(self.physics), (2, 1, 1))
+        self.assertEqual(self.db.verify_summary(), [])
+
+        self.db.delete_class(self.physics)
+        self.assertIsNone(self.counters(self.physics))
+        self.assertEqual(self.db.verify_summary(), [])
+
+    def test_moving_a_record_to_another_class(self):
+        self.db.mark_attendance(self.physics, self.user_id, "Present", "2026-03-02")
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE attendance SET class_id = ? WHERE class_id = ?", (self.maths, self.physics))
+        self.assertEqual(self.counters(self.physics), (0, 0, 0))
+        self.assertEqual(self.counters(self.maths), (1, 1, 0))
+        self.assertEqual(self.db.verify_summary(), [])
+
+    def test_reconcile_repairs_drift(self):
+        self.db.mark_attendance(self.physics, self.user_id, "Present", "2026-03-02")
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE attendance_summary SET present = 5")
+        self.assertEqual(len(self.db.reconcile_summary()), 1)
+        self.assertEqual(self.counters(self.physics), (1, 1, 0))
+        self.assertEqual(self.db.verify_summary(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
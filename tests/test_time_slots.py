@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_io  # noqa: E402
+from database import Database, parse_time_slot  # noqa: E402
+
+
+class ParseTimeSlotTest(unittest.TestCase):
+    def test_accepted_forms(self):
+        cases = {
+            "09:00 - 10:30": (540, 630),
+            "9-10": (540, 600),
+            "9.15 to 10.45": (555, 645),
+            "13:00 – 14:00": (780, 840),
+            "11 am - 1 pm": (660, 780),
+            "10 - 11:30 am": (600, 690),
+            "12 pm - 1 pm": (720, 780),
+            "11 - 1 pm": (660, 780),
+            "22:00 - 24:00": (1320, 1440),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_time_slot(text), expected)
+
+    def test_rejected_forms(self):
+        for text in ("", None, "morning", "10:00", "10:00 - 09:00", "10 - 10",
+                     "09:60 - 10:00", "13 pm - 2 pm", "23:00 - 24:30"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_time_slot(text)
+
+
+class ClashTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.workdir.name, "test.db"), password_iterations=1_000)
+        _, self.user_id = self.db.create_user("alice", "password")
+        _, self.other_id = self.db.create_user("bob", "password")
+        self.assertTrue(self.db.add_class(self.user_id, "Physics", "Monday", "09:00 - 10:00")[0])
+
+    def tearDown(self):
+        self.db.close()
+        self.workdir.cleanup()
+
+    def test_overlap_is_rejected(self):
+        success, message = self.db.add_class(self.user_id, "Maths", "Monday", "9:30 - 11")
+        self.assertFalse(success)
+        self.assertEqual(message, "Clashes with Physics (09:00 - 10:00) on Monday")
+
+    def test_touching_slots_other_days_and_users_are_free(self):
+        self.assertTrue(self.db.add_class(self.user_id, "Maths", "Monday", "10:00 - 11:00")[0])
+        self.assertTrue(self.db.add_class(self.user_id, "Art", "Monday", "8 - 9 am")[0])
+        self.assertTrue(self.db.add_class(self.user_id, "Maths", "Tuesday", "09:00 - 10:00")[0])
+        self.assertTrue(self.db.add_class(self.other_id, "Maths", "Monday", "09:00 - 10:00")[0])
+
+    def test_find_clashes_uses_half_open_intervals(self):
+        self.assertEqual([c['subject_name'] for c in self.db.find_clashes(self.user_id, "Monday", 599, 660)],
+                         ["Physics"])
+        self.assertEqual(self.db.find_clashes(self.user_id, "Monday", 600, 660), [])
+        self.assertEqual(self.db.find_clashes(self.user_id, "Monday", 480, 540), [])
+
+    def test_import_rejects_clashing_classes(self):
+        path = os.path.join(self.workdir.name, "timetable.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("record,ref,subject_name,day_of_week,time_slot,date,status\n"
+                    "class,c1,Maths,Monday,09:30 - 10:30,,\n"
+                    "attendance,c1,,,,2026-03-02,Present\n"
+                    "class,c2,Physics,Monday,09:00 - 10:00,,\n"
+                    "class,c3,Chemistry,Monday,10:00 - 11:00,,\n"
+                    "class,c4,Biology,Monday,10:30 - 11:30,,\n")
+        report = bulk_io.import_file(self.db, path, user_id=self.user_id)
+        self.assertEqual(report['classes_added'], 1)
+        self.assertEqual(report['classes_matched'], 1)
+        self.assertEqual(report['rejected'], 3)
+        self.assertIn("row 1: clashes with Physics (09:00 - 10:00) on Monday", report['errors'])
+        self.assertIn("row 2: attendance for unknown class ref 'c1'", report['errors'])
+        self.assertIn("row 5: clashes with Chemistry (10:00 - 11:00) on Monday", report['errors'])
+        self.assertEqual(sorted(c['subject_name'] for c in self.db.get_user_classes(self.user_id)),
+                         ["Chemistry", "Physics"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from virtual_list import VirtualList
 
 
 class TimetableFrame(tk.Frame):
+    # Tables whose writes make this page stale
+    depends_on = ("classes",)
+
     def __init__(self, parent, app):
         super().__init__(parent, bg="#0f172a")
         self.app = app
+        # Data key of the last completed render (see AttendifyPro.page_data_key)
+        self.data_key = None
+        self.class_list = None
         self.create_widgets()
     
     def create_widgets(self):
@@ -33,17 +40,37 @@ class TimetableFrame(tk.Frame):
     
     def refresh(self):
         """Refresh timetable display"""
-        # Clear existing
+        if self.class_list is None:
+            self.show_loading()
+        data_key = self.app.page_data_key(self)
+        self.app.dispatcher.submit(self.app.service.get_timetable,
+                                   self.app.current_user['id'],
+                                   key="timetable", group="timetable",
+                                   on_success=lambda timetable: self.render(timetable, data_key))
+    
+    def clear(self):
+        """Remove the current timetable widgets"""
         for widget in self.classes_container.winfo_children():
             widget.destroy()
-        
-        # Get all classes
-        classes = self.app.db.get_user_classes(self.app.current_user['id'])
-        
-        if not classes:
+        self.class_list = None
+    
+    def show_loading(self):
+        """Show a placeholder while the timetable loads"""
+        self.clear()
+        tk.Label(self.classes_container,
+                text="Loading timetable…",
+                bg="#0f172a",
+                fg="#94a3b8",
+                font=("Segoe UI", 12)).pack(anchor="w")
+    
+    def render(self, timetable, data_key=None):
+        """Render the day-grouped timetable returned by the service"""
+        self.data_key = data_key
+        if not timetable:
+            self.clear()
             self.show_no_classes()
         else:
-            self.show_classes(classes)
+            self.show_classes(timetable)
     
     def show_no_classes(self):
         """Show message when no classes"""
@@ -70,52 +97,43 @@ class TimetableFrame(tk.Frame):
                 fg="#94a3b8",
                 font=("Segoe UI", 11)).pack()
     
-    def show_classes(self, classes):
-        """Show all classes in a table"""
-        # Scrollable frame
-        canvas = tk.Canvas(self.classes_container, bg="#0f172a", highlightthickness=0)
-        scrollbar = ttk.Scrollbar(self.classes_container, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg="#0f172a")
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Group by day
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        day_classes = {day: [] for day in days}
-        
-        for cls in classes:
-            day_classes[cls['day_of_week']].append(cls)
-        
-        # Display by day
-        for day in days:
-            if day_classes[day]:
-                # Day header
-                day_header = tk.Frame(scrollable_frame, bg="#0f172a")
-                day_header.pack(fill="x", pady=(20, 10))
-                
-                tk.Label(day_header,
-                        text=day,
-                        bg="#0f172a",
-                        fg="#3b82f6",
-                        font=("Segoe UI", 16, "bold")).pack(anchor="w")
-                
-                # Classes for this day
-                for cls in day_classes[day]:
-                    self.create_class_row(scrollable_frame, cls)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+    def show_classes(self, timetable):
+        """Show all classes in a virtualized list with day headers"""
+        if self.class_list is None:
+            self.clear()
+            self.class_list = VirtualList(self.classes_container,
+                                          {"header": (60, self.create_day_header, self.bind_day_header),
+                                           "class": (112, self.create_class_row, self.bind_class_row)},
+                                          kind_of=lambda item: item[0])
+            self.class_list.pack(fill="both", expand=True)
+        
+        # Flatten into header/class rows; only the visible ones get widgets
+        rows = []
+        for entry in timetable:
+            rows.append(("header", entry['day']))
+            rows.extend(("class", cls) for cls in entry['classes'])
+        self.class_list.set_items(rows)
     
-    def create_class_row(self, parent, class_info):
-        """Create a row for each class"""
-        card = tk.Frame(parent, bg="#1e293b", highlightthickness=0)
-        card.pack(fill="x", pady=(0, 10))
+    def create_day_header(self, parent):
+        """Create an empty day header row"""
+        row = tk.Frame(parent, bg="#0f172a")
+        row.label = tk.Label(row,
+                bg="#0f172a",
+                fg="#3b82f6",
+                font=("Segoe UI", 16, "bold"))
+        row.label.pack(anchor="w", side="bottom", pady=(0, 10))
+        return row
+    
+    def bind_day_header(self, row, item):
+        """Show a day name in a header row"""
+        row.label.config(text=item[1])
+    
+    def create_class_row(self, parent):
+        """Create an empty, reusable row for a class"""
+        row = tk.Frame(parent, bg="#0f172a")
+        
+        card = tk.Frame(row, bg="#1e293b", highlightthickness=0)
+        card.pack(fill="both", expand=True, pady=(0, 10))
         
         inner = tk.Frame(card, bg="#1e293b")
         inner.pack(fill="x", padx=25, pady=20)
@@ -124,30 +142,37 @@ class TimetableFrame(tk.Frame):
         left = tk.Frame(inner, bg="#1e293b")
         left.pack(side="left", fill="both", expand=True)
         
-        tk.Label(left,
-                text=class_info['subject_name'],
+        row.subject_label = tk.Label(left,
                 bg="#1e293b",
                 fg="#f1f5f9",
-                font=("Segoe UI", 14, "bold")).pack(anchor="w")
+                font=("Segoe UI", 14, "bold"))
+        row.subject_label.pack(anchor="w")
         
+        row.details_label = tk.Label(left,
+                bg="#1e293b",
+                fg="#94a3b8",
+                font=("Segoe UI", 10))
+        row.details_label.pack(anchor="w", pady=(5, 0))
+        
+        # Right - Delete button
+        row.delete_btn = ttk.Button(inner,
+                               text="🗑 Delete",
+                               style="Danger.TButton")
+        row.delete_btn.pack(side="right")
+        return row
+    
+    def bind_class_row(self, row, item):
+        """Fill a class row with one class"""
+        class_info = item[1]
         details = f"⏰ {class_info['time_slot']}"
         if class_info.get('professor'):
             details += f"  •  👨‍🏫 {class_info['professor']}"
         if class_info.get('room_number'):
             details += f"  •  🚪 {class_info['room_number']}"
         
-        tk.Label(left,
-                text=details,
-                bg="#1e293b",
-                fg="#94a3b8",
-                font=("Segoe UI", 10)).pack(anchor="w", pady=(5, 0))
-        
-        # Right - Delete button
-        delete_btn = ttk.Button(inner,
-                               text="🗑 Delete",
-                               style="Danger.TButton",
-                               command=lambda: self.delete_class(class_info['id'], class_info['subject_name']))
-        delete_btn.pack(side="right")
+        row.subject_label.config(text=class_info['subject_name'])
+        row.details_label.config(text=details)
+        row.delete_btn.config(command=lambda: self.delete_class(class_info['id'], class_info['subject_name']))
     
     def show_add_dialog(self):
         """Show dialog to add new class"""
@@ -247,18 +272,22 @@ class TimetableFrame(tk.Frame):
             professor = prof_entry.get().strip()
             room = room_entry.get().strip()
             
-            if not subject or not day or not time:
-                messagebox.showerror("Error", "Please fill in all required fields", parent=dialog)
-                return
-            
-            self.app.db.add_class(
-                self.app.current_user['id'],
-                subject, day, time, professor, room
-            )
+            def on_saved(result):
+                success, message = result
+                if not success:
+                    messagebox.showerror("Error", message, parent=dialog)
+                    save_btn.state(["!disabled"])
+                    return
+                
+                messagebox.showinfo("Success", message, parent=dialog)
+                dialog.destroy()
+                self.refresh()
             
-            messagebox.showinfo("Success", "Class added successfully!", parent=dialog)
-            dialog.destroy()
-            self.refresh()
+            save_btn.state(["disabled"])
+            self.app.dispatcher.submit(self.app.service.add_class,
+                                       self.app.current_user['id'],
+                                       subject, day, time, professor, room,
+                                       owner=dialog, on_success=on_saved)
         
         save_btn = ttk.Button(btn_frame, text="Save Class", style="Primary.TButton", command=save_class)
         save_btn.pack(side="left", expand=True, fill="x", padx=(0, 10))
@@ -273,6 +302,10 @@ class TimetableFrame(tk.Frame):
         if messagebox.askyesno("Confirm Delete",
                               f"Are you sure you want to delete '{subject_name}'?\n\n"
                               "This will also delete all attendance records for this class."):
-            self.app.db.delete_class(class_id)
-            messagebox.showinfo("Success", "Class deleted successfully!")
-            self.refresh()
\ No newline at end of file
+            self.app.dispatcher.submit(self.app.service.delete_class, class_id,
+                                       owner=self, on_success=self.on_deleted)
+    
+    def on_deleted(self, result):
+        """Confirm a deletion and reload the timetable"""
+        messagebox.showinfo("Success", "Class deleted successfully!")
+        self.refresh()
\ No newline at end of file
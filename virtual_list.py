@@ -0,0 +1,148 @@
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_right
+
+
+class VirtualList(tk.Frame):
+    """Scrollable list that only materializes the rows in view.
+
+    Items are plain data. Each item has a ``kind`` (via ``kind_of``) with a
+    fixed row height and a pair of callbacks: ``create(parent)`` builds an
+    empty row widget once, and ``bind(row, item)`` fills it with an item.
+    Rows that scroll out of view go back to a per-kind pool and are rebound
+    to whatever scrolls in, so the widget count depends on the viewport,
+    not on the number of items.
+    """
+
+    def __init__(self, parent, row_types, kind_of=None, bg="#0f172a", buffer=2):
+        super().__init__(parent, bg=bg)
+        self.row_types = row_types  # kind -> (height, create, bind)
+        self.kind_of = kind_of or (lambda item: next(iter(row_types)))
+        self.buffer = buffer
+        self.items = []
+        self.offsets = [0]
+        self.active = {}  # index -> (kind, row, window_id)
+        self.pool = {kind: [] for kind in row_types}
+        self.width = 1
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", self.on_configure)
+        self.canvas.bind("<Enter>", self.bind_wheel)
+        self.canvas.bind("<Leave>", self.unbind_wheel)
+
+    def set_items(self, items):
+        """Replace the list contents, keeping the scroll position where possible"""
+        self.items = list(items)
+        offsets = [0]
+        for item in self.items:
+            offsets.append(offsets[-1] + self.row_types[self.kind_of(item)][0])
+        self.offsets = offsets
+
+        # Everything goes back to the pool; visible rows are rebound below
+        for index in list(self.active):
+            self.recycle(index)
+        self.canvas.configure(scrollregion=(0, 0, self.width, offsets[-1]))
+        if self.canvas.canvasy(0) > offsets[-1]:
+            self.canvas.yview_moveto(0)
+        self.update_visible()
+
+    def update_item(self, index, item):
+        """Replace one item and rebind its row if it is on screen"""
+        self.items[index] = item
+        if index in self.active:
+            kind, row, _ = self.active[index]
+            self.row_types[kind][2](row, item)
+
+    def visible_range(self):
+        """Indices of the items intersecting the viewport, plus the buffer"""
+        if not self.items:
+            return range(0)
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), 1)
+        first = max(bisect_right(self.offsets, top) - 1 - self.buffer, 0)
+        last = min(bisect_right(self.offsets, bottom) + self.buffer, len(self.items))
+        return range(first, last)
+
+    def update_visible(self):
+        """Materialize rows entering the viewport and recycle those leaving it"""
+        wanted = self.visible_range()
+        for index in list(self.active):
+            if index not in wanted:
+                self.recycle(index)
+        for index in wanted:
+            if index not in self.active:
+                self.place_row(index)
+
+    def place_row(self, index):
+        """Bind a pooled (or new) row to an item and position it"""
+        item = self.items[index]
+        kind = self.kind_of(item)
+        height, create, bind = self.row_types[kind]
+        if self.pool[kind]:
+            row, window_id = self.pool[kind].pop()
+            self.canvas.coords(window_id, 0, self.offsets[index])
+            self.canvas.itemconfigure(window_id, state="normal", width=self.width)
+        else:
+            row = create(self.canvas)
+            window_id = self.canvas.create_window(0, self.offsets[index], window=row, anchor="nw",
+                                                  width=self.width, height=height)
+        bind(row, item)
+        self.active[index] = (kind, row, window_id)
+
+    def recycle(self, index):
+        """Hide a row and return it to its pool"""
+        kind, row, window_id = self.active.pop(index)
+        self.canvas.itemconfigure(window_id, state="hidden")
+        self.pool[kind].append((row, window_id))
+
+    def widget_count(self):
+        """Number of row widgets created so far (visible and pooled)"""
+        return len(self.active) + sum(len(rows) for rows in self.pool.values())
+
+    def on_configure(self, event):
+        """Track the canvas width and refill the viewport after a resize"""
+        self.width = max(event.width, 1)
+        for _, _, window_id in self.active.values():
+            self.canvas.itemconfigure(window_id, width=self.width)
+        for rows in self.pool.values():
+            for _, window_id in rows:
+                self.canvas.itemconfigure(window_id, width=self.width)
+        self.canvas.configure(scrollregion=(0, 0, self.width, self.offsets[-1]))
+        self.update_visible()
+
+    def on_scroll(self, first, last):
+        """Canvas yscrollcommand: keep the scrollbar in sync and refill rows"""
+        self.scrollbar.set(first, last)
+        self.update_visible()
+
+    def bind_wheel(self, event=None):
+        """Scroll with the mouse wheel while the pointer is over the list"""
+        self.canvas.bind_all("<MouseWheel>", self.on_wheel)
+        self.canvas.bind_all("<Button-4>", self.on_wheel)
+        self.canvas.bind_all("<Button-5>", self.on_wheel)
+
+    def unbind_wheel(self, event=None):
+        """Stop capturing the mouse wheel once the pointer leaves the list"""
+        if event is not None:
+            # Moving onto a row widget also sends <Leave> to the canvas
+            under = self.winfo_containing(event.x_root, event.y_root)
+            if under is not None and str(under).startswith(str(self)):
+                return
+        self.canvas.unbind_all("<MouseWheel>")
+        self.canvas.unbind_all("<Button-4>")
+        self.canvas.unbind_all("<Button-5>")
+
+    def on_wheel(self, event):
+        """Handle wheel events on Windows/macOS (delta) and X11 (buttons 4/5)"""
+        if getattr(event, "num", None) == 4:
+            step = -1
+        elif getattr(event, "num", None) == 5:
+            step = 1
+        else:
+            step = int(-1 * (event.delta / 120)) or (-1 if event.delta > 0 else 1)
+        self.canvas.yview_scroll(step, "units")
@@ -0,0 +1,161 @@
+"""Group commit for attendance marks.
+
+When many threads mark attendance at once, each one takes SQLite's write
+lock for its own one-row transaction and the rest wait in busy_timeout.
+A WriteQueue funnels marks to a single writer thread instead. Marks that
+arrive while one commit is running form the next group, which goes out
+as a single transaction; each caller's future resolves with its own
+row's outcome. ``max_delay`` optionally waits longer for a group to grow,
+which only pays off when commits are expensive (synchronous=FULL).
+
+    writes = WriteQueue(db)
+    outcome = writes.submit(class_id, user_id, "Present").result()
+    writes.close()
+
+A queue only groups marks from its own process; several processes writing
+one file still contend for the write lock between their groups.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date
+
+from database import ATTENDANCE_STATUSES
+
+_STOP = object()
+
+
+class WriteQueue:
+    """A single writer thread that commits queued marks in groups"""
+
+    def __init__(self, db, max_delay=0.0, max_batch=1000):
+        self.db = db
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+        self.rejected = 0
+        self.errors = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._run, name="attendify-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, class_id, user_id, status, date_str=None):
+        """Queue one mark; returns a Future for its outcome dict.
+
+        The outcome has the same keys as Database.mark_attendance_many
+        outcomes. Database errors (such as a lock timeout) are raised from
+        ``result()`` instead.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteQueue is closed")
+            self._queue.put((class_id, user_id, status, date_str or date.today().isoformat(), future))
+        return future
+
+    def mark_attendance(self, class_id, user_id, status, date_str=None, timeout=None):
+        """Blocking counterpart of Database.mark_attendance; returns True on success"""
+        return self.submit(class_id, user_id, status, date_str).result(timeout)['ok']
+
+    def close(self):
+        """Commit everything already queued, then stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        """Get batch and write counters"""
+        return {
+            'batches': self.batches,
+            'writes': self.writes,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'largest_batch': self.largest_batch,
+            'mean_batch': round(self.writes / self.batches, 2) if self.batches else 0.0,
+            'queued': self._queue.qsize(),
+        }
+
+    def _run(self):
+        """Writer thread: gather a group, commit it, repeat"""
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._commit(batch)
+        finally:
+            self.db.release_connection()
+
+    def _commit(self, batch):
+        """Validate and write one group in a single transaction, then resolve its futures"""
+        outcomes = []
+        rows = []
+        try:
+            with self.db.transaction() as conn:
+                owners = {}
+                for class_id, user_id, status, date_str, _ in batch:
+                    if class_id not in owners:
+                        row = self.db.fetch_one('class_owner', (class_id,), conn)
+                        owners[class_id] = row['user_id'] if row else None
+                    error = None
+                    if status not in ATTENDANCE_STATUSES:
+                        error = f"Invalid status: {status!r}"
+                    elif owners[class_id] != user_id:
+                        error = f"Unknown class: {class_id!r}"
+                    else:
+                        try:
+                            date.fromisoformat(date_str)
+                        except (TypeError, ValueError):
+                            error = f"Invalid date: {date_str!r}"
+                    outcomes.append({
+                        'class_id': class_id,
+                        'date': date_str,
+                        'status': status,
+                        'ok': error is None,
+                        'error': error
+                    })
+                    if error is None:
+                        rows.append((class_id, user_id, date_str, status))
+                if rows:
+                    self.db.execute_many('mark_attendance', rows, conn)
+        except Exception as e:
+            # Any failure resolves the group's futures, so no caller waits forever
+            if isinstance(e, sqlite3.IntegrityError) and len(batch) > 1:
+                # One bad row rolled back the group; commit the rest one by one
+                for item in batch:
+                    self._commit([item])
+            else:
+                self.errors += len(batch)
+                for *_, future in batch:
+                    future.set_exception(e)
+            return
+
+        for user_id in {row[1] for row in rows}:
+            self.db.mark_changed('attendance', user_id=user_id)
+        self.batches += 1
+        self.writes += len(rows)
+        self.rejected += len(batch) - len(rows)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, _, _, _, future), outcome in zip(batch, outcomes):
+            future.set_result(outcome)